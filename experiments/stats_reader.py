@@ -1,72 +1,121 @@
-from collections import defaultdict
+from simulation.evaluator.statistics.metrics_time_series import MetricsTimeSeries
+from dataclasses import dataclass
 import numpy as np
-from statistics import mean
-import csv
+import os
+
+# The keys of the running totals returned by `load_file`, and the column
+# of the statistics file they are read from.
+TOTAL_KEYS = {
+    'hits_total': 'hits',
+    'misses_total': 'misses',
+    'cache_bytes_total': 'cache_bytes',
+    'origin_bytes_total': 'origin_bytes',
+    'neighbour_bytes_total': 'neighbour_bytes',
+    'items_total': 'no_items',
+    'cache_total': 'bytes_used',
+    'requests_to_origin': 'requests_to_origin',
+    'requests_to_neighbours': 'requests_to_neighbours',
+    'requests_to_neighbours_success': 'requests_to_neighbours_success',
+}
+
+# The keys of the changes per iteration returned by `load_file`, and the
+# column they are derived from.
+DELTA_KEYS = {
+    'hits': 'hits',
+    'misses': 'misses',
+    'cache_bytes_added': 'cache_bytes',
+    'origin_bytes_added': 'origin_bytes',
+    'neighbour_bytes_added': 'neighbour_bytes',
+    'items_added': 'no_items',
+    'cache_added': 'bytes_used',
+    'requests_to_origin_added': 'requests_to_origin',
+    'requests_to_neighbours_added': 'requests_to_neighbours',
+    'requests_to_neighbours_success_added': 'requests_to_neighbours_success',
+}
 
 def __average_data_over_window(data, window=5):
-    return [data[0]] + [mean(data[max(0, i - window) :i]) for i in range(len(data)) if i > 0]
+    return MetricsTimeSeries.windowed_average(data, window)
 
-def __total_to_delta(a: list[int]) -> list[int]:
-    total = 0
-    delta = []
-    for v in a:
-        delta.append(v - total)
-        total = v
-    return delta
+def __total_to_delta(a):
+    return np.diff(a, axis=-1, prepend=0)
 
 def aggregate_data_for_files(files):
-    plots = []
-    for f in files:
-        plots.append(load_file(f))
-
+    plots = [ load_file(f) for f in files ]
     aggregated_data = {}
-    for data in plots:
-    #    create_plots(data, title=data["source"])
-        for key in data:
-            if key == "source" or key == "iteration":
-                continue
-            if key not in aggregated_data:
-                aggregated_data[key] = data.get(key, [])
-            else:
-                aggregated_data[key] = np.sum(np.array([data[key], aggregated_data.get(key, [])]), axis=0)
+    for key in plots[0] if len(plots) > 0 else []:
+        if key == "source" or key == "iteration":
+            continue
+        aggregated_data[key] = np.sum([ data[key] for data in plots ], axis=0)
     return aggregated_data, plots
 
-def load_file(f):
-    data = defaultdict(list)
-    with open(f, 'r') as f:
-        stats_reader = csv.DictReader(f, delimiter=';')
-        for row in stats_reader:
-            for key, value in row.items():
-                # Parse each value as an int as there are no floats in our current data files.  As this changes this line also needs to change to something more complex.
-                data[key].append(int(value))
-    data = {
-        'iteration': data['iteration'],
-        'hits_total': data['hits'],
-        'misses_total': data['misses'],
-        'cache_bytes_total': data['cache_bytes'],
-        'origin_bytes_total': data['origin_bytes'],
-        'neighbour_bytes_total': data['neighbour_bytes'],
-        'items_total': data['no_items'],
-        'cache_total': data['bytes_used'],
-        'requests_to_origin': data['requests_to_origin'],
-        'requests_to_neighbours': data['requests_to_neighbours'],
-        'requests_to_neighbours_success': data['requests_to_neighbours_success']
-    }
-    data.update({
-        'source': f,
-        'hits': __total_to_delta(data['hits_total']),
-        'misses': __total_to_delta(data['misses_total']),
-        'cache_bytes_added': __total_to_delta(data['cache_bytes_total']),
-        'origin_bytes_added': __total_to_delta(data['origin_bytes_total']),
-        'neighbour_bytes_added': __total_to_delta(data['neighbour_bytes_total']),
-        'items_added': __total_to_delta(data['items_total']),
-        'cache_added': __total_to_delta(data['cache_total']),
-        'requests_to_origin_added': __total_to_delta(data['requests_to_origin']),
-        'requests_to_neighbours_added': __total_to_delta(data['requests_to_neighbours']),
-        'requests_to_neighbours_success_added': __total_to_delta(data['requests_to_neighbours_success']),
-    })
+def load_columns(f) -> tuple[list[str], np.ndarray]:
+    """Reads a statistics file, CSV or `.npy`, into its column names and
+    an int64 array of shape (iterations, columns)."""
+    if os.fspath(f).endswith('.npy'):
+        data = np.load(f)
+        columns = list(data.dtype.names)
+        return columns, np.stack([ data[key] for key in columns ], axis=-1).astype(np.int64)
+    with open(f, 'r') as stats_file:
+        columns = stats_file.readline().strip().split(';')
+        # Parse each value as an int as there are no floats in our current data files.  As this changes this line also needs to change to something more complex.
+        data = np.loadtxt(stats_file, delimiter=';', dtype=np.int64, ndmin=2)
+    return columns, data.reshape(-1, len(columns))
+
+def stats_from_columns(column, iterations, source):
+    """Builds the statistics as returned by `load_file` from `column`,
+    a function returning the values of a statistics column.  Deltas are
+    taken along the last axis, so the columns can hold several runs."""
+    data = { 'iteration': iterations }
+    data.update({ key: column(name) for key, name in TOTAL_KEYS.items() })
+    data['source'] = source
+    data.update({ key: __total_to_delta(column(name)) for key, name in DELTA_KEYS.items() })
     return data
 
+def load_file(f):
+    columns, values = load_columns(f)
+    index = { name: i for i, name in enumerate(columns) }
+    return stats_from_columns(lambda name: values[:, index[name]], values[:, index['iteration']], os.fspath(f))
+
+def stats_from_time_series(series, node: str):
+    """Returns the same data as `load_file` for a single node of a
+    `MetricsTimeSeries`, without writing and parsing a file."""
+    return stats_from_columns(lambda name: series.totals(name, node), series.iteration_numbers(), node)
+
+
+@dataclass
+class RunsArray:
+    """The statistics files of a directory, one run per file, in a
+    single array of shape (runs, iterations, columns)."""
+    sources: list[str]
+    columns: list[str]
+    data: np.ndarray
+
+    def column(self, name: str) -> np.ndarray:
+        """The values of a column for every run, of shape (runs,
+        iterations)."""
+        return self.data[:, :, self.columns.index(name)]
+
+    def stats(self):
+        """The statistics as returned by `load_file`, with every value of
+        shape (runs, iterations)."""
+        return stats_from_columns(self.column, self.column('iteration'), self.sources)
+
+
+def load_runs_array(dir) -> RunsArray:
+    """Loads every statistics file in `dir` into a `RunsArray`, all runs
+    need to have the same columns and number of iterations."""
+    with os.scandir(dir) as files:
+        paths = [ f.path for f in files
+                  if f.path.endswith('.csv') or f.path.endswith('.npy') ]
+    loaded = [ load_columns(path) for path in paths ]
+    if len(loaded) == 0:
+        return RunsArray(sources=[], columns=[], data=np.zeros((0, 0, 0), dtype=np.int64))
+    columns = loaded[0][0]
+    for path, (run_columns, values) in zip(paths, loaded):
+        if run_columns != columns or values.shape != loaded[0][1].shape:
+            raise ValueError(f"{path} does not match the columns and iterations of {paths[0]}")
+    return RunsArray(sources=paths, columns=columns, data=np.stack([ values for _, values in loaded ]))
+
 
 def extract_value_error(data):
     tuples = [ [ float(x) for x in v.split('+')] for v in data ]
@@ -0,0 +1,248 @@
+from experiments.utils import load_or_generate_trace, read_node_map, read_resource_map, make_dir
+from simulation.evaluator.binary_trace import BinaryTraceIterator
+from simulation.evaluator.resource_catalog import ResourceCatalog
+from simulation.evaluator.statistics.file_writer import StatsFileWriter
+from simulation.evaluator.strategy.runner import StrategyRunner
+from simulation.evaluator.strategy.strategy import CacheStrategy
+from simulation.evaluator.strategy.lru import LRUStrategy
+from simulation.evaluator.strategy.cooperative_lru import CooperativeLRUStrategy
+from simulation.evaluator.strategy.neighbouring_lru import NeighbouringLRUStrategy
+from simulation.evaluator.strategy.profiles import ProfilesStrategy
+from simulation.evaluator.strategy.federated import FederatedStrategy
+from simulation.evaluator.cache.policies import CACHE_POLICIES
+from simulation.evaluator.strategy.belady_min import run_belady
+from simulation.generator.main_zipf import TraceConfig, Simulation
+from simulation.generator.main_page_map import UserTraceConfig, UserSimulation
+from simulation.generator.edge_graph import EdgeNode
+from dataclasses import dataclass, field
+from multiprocessing import Pool
+from typing import Callable, Iterator, Optional
+from tqdm import tqdm
+import argparse
+import pathlib
+import time
+import os
+
+BELADY = "beladys"
+
+# The strategies that can be swept, by the name of their output directory.
+STRATEGIES: dict[str, Callable[[dict[str, int], dict[str, EdgeNode]], CacheStrategy]] = {
+    "lru": lambda nodes, node_map: LRUStrategy(nodes),
+    "cooplru": lambda nodes, node_map: CooperativeLRUStrategy(nodes, node_trail_length=3),
+    "neighbouring-lru": lambda nodes, node_map: NeighbouringLRUStrategy(nodes, { node: edge_node.neighbours for node, edge_node in node_map.items() }),
+    "profiles": lambda nodes, node_map: ProfilesStrategy(nodes, ranking_timeout=5, profile_size=10000),
+    "federated": lambda nodes, node_map: FederatedStrategy(nodes),
+    "federated-no-admission": lambda nodes, node_map: FederatedStrategy(nodes, cache_policy="lru-no-admission"),
+    "federated-gdsf": lambda nodes, node_map: FederatedStrategy(nodes, cache_policy="gdsf"),
+}
+# Every other replacement policy on its own nodes, to compare against LRU
+# and Belady's MIN.
+STRATEGIES.update({ cache_policy: lambda nodes, node_map, cache_policy=cache_policy: LRUStrategy(nodes, cache_policy=cache_policy)
+                    for cache_policy in CACHE_POLICIES if cache_policy != "lru" })
+
+# The strategies swept unless others are picked, the variants above only
+# run when asked for.
+DEFAULT_STRATEGIES = [ BELADY, "lru", "cooplru", "neighbouring-lru", "profiles", "federated" ]
+
+# The kinds of traces that can be swept, by the marker used in the output
+# file names.
+TRACE_KINDS = [ "075", "130", "page-map" ]
+
+@dataclass
+class SweepConfig:
+    out_dir: str
+    resource_file: str
+    node_map_file: str
+    page_map_file: Optional[str] = None
+    no_users: int = 1000
+    no_iterations: int = 5000
+    seeds: list[str] = field(default_factory=lambda: [ str(i) for i in range(10) ])
+    trace_kinds: list[str] = field(default_factory=lambda: list(TRACE_KINDS))
+    capacities: list[int] = field(default_factory=lambda: [ 1024 * 1024 * 1024 ])
+    strategies: list[str] = field(default_factory=lambda: list(DEFAULT_STRATEGIES))
+    workers: int = 1
+
+@dataclass(frozen=True)
+class GridPoint:
+    seed: str
+    trace_kind: str
+    capacity: int
+    strategy: str
+
+    def marker(self) -> str:
+        return f"{self.trace_kind}-{self.capacity}b-{self.seed}"
+
+
+def trace_path(config: SweepConfig, node_map: dict[str, EdgeNode], seed: str, trace_kind: str) -> str:
+    return f"{config.out_dir}/{trace_config(config, node_map, seed, trace_kind).to_filename()}.trace.gz"
+
+def trace_config(config: SweepConfig, node_map: dict[str, EdgeNode], seed: str, trace_kind: str):
+    if trace_kind == "075":
+        return TraceConfig(node_map=node_map, seed=seed, no_users=config.no_users, no_iterations=config.no_iterations, zipf_exponent=0.75)
+    if trace_kind == "130":
+        return TraceConfig(node_map=node_map, seed=seed, no_users=config.no_users, no_iterations=config.no_iterations, zipf_exponent=1.30)
+    if trace_kind == "page-map":
+        return UserTraceConfig(node_map=node_map, seed=seed, no_users=config.no_users, no_iterations=config.no_iterations)
+    raise ValueError(f"Unknown trace kind: {trace_kind}")
+
+def trace_simulation(config: SweepConfig, node_map: dict[str, EdgeNode], seed: str, trace_kind: str):
+    if trace_kind == "page-map":
+        return UserSimulation(trace_config(config, node_map, seed, trace_kind), config.page_map_file)
+    return Simulation(trace_config(config, node_map, seed, trace_kind), config.resource_file)
+
+def done_file(config: SweepConfig, point: GridPoint) -> pathlib.Path:
+    """The file marking that all statistics of `point` are written."""
+    return pathlib.Path(config.out_dir) / point.strategy / ".done" / point.marker()
+
+def grid(config: SweepConfig) -> list[GridPoint]:
+    return [ GridPoint(seed=seed, trace_kind=trace_kind, capacity=capacity, strategy=strategy)
+             for seed in config.seeds
+             for trace_kind in config.trace_kinds
+             for capacity in config.capacities
+             for strategy in config.strategies ]
+
+
+class SweepWorker:
+    """The state kept by every worker process: the node map and resources
+    are read once, traces are memory-mapped binary traces that are
+    opened once and shared with the other workers through the page
+    cache."""
+    config: SweepConfig
+    node_map: dict[str, EdgeNode]
+    resource_map: dict[str, int]
+    catalog: ResourceCatalog
+    traces: dict[str, BinaryTraceIterator]
+
+    def __init__(self, config: SweepConfig):
+        self.config = config
+        self.node_map = read_node_map(config.node_map_file)
+        self.resource_map = read_resource_map(config.resource_file)
+        self.catalog = ResourceCatalog(self.resource_map)
+        self.traces = {}
+
+    def trace(self, seed: str, trace_kind: str) -> BinaryTraceIterator:
+        path = trace_path(self.config, self.node_map, seed, trace_kind)
+        trace = self.traces.get(path)
+        if trace == None:
+            simulation = trace_simulation(self.config, self.node_map, seed, trace_kind)
+            trace = load_or_generate_trace(path, simulation, binary=True)
+            self.traces[path] = trace
+        return trace
+
+    def prepare_trace(self, seed: str, trace_kind: str) -> str:
+        """Generates and converts the trace if needed."""
+        self.trace(seed, trace_kind)
+        return trace_path(self.config, self.node_map, seed, trace_kind)
+
+    def run(self, point: GridPoint) -> tuple[GridPoint, float, int]:
+        """Runs a single grid point, returns how long it took and how many
+        instructions were replayed."""
+        start = time.perf_counter()
+        trace = self.trace(point.seed, point.trace_kind)
+        # The trace is shared between the grid points of this worker, not
+        # every consumer resets it before replaying.
+        trace.reset()
+        nodes = { node: point.capacity for node in self.node_map }
+        out_dir = make_dir(f"{self.config.out_dir}/{point.strategy}")
+        marker = f"n{len(nodes)}-{point.marker()}"
+        if point.strategy == BELADY:
+            next_use_dir = make_dir(f"{self.config.out_dir}/next-use/{pathlib.Path(trace_path(self.config, self.node_map, point.seed, point.trace_kind)).name}")
+            run_belady(trace, self.resource_map, point.capacity, out_dir, marker=marker, next_use_dir=next_use_dir)
+        else:
+            strategy = STRATEGIES[point.strategy](nodes, self.node_map)
+            stats_writers = { node: StatsFileWriter(f"{out_dir}/{node}-{marker}.csv") for node in nodes }
+            StrategyRunner(strategy, trace, self.catalog, stats_writers=stats_writers).perform()
+            for stats_writer in stats_writers.values():
+                stats_writer.close()
+        # Only mark the point done once its statistics are on disk, so a
+        # point that wrote nothing runs again on the next sweep.
+        if not any(pathlib.Path(out_dir).glob(f"*-{marker}.csv")):
+            raise RuntimeError(f"{point.strategy} {point.marker()} wrote no statistics")
+        done = done_file(self.config, point)
+        done.parent.mkdir(parents=True, exist_ok=True)
+        done.touch()
+        return point, time.perf_counter() - start, len(trace)
+
+
+_worker: Optional[SweepWorker] = None
+
+def _init_worker(config: SweepConfig):
+    global _worker
+    _worker = SweepWorker(config)
+
+def _prepare_trace(trace: tuple[str, str]) -> str:
+    return _worker.prepare_trace(*trace)
+
+def _run_point(point: GridPoint) -> tuple[GridPoint, float, int]:
+    return _worker.run(point)
+
+
+def run_sweep(config: SweepConfig) -> list[GridPoint]:
+    """Runs every grid point of the sweep that has not been completed
+    before and returns the points that were run.
+
+    Grid points are ordered by trace, so consecutive points that a worker
+    picks up tend to replay a trace it already opened.
+
+    """
+    make_dir(config.out_dir)
+    points = grid(config)
+    pending = [ point for point in points if not done_file(config, point).exists() ]
+    print(f"{len(points) - len(pending)} of {len(points)} grid points already done, running {len(pending)} with {config.workers} workers")
+    if len(pending) == 0:
+        return []
+    pending.sort(key=lambda point: (point.seed, point.trace_kind, point.capacity, point.strategy))
+    traces = list(dict.fromkeys((point.seed, point.trace_kind) for point in pending))
+
+    def execute(function, items) -> Iterator:
+        if config.workers <= 1:
+            _init_worker(config)
+            return map(function, items)
+        return pool.imap_unordered(function, items, chunksize=1)
+
+    pool = Pool(config.workers, initializer=_init_worker, initargs=(config,)) if config.workers > 1 else None
+    try:
+        for _ in tqdm(execute(_prepare_trace, traces), total=len(traces), desc="Preparing traces"):
+            pass
+        start = time.perf_counter()
+        no_instructions = 0
+        progress = tqdm(execute(_run_point, pending), total=len(pending), desc="Running grid points")
+        for point, duration, instructions in progress:
+            no_instructions += instructions
+            elapsed = time.perf_counter() - start
+            progress.set_postfix_str(f"{point.strategy} {point.marker()} in {duration:.1f}s, {no_instructions / elapsed:,.0f} instructions/sec")
+        elapsed = time.perf_counter() - start
+        print(f"Ran {len(pending)} grid points in {elapsed:.1f}s ({len(pending) / elapsed * 3600:.1f} points/hour, {no_instructions / elapsed:,.0f} instructions/sec)")
+    finally:
+        if pool != None:
+            pool.close()
+            pool.join()
+    return pending
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a grid of experiments (seeds x trace kinds x capacities x strategies) in parallel.")
+    parser.add_argument('out_dir', type=str,
+                        help="where to store the traces and the statistics, one directory per strategy")
+    parser.add_argument('resources', type=str,
+                        help="the location of the resource map")
+    parser.add_argument('node_map', type=str,
+                        help="the location of the node map, e.g. experiments/node_setups/14nodes.json")
+    parser.add_argument('--page-map', type=str, default=None,
+                        help="the location of the page map, required for page-map traces")
+    parser.add_argument('--no-users', type=int, default=1000)
+    parser.add_argument('--no-iterations', type=int, default=5000)
+    parser.add_argument('--seeds', type=str, nargs='+', default=[ str(i) for i in range(10) ])
+    parser.add_argument('--trace-kinds', type=str, nargs='+', default=TRACE_KINDS, choices=TRACE_KINDS)
+    parser.add_argument('--capacities', type=int, nargs='+', default=[ 1024 ],
+                        help="the capacities of the nodes in MiB")
+    parser.add_argument('--strategies', type=str, nargs='+', default=DEFAULT_STRATEGIES, choices=[ BELADY, *STRATEGIES.keys() ])
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+
+    args = parser.parse_args()
+    if "page-map" in args.trace_kinds and args.page_map == None:
+        parser.error("--page-map is required for page-map traces")
+    run_sweep(SweepConfig(out_dir=args.out_dir, resource_file=args.resources, node_map_file=args.node_map, page_map_file=args.page_map,
+                          no_users=args.no_users, no_iterations=args.no_iterations, seeds=args.seeds, trace_kinds=args.trace_kinds,
+                          capacities=[ capacity * 1024 * 1024 for capacity in args.capacities ], strategies=args.strategies,
+                          workers=args.workers))
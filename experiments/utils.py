@@ -1,7 +1,9 @@
 from simulation.evaluator.instruction_parser import StreamingTraceIterator, TraceIterator, InstructionParser, Instruction
+from simulation.evaluator.binary_trace import BinaryTraceIterator, binary_trace_path, convert_text_trace
 import simulation.evaluator.instructions as ins
 from simulation.generator.main_zipf import EdgeNode
-from simulation.evaluator.statistics.file_writer import StatsFileWriter
+from simulation.evaluator.statistics.file_writer import StatsFileWriter, NumpyStatsWriter
+from contextlib import contextmanager
 import csv
 import numpy as np
 import os
@@ -9,9 +11,13 @@ import re
 import gzip
 import time
 import copy
+import fcntl
+import hashlib
+import pathlib
+import shutil
 from typing import Tuple
 import json
-from experiments.stats_reader import load_file
+from experiments.stats_reader import load_file, load_runs_array
 
 class TraceIteratorProxy(StreamingTraceIterator):
     """A simple object that allows a trace for N amount of nodes to be
@@ -54,18 +60,84 @@ def make_dir(dir) -> str:
         os.makedirs(dir)
     return dir
 
-def generate_trace_if_not_exists(identifier: str, simulation):
-    """Generates a trace if it doesn't exist yet."""
-    if not os.path.exists(identifier):
-        with gzip.open(identifier, 'wb') as f:
-            f.write(str.encode(""))
-            for action in simulation.simulate():
-                f.write(str.encode(f"{action}\n"))
-
-def load_or_generate_trace(identifier: str, simulation) -> TraceIterator:
+def trace_key(simulation) -> str:
+    """Hashes the kind and configuration of `simulation` together with the
+    contents of the maps it reads, so a trace is regenerated whenever any
+    of them changes.  Simulations of different kinds produce different
+    traces from the same configuration."""
+    key = hashlib.sha256(type(simulation).__qualname__.encode())
+    key.update(repr(simulation.config).encode())
+    for input_file in simulation.input_files:
+        with open(input_file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                key.update(chunk)
+    return key.hexdigest()
+
+@contextmanager
+def file_lock(path: str):
+    """Holds an exclusive lock on `path` for the duration of the block,
+    shared between processes."""
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def __read_trace_key(identifier: str):
+    try:
+        with open(f"{identifier}.key", 'r') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+def __trace_is_current(identifier: str, key: str) -> bool:
+    return os.path.exists(identifier) and __read_trace_key(identifier) == key
+
+def __write_atomically(path: str, write):
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def generate_trace_if_not_exists(identifier: str, simulation, binary: bool = False):
+    """Generates a trace if it doesn't exist yet or was generated for a
+    different configuration or different maps.
+
+    The trace is written to a temporary file and renamed into place while
+    holding `<identifier>.lock`, so when several processes ask for the
+    same trace exactly one generates it and the others wait for it.  The
+    `trace_key` of the simulation is stored next to the trace in
+    `<identifier>.key`.  With `binary` the trace is also converted to the
+    binary columnar format under the same lock.
+
+    """
+    key = trace_key(simulation)
+    binary_path = binary_trace_path(identifier)
+    if __trace_is_current(identifier, key) and (not binary or binary_path.exists()):
+        return
+    with file_lock(f"{identifier}.lock"):
+        if not __trace_is_current(identifier, key):
+            __write_atomically(identifier, simulation.write_trace)
+            __write_atomically(f"{identifier}.key", lambda path: pathlib.Path(path).write_text(key))
+            # The binary version belongs to the previous trace.
+            if binary_path.exists():
+                shutil.rmtree(binary_path)
+        if binary and not binary_path.exists():
+            convert_text_trace(identifier, binary_path)
+
+def load_or_generate_trace(identifier: str, simulation, binary: bool = False) -> TraceIterator:
     """Loads the trace for the given `identifier`, if the trace does not
-    exist it is generated according to the `simulation`."""
-    generate_trace_if_not_exists(identifier, simulation)
+    exist it is generated according to the `simulation`.
+
+    With `binary` the trace is converted to the binary columnar format
+    once and replayed from there without any string parsing."""
+    generate_trace_if_not_exists(identifier, simulation, binary=binary)
+    if binary:
+        return BinaryTraceIterator(binary_trace_path(identifier))
     return StreamingTraceIterator(identifier)
 
 def clean_identifier(identifier: str) -> str:
@@ -96,10 +168,14 @@ def setup_node_map(no_nodes: int) -> dict[str, EdgeNode]:
 def setup_nodes(no_nodes: int, node_capacity: int):
     return {f"cdn{i + 1}": node_capacity for i, _ in enumerate(range(no_nodes))}
 
-def setup_stats_file_writers(nodes: dict[str, int], out_dir: str, marker: str = ""):
+def setup_stats_file_writers(nodes: dict[str, int], out_dir: str, marker: str = "", columnar: bool = False):
+    """Sets up a writer for every node, `columnar` writes `.npy` files
+    instead of CSV files."""
     timestamp = int(time.time())
     if len(marker) > 0:
         marker = f"-{marker}"
+    if columnar:
+        return {key: NumpyStatsWriter(f"{out_dir}/{key}{marker}-{timestamp}.npy") for key in nodes.keys()}
     return {key: StatsFileWriter(f"{out_dir}/{key}{marker}-{timestamp}.csv") for key in nodes.keys()}
 
 def calc_variance(data: list[float]) -> Tuple[float, float]:
@@ -125,23 +201,17 @@ def generate_comparison_plot(plt, x_data, strategies: dict[str, list[Tuple[float
         plot_with_error_bars(plt, x_data, data, label=label, marker=markers[idx], color=colors[idx], linestyle=linestyles[idx])
 
 def aggregate_runs_in_dir(dir):
-    aggregated_data = {}
-    for data in load_runs_in_dir(dir):
-        for key in data:
-            if key == "source" or key == "iteration":
-                continue
-            if key not in aggregated_data:
-                aggregated_data[key] = [ [v] for v in data.get(key, []) ]
-            else:
-                for i, x in enumerate(aggregated_data[key]):
-                    x.append(data[key][i])
-    return aggregated_data
+    """Loads all runs in a directory, every key maps to an array of shape
+    (iterations, runs)."""
+    stats = load_runs_array(dir).stats()
+    return { key: values.T for key, values in stats.items()
+             if key != "source" and key != "iteration" }
 
 def load_runs_in_dir(dir):
     """Load and aggregate the runs in a specific directory."""
     with os.scandir(dir) as files:
         plots = [ load_file(f) for f in files
-                  if f.path.endswith('.csv') ]
+                  if f.path.endswith('.csv') or f.path.endswith('.npy') ]
     return plots
 
 def calc_ratio(success, failed) -> float:
@@ -151,7 +221,9 @@ def calc_ratio(success, failed) -> float:
     return round(success / (total), 4)
 
 def calc_ratio_over(data, success_key: str, failed_key: str):
-    out = []
-    for success, failed in zip(data[success_key], data[failed_key]):
-        out.append(calc_variance([ calc_ratio(a, b) for a, b in zip(success, failed) ]))
-    return out
+    """The mean and standard deviation over the runs of the ratio at every
+    iteration, `data` as returned by `aggregate_runs_in_dir`."""
+    success, failed = np.asarray(data[success_key]), np.asarray(data[failed_key])
+    total = success + failed
+    ratios = np.round(np.divide(success, total, out=np.zeros(total.shape), where=total != 0), 4)
+    return list(zip(ratios.mean(axis=-1), ratios.std(axis=-1)))
@@ -0,0 +1,95 @@
+from simulation.evaluator.strategy.lru import LRUStrategy
+from simulation.evaluator.strategy.runner import StrategyRunner
+from simulation.evaluator.cache.lru_cache_linked import LRUCache
+from simulation.evaluator.cache.frequency_sketch import CountMinSketch
+from simulation.evaluator.instruction_parser import TraceIterator
+import simulation.evaluator.instructions as ins
+from simulation.generator.utils import read_resource_map
+from simulation.benchmarks.utils import generate_zipf_trace, timed
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+import multiprocessing
+import argparse
+import resource
+import pathlib
+import sys
+import os
+
+class SketchLRUStrategy(LRUStrategy):
+    """Builds every node with an admission sketch of `sketch_bytes`, or
+    with the exact request counts without."""
+    sketch_bytes: Optional[int]
+    doorkeeper: bool
+
+    def __init__(self, nodes: dict[str, int], sketch_bytes: Optional[int], doorkeeper: bool):
+        self.sketch_bytes = sketch_bytes
+        self.doorkeeper = doorkeeper
+        super().__init__(nodes)
+
+    def build_node(self, node_capacity: int) -> LRUCache:
+        if self.sketch_bytes == None:
+            return LRUCache(capacity=node_capacity)
+        return LRUCache(capacity=node_capacity, admission=CountMinSketch.with_memory(self.sketch_bytes, doorkeeper=self.doorkeeper))
+
+
+def current_rss() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+def admission_memory(node: LRUCache) -> int:
+    """The bytes held by the request counts or the sketch of a node."""
+    if node.admission != None:
+        return node.admission.memory()
+    return sys.getsizeof(node.req_count) + sum(sys.getsizeof(identifier) + sys.getsizeof(count) for identifier, count in node.req_count.items())
+
+def run_in_process(trace_file, resource_file, nodes: dict[str, int], sketch_bytes: Optional[int], doorkeeper: bool) -> dict:
+    """Replays the trace in a freshly spawned process, so the peak RSS
+    only belongs to this run and not to a forked copy of the parent."""
+    resource_map = read_resource_map(resource_file)
+    instructions = TraceIterator([ i for i in TraceIterator.from_file(trace_file)
+                                   if not isinstance(i, ins.CollectStatisticsInstruction) ])
+    strategy = SketchLRUStrategy(nodes, sketch_bytes, doorkeeper)
+    results = {}
+    rss_before = current_rss()
+    with timed(results, "duration"):
+        StrategyRunner(strategy, instructions, resource_map).perform()
+    metrics = [ node.cache_metrics for node in strategy.nodes.values() ]
+    results["hits"] = sum(m.hits for m in metrics) / sum(m.total_requests() for m in metrics)
+    results["requests"] = sum(m.total_requests() for m in metrics)
+    results["entries"] = sum(len(node.req_count) for node in strategy.nodes.values())
+    results["admission"] = sum(admission_memory(node) for node in strategy.nodes.values())
+    results["rss_growth"] = current_rss() - rss_before
+    results["peak_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the hit ratio and memory of LRU admission through exact request counts and through count-min sketches.")
+    parser.add_argument('--out-dir', type=pathlib.Path, default="./benchmark-out/",
+                        help="where to store the generated trace")
+    parser.add_argument('--no-users', type=int, default=200)
+    parser.add_argument('--no-iterations', type=int, default=500)
+    parser.add_argument('--no-nodes', type=int, default=14)
+    parser.add_argument('--no-resources', type=int, default=200000,
+                        help="a large catalog gives the trace a heavy tail of resources requested once")
+    parser.add_argument('--capacity', type=int, default=16,
+                        help="the capacity of every node in MiB")
+    parser.add_argument('--sketch-sizes', type=int, nargs='+', default=[ 4, 16, 64 ],
+                        help="the memory of the sketch of every node in KiB")
+
+    args = parser.parse_args()
+    trace_file, resource_file = generate_zipf_trace(args.out_dir, no_users=args.no_users, no_iterations=args.no_iterations, no_nodes=args.no_nodes, no_resources=args.no_resources)
+    nodes = { f"cdn{i + 1}": args.capacity * 1024 * 1024 for i in range(args.no_nodes) }
+    variants = [ ("exact", None, False) ]
+    for sketch_size in args.sketch_sizes:
+        variants.append((f"sketch {sketch_size} KiB", sketch_size * 1024, False))
+        variants.append((f"doorkeeper {sketch_size} KiB", sketch_size * 1024, True))
+
+    print(f"{args.no_nodes} nodes of {args.capacity} MiB, {args.no_resources} resources")
+    print(f"{'admission':>20} {'req/sec':>10} {'hits':>7} {'entries':>8} {'state MiB':>10} {'RSS growth MiB':>15} {'peak RSS MiB':>13}")
+    for name, sketch_bytes, doorkeeper in variants:
+        # Spawn rather than fork, a forked child starts with the memory of
+        # the parent, which just generated the trace.
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            results = executor.submit(run_in_process, trace_file, resource_file, nodes, sketch_bytes, doorkeeper).result()
+        print(f"{name:>20} {results['requests'] / results['duration']:>10,.0f} {results['hits']:>7.4f} {results['entries']:>8} "
+              f"{results['admission'] / 2**20:>10.2f} {results['rss_growth'] / 2**20:>15.1f} {results['peak_rss'] / 2**20:>13.1f}")
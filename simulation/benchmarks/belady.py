@@ -0,0 +1,65 @@
+from simulation.evaluator.strategy.belady_min import BeladysMINIteration, UnableToStoreError, order_content_by_node
+from simulation.evaluator.instruction_parser import StreamingTraceIterator
+from simulation.generator.utils import read_resource_map
+from simulation.benchmarks.utils import generate_zipf_trace, timed
+import argparse
+import pathlib
+
+class SortingBeladysMINIteration(BeladysMINIteration):
+    """Reference implementation that sorts all stored items on every
+    eviction, as done before the eviction queue."""
+
+    def make_weight_available(self, weight: int, min_iteration: int = 0) -> list[str]:
+        if weight > self.max_weight:
+            raise UnableToStoreError("Trying to clear weight for an item that will not fit.")
+        if self.max_weight - self.used_weight >= weight:
+            return []
+        ranking_by_call = self.ranking_by_next_call(min_iteration=min_iteration)
+        if weight > sum([ self.weight_for(item) for item in ranking_by_call ]):
+            raise UnableToStoreError("Not enough items to evict")
+        evicted = []
+        while self.max_weight - self.used_weight < weight:
+            item_to_evict = ranking_by_call.pop()
+            evicted.append(self.evict_item(item_to_evict))
+        return evicted
+
+def replay(MIN: BeladysMINIteration, no_iterations: int) -> list:
+    """Returns every decision and eviction set made by `MIN`."""
+    decisions = []
+    for iteration in range(no_iterations):
+        for identifier in MIN.request_trace[iteration]:
+            decisions.append(MIN.handle_request(identifier))
+    return decisions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Belady's MIN and check it against the sorting reference implementation.")
+    parser.add_argument('--out-dir', type=pathlib.Path, default="./benchmark-out/",
+                        help="where to store the generated trace")
+    parser.add_argument('--no-users', type=int, default=200)
+    parser.add_argument('--no-iterations', type=int, default=500)
+    parser.add_argument('--no-resources', type=int, default=100000,
+                        help="the number of resources in the generated resource map (about 25KiB each)")
+    parser.add_argument('--capacities', type=int, nargs='+', default=[ 64, 128, 256, 512, 1024, 2048 ],
+                        help="the node capacities in MiB")
+    parser.add_argument('--skip-reference', action='store_true',
+                        help="only time the current implementation")
+
+    args = parser.parse_args()
+    trace_file, resource_file = generate_zipf_trace(args.out_dir, no_users=args.no_users, no_iterations=args.no_iterations, no_nodes=1, no_resources=args.no_resources)
+    resource_map = read_resource_map(resource_file)
+    average_content_size = int(sum(resource_map.values()) / len(resource_map))
+    content_by_node, no_iterations = order_content_by_node(StreamingTraceIterator(trace_file))
+    request_trace = next(iter(content_by_node.values()))
+    no_requests = sum(len(r) for r in request_trace.values())
+
+    print(f"{no_requests} requests on a single node")
+    for capacity in args.capacities:
+        results = {}
+        with timed(results, "queue"):
+            decisions = replay(BeladysMINIteration(capacity * 1024 * 1024, request_trace, resource_map, average_content_size), no_iterations)
+        line = f"{capacity:>5} MiB: queue {no_requests / results['queue']:>10,.0f} req/sec"
+        if not args.skip_reference:
+            with timed(results, "sorting"):
+                reference = replay(SortingBeladysMINIteration(capacity * 1024 * 1024, request_trace, resource_map, average_content_size), no_iterations)
+            line += f", sorting {no_requests / results['sorting']:>10,.0f} req/sec, identical decisions: {decisions == reference}"
+        print(line)
@@ -0,0 +1,51 @@
+from simulation.evaluator.strategy.federated import FederatedStrategy
+from simulation.evaluator.cache.policies import CACHE_POLICIES
+from simulation.evaluator.strategy.runner import StrategyRunner
+from simulation.evaluator.statistics.file_writer import StatsFileWriter
+from simulation.evaluator.instruction_parser import TraceIterator
+from simulation.evaluator.placement import PLACEMENTS
+import simulation.evaluator.instructions as ins
+from simulation.generator.utils import read_resource_map
+from simulation.benchmarks.utils import generate_zipf_trace, timed
+import argparse
+import pathlib
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the requests/sec and hit ratio of the FederatedStrategy for node cache policies.")
+    parser.add_argument('--out-dir', type=pathlib.Path, default="./benchmark-out/",
+                        help="where to store the generated trace and statistics")
+    parser.add_argument('--no-users', type=int, default=200)
+    parser.add_argument('--no-iterations', type=int, default=500)
+    parser.add_argument('--no-nodes', type=int, default=14)
+    parser.add_argument('--capacity', type=int, default=16,
+                        help="the capacity of every node in MiB")
+    parser.add_argument('--cache-policies', nargs='+', default=[ "lru", "lru-no-admission", "gdsf" ], choices=list(CACHE_POLICIES))
+    parser.add_argument('--placement', default="modulo", choices=list(PLACEMENTS))
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="the best of this many runs is reported")
+
+    args = parser.parse_args()
+    trace_file, resource_file = generate_zipf_trace(args.out_dir, no_users=args.no_users, no_iterations=args.no_iterations, no_nodes=args.no_nodes)
+    resource_map = read_resource_map(resource_file)
+    # Decode the trace up front and leave out collecting statistics, so
+    # only the request path is timed.
+    instructions = TraceIterator([ i for i in TraceIterator.from_file(trace_file)
+                                   if not isinstance(i, ins.CollectStatisticsInstruction) ])
+    no_requests = sum(1 for i in instructions.instructions if isinstance(i, ins.RequestInstruction))
+    nodes = { f"cdn{i + 1}": args.capacity * 1024 * 1024 for i in range(args.no_nodes) }
+
+    stats_dir = args.out_dir / "federated"
+    stats_dir.mkdir(parents=True, exist_ok=True)
+    print(f"{no_requests} requests on {args.no_nodes} nodes, {args.placement} placement")
+    for cache_policy in args.cache_policies:
+        durations = []
+        for run in range(args.repeat):
+            results = {}
+            strategy = FederatedStrategy(nodes, placement=PLACEMENTS[args.placement](), cache_policy=cache_policy)
+            stats_writers = { node: StatsFileWriter(stats_dir / f"{node}.csv") for node in nodes }
+            runner = StrategyRunner(strategy, instructions, resource_map, stats_writers)
+            with timed(results, cache_policy):
+                runner.perform()
+            durations.append(results[cache_policy])
+        hits = sum(node.cache_metrics.hits for node in strategy.nodes.values())
+        print(f"{cache_policy:>16}: {no_requests / min(durations):>10,.0f} req/sec, hit ratio {hits / no_requests:.4f}")
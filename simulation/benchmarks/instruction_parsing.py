@@ -0,0 +1,39 @@
+from simulation.evaluator.instruction_parser import InstructionParser
+from simulation.benchmarks.utils import generate_zipf_trace, timed
+import argparse
+import pathlib
+import gzip
+
+def parse_lines_raw(lines: list[bytes]):
+    """Parsing as done before the table-driven decoder."""
+    for line in lines:
+        InstructionParser.parse_raw(line.decode())
+
+def parse_lines_table(lines: list[bytes]):
+    for line in lines:
+        InstructionParser.parse(line.decode())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark instruction parsing on a generated zipf trace.")
+    parser.add_argument('--out-dir', type=pathlib.Path, default="./benchmark-out/",
+                        help="where to store the generated trace")
+    parser.add_argument('--no-users', type=int, default=500)
+    parser.add_argument('--no-iterations', type=int, default=1000)
+
+    args = parser.parse_args()
+    trace_file, _ = generate_zipf_trace(args.out_dir, no_users=args.no_users, no_iterations=args.no_iterations)
+    with gzip.open(trace_file, 'rb') as f:
+        lines = f.readlines()
+
+    results = {}
+    with timed(results, "RawInstruction + getattr"):
+        parse_lines_raw(lines)
+    with timed(results, "decoder table"):
+        parse_lines_table(lines)
+    with timed(results, "streaming file (decoder table)"):
+        for _ in InstructionParser.streaming_intructions(trace_file):
+            pass
+
+    print(f"{len(lines)} lines")
+    for name, seconds in results.items():
+        print(f"{name:>32}: {len(lines) / seconds:>12,.0f} lines/sec")
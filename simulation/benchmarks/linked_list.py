@@ -0,0 +1,175 @@
+from simulation.evaluator.cache.linked_list import LinkedList
+from simulation.benchmarks.utils import timed
+from dataclasses import dataclass
+from typing import Optional
+import tracemalloc
+import argparse
+import random
+
+@dataclass
+class ReferenceNode:
+    data: any
+    previous: Optional[any]
+    next: Optional[any]
+
+@dataclass
+class ReferenceLinkedList:
+    """The dataclass based list that was used before the sentinel list."""
+    head: Optional[ReferenceNode]
+    tail: Optional[ReferenceNode]
+    mapping: dict[any, ReferenceNode]
+
+    def __init__(self):
+        self.head = None
+        self.tail = None
+        self.mapping = {}
+
+    def append(self, data):
+        if self.head != None and self.head.data == data:
+            return
+        if data in self.mapping:
+            node = self.mapping[data]
+            if node.previous != None:
+                node.previous.next = node.next
+            if node.next != None:
+                node.next.previous = node.previous
+            else:
+                # This was the tail.
+                self.tail = node.previous
+            node.previous = None
+        else:
+            node = ReferenceNode(data=data, previous=None, next=None)
+            self.mapping[data] = node
+        if self.head != None:
+            node.next = self.head
+            self.head.previous = node
+        self.head = node
+        if self.tail == None:
+            self.tail = node
+
+    def pop(self):
+        if self.tail != None:
+            last_elem = self.tail
+            self.tail = last_elem.previous
+            if self.head.data == last_elem.data:
+                self.head = None
+        elif self.head != None:
+            last_elem = self.head
+            self.head = None
+        else:
+            return None
+        if last_elem.previous != None:
+            last_elem.previous.next = None
+
+        del self.mapping[last_elem.data]
+        return last_elem.data
+
+def check_examples():
+    """The examples that used to be kept as comments in `linked_list.py`."""
+    l = LinkedList()
+    assert l.pop() == None
+    l.append('Test')
+    assert l.pop() == 'Test'
+    assert l.pop() == None
+
+    l.append('Hi')
+    l.append('There')
+    l.append('You')
+    assert l.pop() == 'Hi'
+    l.append('There')
+    assert l.pop() == 'You'
+    assert l.pop() == 'There'
+    assert l.pop() == None
+
+    l.append("Hello")
+    l.append("World")
+    l.append("Hello")
+    assert l.pop() == "World"
+    assert l.pop() == "Hello"
+
+    l.append('Hi')
+    l.append('There')
+    l.append('You')
+    l.append('There')
+    assert l.pop() == 'Hi'
+    assert l.pop() == 'You'
+    l.append("Doe")
+    assert l.pop() == 'There'
+    l.append("John")
+    l.append("John")
+    assert l.pop() == 'Doe'
+    assert l.pop() == 'John'
+    assert l.pop() == None
+    assert len(l) == 0 and l.head == None and l.tail == None
+
+def check_random_operations(no_rounds: int, seed: int = 0):
+    """Applies the same random appends and pops, including pops from an
+    empty list, to both lists and compares every result and the order of
+    the remaining items."""
+    rand = random.Random(seed)
+    for _ in range(no_rounds):
+        reference, linked_list = ReferenceLinkedList(), LinkedList()
+        no_values = rand.randint(1, 20)
+        for _ in range(rand.randint(0, 200)):
+            if rand.random() < 0.3:
+                assert reference.pop() == linked_list.pop()
+            else:
+                value = rand.randrange(no_values)
+                reference.append(value)
+                linked_list.append(value)
+            assert reference.mapping.keys() == linked_list.mapping.keys()
+            assert (reference.head == None) == (linked_list.head == None)
+            if reference.head != None:
+                assert reference.head.data == linked_list.head.data
+                assert reference.tail.data == linked_list.tail.data
+        while True:
+            value = reference.pop()
+            assert value == linked_list.pop()
+            if value == None:
+                break
+
+def lru_workload(no_touches: int, no_items: int, seed: int = 0) -> list[str]:
+    """A sequence of touched identifiers with zipf-like popularity."""
+    rand = random.Random(seed)
+    weights = [ 1 / (i + 1) ** 0.8 for i in range(no_items) ]
+    return [ f"resource-{i}" for i in rand.choices(range(no_items), weights=weights, k=no_touches) ]
+
+def replay(linked_list, touches: list, capacity: int):
+    mapping = linked_list.mapping
+    for identifier in touches:
+        linked_list.append(identifier)
+        if len(mapping) > capacity:
+            linked_list.pop()
+
+def bytes_per_item(factory, no_items: int) -> float:
+    tracemalloc.start()
+    linked_list = factory()
+    start, _ = tracemalloc.get_traced_memory()
+    for i in range(no_items):
+        linked_list.append(i)
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (end - start) / no_items
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the LRU linked list and check it against the dataclass reference.")
+    parser.add_argument('--no-touches', type=int, default=2_000_000)
+    parser.add_argument('--no-items', type=int, default=100_000)
+    parser.add_argument('--capacity', type=int, default=20_000,
+                        help="the number of items kept listed before popping")
+    parser.add_argument('--no-rounds', type=int, default=2000,
+                        help="the number of randomized equivalence rounds")
+
+    args = parser.parse_args()
+    check_examples()
+    check_random_operations(args.no_rounds)
+    print(f"Equivalence checks passed ({args.no_rounds} random rounds)")
+
+    touches = lru_workload(args.no_touches, args.no_items)
+    results = {}
+    with timed(results, "reference"):
+        replay(ReferenceLinkedList(), touches, args.capacity)
+    with timed(results, "current"):
+        replay(LinkedList(), touches, args.capacity)
+    print(f"dataclass list: {args.no_touches / results['reference']:>12,.0f} touches/sec, {bytes_per_item(ReferenceLinkedList, args.no_items):.0f} bytes/item")
+    print(f"sentinel list:  {args.no_touches / results['current']:>12,.0f} touches/sec, {bytes_per_item(LinkedList, args.no_items):.0f} bytes/item")
@@ -0,0 +1,54 @@
+from simulation.evaluator.strategy.multi_capacity_lru import MultiCapacityLRU
+from simulation.evaluator.strategy.lru import LRUStrategy
+from simulation.evaluator.strategy.runner import StrategyRunner
+from simulation.evaluator.statistics.file_writer import StatsFileWriter
+from simulation.evaluator.instruction_parser import TraceIterator
+from simulation.generator.utils import read_resource_map
+from simulation.benchmarks.utils import generate_zipf_trace, timed
+import argparse
+import pathlib
+
+def stats_writers_in(out_dir: pathlib.Path, nodes: list[str]) -> dict[str, StatsFileWriter]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return { node: StatsFileWriter(out_dir / f"{node}.csv") for node in nodes }
+
+def read_outputs(out_dir: pathlib.Path) -> dict[str, str]:
+    return { f.name: f.read_text() for f in out_dir.glob("*.csv") }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the single pass multi-capacity LRU against one LRU run per capacity.")
+    parser.add_argument('--out-dir', type=pathlib.Path, default="./benchmark-out/",
+                        help="where to store the generated trace and statistics")
+    parser.add_argument('--no-users', type=int, default=200)
+    parser.add_argument('--no-iterations', type=int, default=500)
+    parser.add_argument('--no-nodes', type=int, default=14)
+    parser.add_argument('--capacities', type=int, nargs='+', default=[ 16, 32, 64, 128, 256, 512 ],
+                        help="the node capacities in MiB")
+    parser.add_argument('--min-req-count', type=int, default=3)
+
+    args = parser.parse_args()
+    trace_file, resource_file = generate_zipf_trace(args.out_dir, no_users=args.no_users, no_iterations=args.no_iterations, no_nodes=args.no_nodes)
+    resource_map = read_resource_map(resource_file)
+    # Load the trace up front, both approaches should pay for decoding once.
+    instructions = TraceIterator.from_file(trace_file)
+    nodes = [ f"cdn{i + 1}" for i in range(args.no_nodes) ]
+    capacities = [ capacity * 1024 * 1024 for capacity in args.capacities ]
+    stats_dir = args.out_dir / "multi-capacity-lru"
+
+    results = {}
+    with timed(results, "separate"):
+        for capacity in capacities:
+            strategy = LRUStrategy({ node: capacity for node in nodes })
+            for node in strategy.nodes.values():
+                node.min_req_count = args.min_req_count
+            StrategyRunner(strategy, instructions, resource_map, stats_writers_in(stats_dir / f"separate-{capacity}", nodes)).perform()
+    with timed(results, "single-pass"):
+        evaluator = MultiCapacityLRU(nodes, capacities, min_req_count=args.min_req_count)
+        evaluator.perform(instructions, resource_map, { capacity: stats_writers_in(stats_dir / f"single-pass-{capacity}", nodes)
+                                                        for capacity in capacities })
+
+    identical = all(read_outputs(stats_dir / f"separate-{capacity}") == read_outputs(stats_dir / f"single-pass-{capacity}")
+                    for capacity in capacities)
+    print(f"{len(instructions)} instructions, {len(capacities)} capacities")
+    print(f"separate runs: {results['separate']:.2f}s, single pass: {results['single-pass']:.2f}s "
+          f"({results['separate'] / results['single-pass']:.1f}x), identical statistics: {identical}")
@@ -0,0 +1,60 @@
+from simulation.evaluator.strategy.lru import LRUStrategy
+from simulation.evaluator.strategy.cooperative_lru import CooperativeLRUStrategy
+from simulation.evaluator.strategy.neighbouring_lru import NeighbouringLRUStrategy
+from simulation.evaluator.strategy.profiles import ProfilesStrategy
+from simulation.evaluator.strategy.runner import StrategyRunner, MultiStrategyRunner
+from simulation.evaluator.statistics.file_writer import StatsFileWriter
+from simulation.evaluator.instruction_parser import StreamingTraceIterator
+from simulation.evaluator.resource_catalog import ResourceCatalog
+from simulation.benchmarks.utils import generate_zipf_trace, setup_node_map, timed
+import argparse
+import pathlib
+
+def stats_writers_in(out_dir: pathlib.Path, nodes: list[str]) -> dict[str, StatsFileWriter]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return { node: StatsFileWriter(out_dir / f"{node}.csv") for node in nodes }
+
+def read_outputs(out_dir: pathlib.Path) -> dict[str, bytes]:
+    return { f.name: f.read_bytes() for f in out_dir.glob("*.csv") }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark replaying a trace through several strategies in lockstep against one run per strategy.")
+    parser.add_argument('--out-dir', type=pathlib.Path, default="./benchmark-out/",
+                        help="where to store the generated trace and statistics")
+    parser.add_argument('--no-users', type=int, default=200)
+    parser.add_argument('--no-iterations', type=int, default=500)
+    parser.add_argument('--no-nodes', type=int, default=14)
+    parser.add_argument('--capacity', type=int, default=16,
+                        help="the capacity of every node in MiB")
+    parser.add_argument('--strategies', type=str, nargs='+', default=[ "lru", "cooplru", "neighbouring-lru", "profiles" ],
+                        help="the strategies to replay, the cheaper the strategies the larger the share of decoding the trace")
+
+    args = parser.parse_args()
+    trace_file, resource_file = generate_zipf_trace(args.out_dir, no_users=args.no_users, no_iterations=args.no_iterations, no_nodes=args.no_nodes)
+    catalog = ResourceCatalog.from_file(resource_file)
+    node_map = setup_node_map(args.no_nodes)
+    nodes = { node: args.capacity * 1024 * 1024 for node in node_map }
+    strategies = {
+        "lru": lambda: LRUStrategy(nodes),
+        "cooplru": lambda: CooperativeLRUStrategy(nodes, node_trail_length=3),
+        "neighbouring-lru": lambda: NeighbouringLRUStrategy(nodes, { node: edge_node.neighbours for node, edge_node in node_map.items() }),
+        "profiles": lambda: ProfilesStrategy(nodes, ranking_timeout=5, profile_size=10000),
+    }
+    strategies = { name: strategies[name] for name in args.strategies }
+    stats_dir = args.out_dir / "multi-strategy"
+
+    # Both approaches stream the gzipped trace, as the experiments do.
+    results = {}
+    with timed(results, "separate"):
+        for name, build_strategy in strategies.items():
+            StrategyRunner(build_strategy(), StreamingTraceIterator(trace_file), catalog,
+                           stats_writers_in(stats_dir / f"separate-{name}", list(nodes))).perform()
+    with timed(results, "lockstep"):
+        MultiStrategyRunner({ name: build_strategy() for name, build_strategy in strategies.items() }, StreamingTraceIterator(trace_file), catalog,
+                            { name: stats_writers_in(stats_dir / f"lockstep-{name}", list(nodes)) for name in strategies }).perform()
+
+    identical = all(read_outputs(stats_dir / f"separate-{name}") == read_outputs(stats_dir / f"lockstep-{name}")
+                    for name in strategies)
+    print(f"{len(strategies)} strategies on {args.no_nodes} nodes")
+    print(f"separate runs: {results['separate']:.2f}s, lockstep: {results['lockstep']:.2f}s "
+          f"({results['separate'] / results['lockstep']:.2f}x), identical statistics: {identical}")
@@ -0,0 +1,112 @@
+from simulation.evaluator.strategy.cooperative_lru import CooperativeLRUStrategy
+from simulation.evaluator.strategy.neighbouring_lru import NeighbouringLRUStrategy
+from simulation.evaluator.strategy.runner import StrategyRunner
+from simulation.evaluator.strategy.strategy import CacheStrategy
+from simulation.evaluator.instruction_parser import TraceIterator
+import simulation.evaluator.instructions as ins
+from simulation.generator.utils import read_resource_map
+from simulation.benchmarks.utils import generate_zipf_trace, setup_node_map, timed
+import argparse
+import pathlib
+
+def probe_request(self, for_user: str, for_node: str, resource_id: int, size: int, at_timestamp: int):
+    """Handles a request by asking every neighbour in turn, as the
+    cooperative strategies did before they kept a `HoldersIndex`."""
+    node = self.nodes[for_node]
+    if node.retrieve(resource_id, at_timestamp) != None:
+        node.cache_metrics.track_hit(size)
+        return
+    content_neighbours = self.content_neighbours[for_node]
+    content_neighbour = content_neighbours.get(resource_id)
+    if content_neighbour != None:
+        node.cache_metrics.track_request_neighbour()
+        if self.nodes[content_neighbour].has(resource_id):
+            node.cache_metrics.track_request_neighbour_success(size)
+            node.cache_metrics.track_hit(size)
+            if not self.outsource_resources:
+                node.store(resource_id, size, at_timestamp)
+            return
+        content_neighbours[resource_id] = None
+
+    for neighbour in self.find_latest_nodes(for_user, for_node, content_neighbour):
+        node.cache_metrics.track_request_neighbour()
+        if self.nodes[neighbour].has(resource_id):
+            content_neighbours[resource_id] = neighbour
+            node.cache_metrics.track_request_neighbour_success(size)
+            node.cache_metrics.track_hit(size)
+            if not self.outsource_resources:
+                node.store(resource_id, size, at_timestamp)
+            return
+
+    node.cache_metrics.track_miss()
+    node.cache_metrics.track_request_origin()
+    node.store(resource_id, size, at_timestamp)
+    node.cache_metrics.track_bytes_origin(size)
+
+
+def without_index(strategy: CooperativeLRUStrategy) -> CooperativeLRUStrategy:
+    """Stops the caches of `strategy` from updating the holders index,
+    which probing does not need."""
+    for node in strategy.nodes.values():
+        node.holders = None
+    return strategy
+
+
+class ProbingCooperativeLRUStrategy(CooperativeLRUStrategy):
+    handle_request = probe_request
+    # The trail is taken on every request instead.
+    handle_node_connect = CacheStrategy.handle_node_connect
+
+    def find_latest_nodes(self, user, node, content_neighbour) -> list[str]:
+        trail = list(set(self.user_node_map[user][-(self.node_trail_length + 1):-1]))
+        return [ x for x in trail if x != content_neighbour and x != node ]
+
+
+class ProbingNeighbouringLRUStrategy(NeighbouringLRUStrategy):
+    handle_request = probe_request
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the neighbour lookup of the cooperative strategies through the holders index against asking every neighbour, and check both give the same statistics.")
+    parser.add_argument('--out-dir', type=pathlib.Path, default="./benchmark-out/",
+                        help="where to store the generated trace")
+    parser.add_argument('--no-users', type=int, default=200)
+    parser.add_argument('--no-iterations', type=int, default=500)
+    parser.add_argument('--no-nodes', type=int, default=14)
+    parser.add_argument('--capacity', type=int, default=16,
+                        help="the capacity of every node in MiB")
+    parser.add_argument('--trail-lengths', type=int, nargs='+', default=[ 3, 8 ])
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="the best of this many runs is reported")
+
+    args = parser.parse_args()
+    trace_file, resource_file = generate_zipf_trace(args.out_dir, no_users=args.no_users, no_iterations=args.no_iterations, no_nodes=args.no_nodes)
+    resource_map = read_resource_map(resource_file)
+    instructions = TraceIterator([ i for i in TraceIterator.from_file(trace_file)
+                                   if not isinstance(i, ins.CollectStatisticsInstruction) ])
+    no_requests = sum(1 for i in instructions.instructions if isinstance(i, ins.RequestInstruction))
+    nodes = { f"cdn{i + 1}": args.capacity * 1024 * 1024 for i in range(args.no_nodes) }
+    node_map = { node: edge_node.neighbours for node, edge_node in setup_node_map(args.no_nodes).items() }
+
+    comparisons = { f"cooperative, trail {n}": (lambda n=n: without_index(ProbingCooperativeLRUStrategy(nodes, node_trail_length=n)),
+                                                lambda n=n: CooperativeLRUStrategy(nodes, node_trail_length=n))
+                    for n in args.trail_lengths }
+    comparisons["neighbouring"] = (lambda: without_index(ProbingNeighbouringLRUStrategy(nodes, node_map)),
+                                   lambda: NeighbouringLRUStrategy(nodes, node_map))
+
+    print(f"{no_requests} requests on {args.no_nodes} nodes")
+    for name, builders in comparisons.items():
+        # Alternate between the builders, so drift in the speed of the
+        # machine affects both alike.
+        durations, statistics = [ [] for _ in builders ], [ None for _ in builders ]
+        for run in range(args.repeat):
+            for i, build_strategy in enumerate(builders):
+                results = {}
+                strategy = build_strategy()
+                with timed(results, name):
+                    StrategyRunner(strategy, instructions, resource_map).perform()
+                durations[i].append(results[name])
+                statistics[i] = strategy.capture_statistics()
+        rates = [ no_requests / min(d) for d in durations ]
+        print(f"{name:>20}: probing {rates[0]:>9,.0f} req/sec, index {rates[1]:>9,.0f} req/sec "
+              f"({rates[1] / rates[0]:.2f}x), identical statistics: {statistics[0] == statistics[1]}")
@@ -0,0 +1,47 @@
+from simulation.evaluator.placement import PLACEMENTS
+from simulation.evaluator.resource_catalog import ResourceCatalog
+from simulation.benchmarks.utils import write_resource_map, timed
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import argparse
+import pathlib
+import os
+
+def assign_in_process(resource_file, placement: str, nodes: list[str]) -> np.ndarray:
+    return PLACEMENTS[placement]().assign(ResourceCatalog.from_file(resource_file), nodes)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the balance, stability, and cost of the placements used by the FederatedStrategy.")
+    parser.add_argument('--out-dir', type=pathlib.Path, default="./benchmark-out/",
+                        help="where to store the generated resource map")
+    parser.add_argument('--resources', type=pathlib.Path, default=None,
+                        help="the resource map to place, a synthetic map is generated by default")
+    parser.add_argument('--no-resources', type=int, default=100000)
+    parser.add_argument('--no-nodes', type=int, default=14)
+
+    args = parser.parse_args()
+    resource_file = args.resources
+    if resource_file == None:
+        resource_file = args.out_dir / f"{args.no_resources}resources" / "resources.csv"
+        if not resource_file.exists():
+            resource_file.parent.mkdir(parents=True, exist_ok=True)
+            write_resource_map(resource_file, no_resources=args.no_resources)
+    catalog = ResourceCatalog.from_file(resource_file)
+    nodes = [ f"cdn{i + 1}" for i in range(args.no_nodes) ]
+
+    print(f"{len(catalog)} resources on {len(nodes)} nodes, imbalance is the largest node relative to the mean")
+    print(f"{'placement':>14} {'assign':>8} {'items':>7} {'bytes':>7} {'moved':>7} {'stable':>7}")
+    for name, build_placement in PLACEMENTS.items():
+        results = {}
+        with timed(results, "assign"):
+            assignment = build_placement().assign(catalog, nodes)
+        items = np.bincount(assignment, minlength=len(nodes))
+        node_bytes = np.bincount(assignment, weights=catalog.sizes, minlength=len(nodes))
+        # The share of resources that change node when the last node is
+        # removed, ideally only the resources of that node.
+        without_last = build_placement().assign(catalog, nodes[:-1])
+        moved = np.mean(assignment[assignment != len(nodes) - 1] != without_last[assignment != len(nodes) - 1])
+        # A fresh process has a different salt for `str.__hash__`.
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            stable = np.array_equal(assignment, executor.submit(assign_in_process, resource_file, name, nodes).result())
+        print(f"{name:>14} {results['assign']:>7.2f}s {items.max() / items.mean():>7.3f} {node_bytes.max() / node_bytes.mean():>7.3f} {moved:>7.1%} {str(stable):>7}")
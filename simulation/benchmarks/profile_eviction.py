@@ -0,0 +1,95 @@
+from simulation.evaluator.strategy.profiles import ProfilesStrategy
+from simulation.evaluator.strategy.runner import StrategyRunner
+from simulation.evaluator.cache.profile_lru_cache import ProfileLRUCache
+from simulation.evaluator.statistics.file_writer import StatsFileWriter
+from simulation.evaluator.instruction_parser import TraceIterator
+from simulation.generator.utils import read_resource_map
+from simulation.benchmarks.utils import generate_zipf_trace
+import argparse
+import pathlib
+import time
+
+class ScanProfileLRUCache(ProfileLRUCache):
+    """Finds the items to evict by scanning the content and the ranking,
+    as `ProfileLRUCache` did before it kept an eviction index."""
+    eviction_time: float = 0
+
+    def remove_older_items(self, no_bytes: int, less_popular_than: int):
+        start = time.perf_counter()
+        bytes_freed = self.capacity_available()
+
+        content_by_least_accessed = []
+
+        for k in self.content:
+            if k not in self.ranking:
+                content_by_least_accessed.append(k)
+
+        for k in self.popularity.least_popular(less_popular_than):
+            if k in self.content:
+                content_by_least_accessed.append(k)
+
+        available_bytes = sum([ self.content[k] for k in content_by_least_accessed ])
+        if bytes_freed + available_bytes < no_bytes:
+            self.eviction_time += time.perf_counter() - start
+            return False
+
+        while bytes_freed < no_bytes:
+            to_remove = content_by_least_accessed.pop(0)
+            bytes_freed += self.content[to_remove]
+            self.remove(to_remove)
+        self.eviction_time += time.perf_counter() - start
+        return True
+
+
+class TimedProfileLRUCache(ProfileLRUCache):
+    eviction_time: float = 0
+
+    def remove_older_items(self, no_bytes: int, less_popular_than: int):
+        start = time.perf_counter()
+        result = super().remove_older_items(no_bytes, less_popular_than)
+        self.eviction_time += time.perf_counter() - start
+        return result
+
+
+class ScanProfilesStrategy(ProfilesStrategy):
+    def build_node(self, capacity: int) -> ProfileLRUCache:
+        return ScanProfileLRUCache(capacity=capacity)
+
+
+class TimedProfilesStrategy(ProfilesStrategy):
+    def build_node(self, capacity: int) -> ProfileLRUCache:
+        return TimedProfileLRUCache(capacity=capacity)
+
+
+def read_outputs(out_dir: pathlib.Path) -> dict[str, bytes]:
+    return { f.name: f.read_bytes() for f in out_dir.glob("*.csv") }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the eviction index of the ProfileLRUCache against scanning the content and ranking, and check both evict the same items.")
+    parser.add_argument('--out-dir', type=pathlib.Path, default="./benchmark-out/",
+                        help="where to store the generated trace and statistics")
+    parser.add_argument('--no-users', type=int, default=500)
+    parser.add_argument('--no-iterations', type=int, default=300)
+    parser.add_argument('--no-nodes', type=int, default=14)
+    parser.add_argument('--capacities', type=int, nargs='+', default=[ 4, 16, 64 ],
+                        help="the node capacities in MiB")
+    parser.add_argument('--profile-size', type=int, default=10000)
+
+    args = parser.parse_args()
+    trace_file, resource_file = generate_zipf_trace(args.out_dir, no_users=args.no_users, no_iterations=args.no_iterations, no_nodes=args.no_nodes)
+    resource_map = read_resource_map(resource_file)
+    instructions = TraceIterator.from_file(trace_file)
+    stats_dir = args.out_dir / "profile-eviction"
+
+    for capacity in args.capacities:
+        nodes = { f"cdn{i + 1}": capacity * 1024 * 1024 for i in range(args.no_nodes) }
+        eviction_times = {}
+        for name, strategy in [ ("scan", ScanProfilesStrategy(nodes, profile_size=args.profile_size)),
+                                ("index", TimedProfilesStrategy(nodes, profile_size=args.profile_size)) ]:
+            out_dir = stats_dir / f"{name}-{capacity}"
+            out_dir.mkdir(parents=True, exist_ok=True)
+            StrategyRunner(strategy, instructions, resource_map, { node: StatsFileWriter(out_dir / f"{node}.csv") for node in nodes }).perform()
+            eviction_times[name] = sum(node.eviction_time for node in strategy.nodes.values())
+        identical = read_outputs(stats_dir / f"scan-{capacity}") == read_outputs(stats_dir / f"index-{capacity}")
+        print(f"{capacity:>4} MiB: scan {eviction_times['scan']:.2f}s, index {eviction_times['index']:.2f}s "
+              f"({eviction_times['scan'] / eviction_times['index']:.1f}x), identical statistics: {identical}")
@@ -0,0 +1,75 @@
+from simulation.evaluator.strategy.profiles import ProfilesStrategy
+from simulation.evaluator.strategy.runner import StrategyRunner
+from simulation.evaluator.cache.profile_lru_cache import UserProfile, ProfileRanking
+from simulation.evaluator.instruction_parser import TraceIterator
+from simulation.generator.utils import read_resource_map
+from simulation.benchmarks.utils import generate_zipf_trace
+import argparse
+import pathlib
+import time
+
+def reference_ranking(profiles: dict[str, UserProfile]) -> dict[int, ProfileRanking]:
+    """The ranking rebuilt from every connected profile, as
+    `ProfileLRUCache.update_ranking` used to do."""
+    ranking = {}
+    for user, profile in profiles.items():
+        for identifier in profile.resources:
+            if identifier not in ranking:
+                ranking[identifier] = ProfileRanking()
+            rank = ranking[identifier]
+            rank.popularity += 1
+            rank.by_users.add(user)
+    return dict(sorted(ranking.items(), key=lambda x: x[1].popularity))
+
+
+class CheckedProfilesStrategy(ProfilesStrategy):
+    """Times every ranking refresh and compares the published ranking of
+    every node with the reference ranking."""
+    incremental_time: float = 0
+    reference_time: float = 0
+    no_refreshes: int = 0
+    mismatches: int = 0
+
+    def handle_iteration(self, iteration: int):
+        if iteration % self.ranking_timeout != 0:
+            return super().handle_iteration(iteration)
+        start = time.perf_counter()
+        super().handle_iteration(iteration)
+        self.incremental_time += time.perf_counter() - start
+        self.no_refreshes += 1
+
+        for node in self.nodes.values():
+            start = time.perf_counter()
+            reference = reference_ranking({ user: profile for user, profile in self.profiles.items()
+                                            if user in node.connected_profiles })
+            self.reference_time += time.perf_counter() - start
+            if reference != node.ranking:
+                self.mismatches += 1
+            least_popular = list(node.popularity.least_popular(max(node.popularity.popularities, default=0)))
+            if sorted(least_popular, key=lambda k: node.ranking[k].popularity) != least_popular or len(least_popular) != len(node.ranking):
+                self.mismatches += 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark refreshing the Profiles ranking incrementally against rebuilding it from every profile.")
+    parser.add_argument('--out-dir', type=pathlib.Path, default="./benchmark-out/",
+                        help="where to store the generated trace")
+    parser.add_argument('--no-users', type=int, default=500)
+    parser.add_argument('--no-iterations', type=int, default=500)
+    parser.add_argument('--no-nodes', type=int, default=14)
+    parser.add_argument('--capacity', type=int, default=16,
+                        help="the capacity of every node in MiB")
+    parser.add_argument('--profile-size', type=int, default=10000)
+    parser.add_argument('--ranking-timeout', type=int, default=5)
+
+    args = parser.parse_args()
+    trace_file, resource_file = generate_zipf_trace(args.out_dir, no_users=args.no_users, no_iterations=args.no_iterations, no_nodes=args.no_nodes)
+    resource_map = read_resource_map(resource_file)
+    instructions = TraceIterator.from_file(trace_file)
+    nodes = { f"cdn{i + 1}": args.capacity * 1024 * 1024 for i in range(args.no_nodes) }
+
+    strategy = CheckedProfilesStrategy(nodes, ranking_timeout=args.ranking_timeout, profile_size=args.profile_size)
+    StrategyRunner(strategy, instructions, resource_map).perform()
+    print(f"{strategy.no_refreshes} ranking refreshes on {args.no_nodes} nodes")
+    print(f"incremental: {strategy.incremental_time:.2f}s, rebuilt: {strategy.reference_time:.2f}s "
+          f"({strategy.reference_time / strategy.incremental_time:.1f}x), rankings identical: {strategy.mismatches == 0}")
@@ -0,0 +1,118 @@
+from simulation.evaluator.statistics.file_writer import StatsFileWriter
+from simulation.evaluator.statistics.cache_metrics import CacheMetrics
+from simulation.evaluator.statistics.metrics_time_series import MetricsTimeSeries
+from simulation.benchmarks.utils import timed
+from experiments.stats_reader import load_file, load_runs_array
+from experiments.utils import aggregate_runs_in_dir, calc_ratio_over, calc_ratio, calc_variance
+from collections import defaultdict
+from statistics import mean
+import numpy as np
+import argparse
+import pathlib
+import random
+import csv
+import os
+
+def reference_load_file(f) -> dict:
+    """`load_file` as it was before reading whole files with NumPy."""
+    data = defaultdict(list)
+    with open(f, 'r') as f:
+        for row in csv.DictReader(f, delimiter=';'):
+            for key, value in row.items():
+                data[key].append(int(value))
+
+    def total_to_delta(a: list[int]) -> list[int]:
+        total, delta = 0, []
+        for v in a:
+            delta.append(v - total)
+            total = v
+        return delta
+
+    renamed = { 'hits_total': 'hits', 'misses_total': 'misses', 'cache_bytes_total': 'cache_bytes', 'origin_bytes_total': 'origin_bytes',
+                'neighbour_bytes_total': 'neighbour_bytes', 'items_total': 'no_items', 'cache_total': 'bytes_used',
+                'requests_to_origin': 'requests_to_origin', 'requests_to_neighbours': 'requests_to_neighbours',
+                'requests_to_neighbours_success': 'requests_to_neighbours_success' }
+    deltas = { 'hits': 'hits', 'misses': 'misses', 'cache_bytes_added': 'cache_bytes', 'origin_bytes_added': 'origin_bytes',
+               'neighbour_bytes_added': 'neighbour_bytes', 'items_added': 'no_items', 'cache_added': 'bytes_used',
+               'requests_to_origin_added': 'requests_to_origin', 'requests_to_neighbours_added': 'requests_to_neighbours',
+               'requests_to_neighbours_success_added': 'requests_to_neighbours_success' }
+    out = { 'iteration': data['iteration'] }
+    out.update({ key: data[column] for key, column in renamed.items() })
+    out.update({ key: total_to_delta(data[column]) for key, column in deltas.items() })
+    return out
+
+def reference_aggregate_runs_in_dir(dir) -> dict:
+    with os.scandir(dir) as files:
+        runs = [ reference_load_file(f) for f in files if f.path.endswith('.csv') ]
+    aggregated_data = {}
+    for data in runs:
+        for key in data:
+            if key == "iteration":
+                continue
+            if key not in aggregated_data:
+                aggregated_data[key] = [ [v] for v in data[key] ]
+            else:
+                for i, x in enumerate(aggregated_data[key]):
+                    x.append(data[key][i])
+    return aggregated_data
+
+def reference_calc_ratio_over(data, success_key: str, failed_key: str):
+    return [ calc_variance([ calc_ratio(a, b) for a, b in zip(success, failed) ])
+             for success, failed in zip(data[success_key], data[failed_key]) ]
+
+def reference_average_over_window(data, window=5):
+    return [data[0]] + [mean(data[max(0, i - window) :i]) for i in range(len(data)) if i > 0]
+
+def write_runs(out_dir: pathlib.Path, no_seeds: int, no_nodes: int, no_iterations: int):
+    """Writes an output directory as produced by an experiment, one file
+    per seed and node."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rand = random.Random(0)
+    for seed in range(no_seeds):
+        for node in range(no_nodes):
+            metrics = CacheMetrics()
+            with StatsFileWriter(out_dir / f"cdn{node + 1}-seed{seed}.csv") as writer:
+                for iteration in range(no_iterations):
+                    for _ in range(rand.randrange(20)):
+                        size = rand.randrange(1, 1 << 20)
+                        if rand.random() < 0.4:
+                            metrics.track_hit(size)
+                        else:
+                            metrics.track_miss()
+                            metrics.track_request_origin()
+                            metrics.track_bytes_origin(size)
+                            metrics.track_item_stored(size)
+                    writer.write_stats(iteration, metrics)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark loading and aggregating experiment outputs.")
+    parser.add_argument('--out-dir', type=pathlib.Path, default="./benchmark-out/stats-reader/")
+    parser.add_argument('--no-seeds', type=int, default=10)
+    parser.add_argument('--no-nodes', type=int, default=14)
+    parser.add_argument('--no-iterations', type=int, default=5000)
+
+    args = parser.parse_args()
+    runs_dir = args.out_dir / f"{args.no_seeds}seeds-{args.no_nodes}nodes-{args.no_iterations}iterations"
+    if not runs_dir.exists():
+        write_runs(runs_dir, args.no_seeds, args.no_nodes, args.no_iterations)
+
+    results = {}
+    with timed(results, "reference"):
+        reference = reference_aggregate_runs_in_dir(runs_dir)
+        reference_ratios = reference_calc_ratio_over(reference, 'hits_total', 'misses_total')
+    with timed(results, "vectorized"):
+        aggregated = aggregate_runs_in_dir(runs_dir)
+        ratios = calc_ratio_over(aggregated, 'hits_total', 'misses_total')
+    identical = all(np.array_equal(np.array(reference[key]), aggregated[key]) for key in reference)
+    # `np.round` and `round` can disagree on the last of the 4 decimals.
+    ratios_match = np.allclose(np.array(reference_ratios), np.array(ratios), rtol=0, atol=1e-4)
+    print(f"aggregate {len(load_runs_array(runs_dir).sources)} runs: reference {results['reference']:.2f}s, vectorized {results['vectorized']:.2f}s, "
+          f"identical: {identical}, ratios match: {ratios_match}")
+
+    hits = reference_load_file(runs_dir / "cdn1-seed0.csv")['hits']
+    with timed(results, "reference window"):
+        reference_window = reference_average_over_window(hits)
+    with timed(results, "vectorized window"):
+        window = MetricsTimeSeries.windowed_average(load_file(runs_dir / "cdn1-seed0.csv")['hits'])
+    print(f"window average: reference {results['reference window']:.3f}s, vectorized {results['vectorized window']:.3f}s, "
+          f"identical: {np.allclose(np.array(reference_window, dtype=float), window)}")
@@ -0,0 +1,77 @@
+from simulation.evaluator.statistics.file_writer import StatsFileWriter, NumpyStatsWriter, HEADER_ITEMS
+from simulation.evaluator.statistics.cache_metrics import CacheMetrics
+from simulation.benchmarks.utils import timed
+from experiments.stats_reader import load_file
+import dataclasses
+import argparse
+import pathlib
+import random
+
+class AppendingStatsFileWriter:
+    """Reference writer that opens the file for every line, as done
+    before the buffered writer."""
+    separator: str = ";"
+
+    def __init__(self, file_path: pathlib.Path):
+        self.file_path = file_path
+        with open(self.file_path, 'w') as f:
+            f.write(self.separator.join(HEADER_ITEMS) + "\n")
+
+    def write_stats(self, iteration: int, stats: CacheMetrics):
+        values = dataclasses.asdict(stats)
+        stats_items = [ iteration ] + [ values[key] for key in HEADER_ITEMS if key != "iteration" ]
+        stats_line = self.separator.join(str(x) for x in stats_items)
+        with open(self.file_path, 'a') as f:
+            f.write(f"{stats_line}\n")
+
+    def flush(self):
+        pass
+
+def random_metrics(no_iterations: int, seed: int = 0) -> list[CacheMetrics]:
+    rand = random.Random(seed)
+    metrics, history = CacheMetrics(), []
+    for _ in range(no_iterations):
+        metrics.track_hit(rand.randrange(1 << 20))
+        metrics.track_miss()
+        metrics.track_item_stored(rand.randrange(1 << 20))
+        metrics.track_request_neighbour()
+        history.append(dataclasses.replace(metrics))
+    return history
+
+def write_all(writers: dict, history: list[CacheMetrics]):
+    for iteration, stats in enumerate(history):
+        for writer in writers.values():
+            writer.write_stats(iteration, stats)
+    for writer in writers.values():
+        writer.flush()
+
+def without_source(data: dict) -> dict:
+    return { key: list(value) for key, value in data.items() if key != "source" }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark writing and reading node statistics.")
+    parser.add_argument('--out-dir', type=pathlib.Path, default="./benchmark-out/stats-writer/")
+    parser.add_argument('--no-nodes', type=int, default=14)
+    parser.add_argument('--no-iterations', type=int, default=5000)
+
+    args = parser.parse_args()
+    history = random_metrics(args.no_iterations)
+    writer_types = {
+        "append per line": (AppendingStatsFileWriter, "csv"),
+        "buffered csv": (StatsFileWriter, "csv"),
+        "numpy": (NumpyStatsWriter, "npy"),
+    }
+    outputs = {}
+    for name, (writer_type, extension) in writer_types.items():
+        out_dir = args.out_dir / name.replace(" ", "-")
+        out_dir.mkdir(parents=True, exist_ok=True)
+        results = {}
+        with timed(results, "write"):
+            writers = { f"cdn{i + 1}": writer_type(out_dir / f"cdn{i + 1}.{extension}") for i in range(args.no_nodes) }
+            write_all(writers, history)
+        with timed(results, "read"):
+            outputs[name] = [ without_source(load_file(out_dir / f"{node}.{extension}")) for node in writers ]
+        print(f"{name:>16}: write {results['write']:.3f}s, read {results['read']:.3f}s")
+
+    reference = outputs["append per line"]
+    print(f"identical statistics: {all(output == reference for output in outputs.values())}")
@@ -0,0 +1,47 @@
+from simulation.generator.main_zipf import TraceConfig, Simulation, VectorizedSimulation
+from simulation.generator.utils import write_action_batches
+from simulation.benchmarks.utils import write_resource_map, setup_node_map
+import argparse
+import pathlib
+import tracemalloc
+
+def write_materialized(simulation, out_file):
+    """Writing as done before streaming: build every action first."""
+    write_action_batches(out_file, [ simulation.simulate() ])
+
+def peak_memory(write, simulation, out_file) -> int:
+    tracemalloc.start()
+    write(simulation, out_file)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the peak memory of materialized and streaming trace generation.")
+    parser.add_argument('--out-dir', type=pathlib.Path, default="./benchmark-out/",
+                        help="where to store the generated traces")
+    parser.add_argument('--no-users', type=int, default=200)
+    parser.add_argument('--iterations', type=int, nargs='+', default=[ 100, 200, 400, 800 ])
+
+    args = parser.parse_args()
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    resource_file = args.out_dir / "resources.csv"
+    if not resource_file.exists():
+        write_resource_map(resource_file)
+
+    setups = {
+        "materialized list": lambda config: (write_materialized, Simulation(config, resource_file)),
+        "streaming": lambda config: (lambda simulation, out_file: simulation.write_trace(out_file), Simulation(config, resource_file)),
+        "streaming (vectorized)": lambda config: (lambda simulation, out_file: simulation.write_trace(out_file), VectorizedSimulation(config, resource_file)),
+    }
+    results = {}
+    for no_iterations in args.iterations:
+        config = TraceConfig(node_map=setup_node_map(14), no_users=args.no_users, no_iterations=no_iterations, seed="memory")
+        for name, setup in setups.items():
+            # The resource map is read before measuring, only generation counts.
+            write, simulation = setup(config)
+            results[(name, no_iterations)] = peak_memory(write, simulation, args.out_dir / "memory-benchmark.trace.gz")
+
+    print(f"{'peak MiB':>24}" + "".join(f"{n:>10}its" for n in args.iterations))
+    for name in setups:
+        print(f"{name:>24}" + "".join(f"{results[(name, n)] / 1024 / 1024:>13.1f}" for n in args.iterations))
@@ -0,0 +1,50 @@
+from simulation.generator.main_zipf import TraceConfig, Simulation
+from simulation.generator.edge_graph import EdgeNode
+from contextlib import contextmanager
+import random
+import pathlib
+import time
+import gzip
+
+def write_resource_map(file_path, no_resources: int = 20000, seed: int = 0):
+    """Writes a synthetic resource map with log-normally distributed sizes."""
+    rand = random.Random(seed)
+    with open(file_path, 'w') as f:
+        f.write("identifier;size\n")
+        for i in range(no_resources):
+            size = max(1, int(rand.lognormvariate(9, 1.5)))
+            f.write(f"site{i % 500}.example.com/assets/{i}/resource-{i}.js;{size}\n")
+
+def setup_node_map(no_nodes: int) -> dict[str, EdgeNode]:
+    """Every node can reach the next and previous node in a ring."""
+    nodes = [ f"cdn{i + 1}" for i in range(no_nodes) ]
+    return { node: EdgeNode(identifier=node, neighbours=list({ nodes[(i - 1) % no_nodes], nodes[(i + 1) % no_nodes] } - { node }))
+             for i, node in enumerate(nodes) }
+
+def generate_zipf_trace(out_dir, no_users: int = 200, no_iterations: int = 500, no_nodes: int = 14, seed: str = "benchmark", zipf_exponent: float = 0.75, no_resources: int = 20000):
+    """Generates (or reuses) a zipf trace and the resource map it was
+    generated from in `out_dir`.
+
+    Returns the paths of the trace and the resource map.
+
+    """
+    out_dir = pathlib.Path(out_dir) / f"{no_resources}resources"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    resource_file = out_dir / "resources.csv"
+    if not resource_file.exists():
+        write_resource_map(resource_file, no_resources=no_resources)
+    config = TraceConfig(node_map=setup_node_map(no_nodes), no_users=no_users, no_iterations=no_iterations, zipf_exponent=zipf_exponent, seed=seed)
+    trace_file = out_dir / f"{config.to_filename()}.trace.gz"
+    if not trace_file.exists():
+        simulation = Simulation(config, resource_file)
+        with gzip.open(trace_file, 'wb') as f:
+            for action in simulation.simulate():
+                f.write(str.encode(f"{action}\n"))
+    return trace_file, resource_file
+
+@contextmanager
+def timed(results: dict, key: str):
+    """Stores the wall time of the block in `results[key]`."""
+    start = time.perf_counter()
+    yield
+    results[key] = time.perf_counter() - start
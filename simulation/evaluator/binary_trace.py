@@ -0,0 +1,218 @@
+from .instructions import Instruction, RequestInstruction, ConnectInstruction, DisconnectInstruction, SetIterationInstruction, CollectStatisticsInstruction, SYNTAX_MAP
+from typing import Iterator
+from array import array
+import numpy as np
+import argparse
+import pathlib
+import shutil
+import json
+import gzip
+import os
+
+# Opcodes as stored in the `opcodes` column of a binary trace.
+OP_REQUEST = 0
+OP_CONNECT = 1
+OP_DISCONNECT = 2
+OP_ITERATION = 3
+OP_GET_STATS = 4
+
+OPCODES = {
+    "Request": OP_REQUEST,
+    "Connect": OP_CONNECT,
+    "Disconnect": OP_DISCONNECT,
+    "SetIteration": OP_ITERATION,
+    "CollectStatistics": OP_GET_STATS,
+}
+
+COLUMNS = [ "opcodes", "users", "nodes", "resources" ]
+DICTIONARY_FILE = "dictionary.json"
+NO_VALUE = -1
+
+class BinaryTraceError(Exception):
+    pass
+
+
+def binary_trace_path(text_trace_path) -> pathlib.Path:
+    """Returns the default location of the binary version of a text trace,
+    `<name>.trace.gz` becomes `<name>.trace.bin`.
+    """
+    path = pathlib.Path(text_trace_path)
+    if path.name.endswith(".trace.gz"):
+        return path.with_name(path.name[:-len(".gz")] + ".bin")
+    return path.with_name(path.name + ".bin")
+
+
+class Interner:
+    """Maps strings to dense integer identifiers in order of appearance."""
+    ids: dict[str, int]
+    values: list[str]
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def intern(self, value: str) -> int:
+        identifier = self.ids.get(value)
+        if identifier == None:
+            identifier = len(self.values)
+            self.ids[value] = identifier
+            self.values.append(value)
+        return identifier
+
+
+def convert_text_trace(text_trace_path, out_dir=None) -> pathlib.Path:
+    """Converts a gzipped text trace to the binary columnar format.
+
+    Every instruction becomes a row in four int columns: the opcode, the
+    user, the node, and the resource.  Users, nodes, and resources are
+    interned to dense integers and the original strings are kept in a
+    side dictionary.  Columns that do not apply to an instruction hold
+    `NO_VALUE`, except for `ITERATION` which keeps its iteration number
+    in the user column.
+
+    """
+    if out_dir == None:
+        out_dir = binary_trace_path(text_trace_path)
+    out_dir = pathlib.Path(out_dir)
+    users, nodes, resources = Interner(), Interner(), Interner()
+    opcodes = array('b')
+    user_column, node_column, resource_column = array('i'), array('i'), array('i')
+
+    with gzip.open(text_trace_path, 'rb') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 0:
+                continue
+            try:
+                opcode = OPCODES[SYNTAX_MAP[parts[0].decode()]]
+            except KeyError:
+                raise BinaryTraceError(f"Unsupported instruction: {line}")
+            opcodes.append(opcode)
+            if opcode == OP_REQUEST:
+                user_column.append(users.intern(parts[1].decode()))
+                node_column.append(nodes.intern(parts[2].decode()))
+                resource_column.append(resources.intern(parts[3].decode()))
+            elif opcode == OP_CONNECT or opcode == OP_DISCONNECT:
+                user_column.append(users.intern(parts[1].decode()))
+                node_column.append(nodes.intern(parts[2].decode()))
+                resource_column.append(NO_VALUE)
+            elif opcode == OP_ITERATION:
+                user_column.append(int(parts[1]))
+                node_column.append(NO_VALUE)
+                resource_column.append(NO_VALUE)
+            else:
+                user_column.append(NO_VALUE)
+                node_column.append(NO_VALUE)
+                resource_column.append(NO_VALUE)
+
+    # Write to a temporary directory first so a partially written trace is
+    # never picked up by a reader.
+    tmp_dir = out_dir.with_name(f"{out_dir.name}.tmp-{os.getpid()}")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+    np.save(tmp_dir / "opcodes.npy", np.frombuffer(opcodes, dtype=np.int8))
+    np.save(tmp_dir / "users.npy", np.frombuffer(user_column, dtype=np.int32))
+    np.save(tmp_dir / "nodes.npy", np.frombuffer(node_column, dtype=np.int32))
+    np.save(tmp_dir / "resources.npy", np.frombuffer(resource_column, dtype=np.int32))
+    with open(tmp_dir / DICTIONARY_FILE, 'w') as f:
+        json.dump({ "users": users.values, "nodes": nodes.values, "resources": resources.values }, f)
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    os.rename(tmp_dir, out_dir)
+    return out_dir
+
+
+class BinaryTrace:
+    """Memory-mapped columns and side dictionaries of a binary trace."""
+    path: pathlib.Path
+    opcodes: np.ndarray
+    users: np.ndarray
+    nodes: np.ndarray
+    resources: np.ndarray
+    user_ids: list[str]
+    node_ids: list[str]
+    resource_ids: list[str]
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.opcodes = np.load(self.path / "opcodes.npy", mmap_mode='r')
+        self.users = np.load(self.path / "users.npy", mmap_mode='r')
+        self.nodes = np.load(self.path / "nodes.npy", mmap_mode='r')
+        self.resources = np.load(self.path / "resources.npy", mmap_mode='r')
+        with open(self.path / DICTIONARY_FILE, 'r') as f:
+            dictionary = json.load(f)
+        self.user_ids = dictionary["users"]
+        self.node_ids = dictionary["nodes"]
+        self.resource_ids = dictionary["resources"]
+
+    def __len__(self):
+        return len(self.opcodes)
+
+
+class BinaryTraceIterator(Iterator):
+    """Iterator over a binary trace, compatible with `TraceIterator`.
+
+    Instructions are built directly from the integer columns, the only
+    translation is a list lookup in the side dictionaries.
+
+    """
+    trace: BinaryTrace
+    chunk_size: int
+
+    def __init__(self, path, chunk_size: int = 1 << 16):
+        self.trace = BinaryTrace(path)
+        self.chunk_size = chunk_size
+        self.reset()
+
+    def __next__(self) -> Instruction:
+        return self.iterator.__next__()
+
+    def __len__(self):
+        return len(self.trace)
+
+    def reset(self):
+        self.iterator = self.__build_iterator()
+
+    def __build_iterator(self):
+        trace = self.trace
+        user_ids, node_ids, resource_ids = trace.user_ids, trace.node_ids, trace.resource_ids
+        for start in range(0, len(trace), self.chunk_size):
+            end = start + self.chunk_size
+            # Converting a chunk at once avoids creating a numpy scalar for
+            # every value.
+            rows = zip(trace.opcodes[start:end].tolist(), trace.users[start:end].tolist(),
+                       trace.nodes[start:end].tolist(), trace.resources[start:end].tolist())
+            for opcode, user, node, resource in rows:
+                if opcode == OP_REQUEST:
+                    yield RequestInstruction(user_ids[user], node_ids[node], resource_ids[resource])
+                elif opcode == OP_ITERATION:
+                    yield SetIterationInstruction(user)
+                elif opcode == OP_CONNECT:
+                    yield ConnectInstruction(user_ids[user], node_ids[node])
+                elif opcode == OP_DISCONNECT:
+                    yield DisconnectInstruction(user_ids[user], node_ids[node])
+                else:
+                    yield CollectStatisticsInstruction()
+
+    @staticmethod
+    def from_text_trace(text_trace_path):
+        """Returns an iterator over the binary version of a text trace,
+        converting the trace first if this has not been done before.
+        """
+        path = binary_trace_path(text_trace_path)
+        if not path.exists():
+            convert_text_trace(text_trace_path, path)
+        return BinaryTraceIterator(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a text trace to the binary columnar trace format.")
+    parser.add_argument('trace', type=pathlib.Path,
+                        help="the location of the (gzipped) text trace to convert")
+    parser.add_argument('--out-dir', type=pathlib.Path, default=None,
+                        help="where to store the binary trace, defaults to <name>.trace.bin next to the text trace")
+
+    args = parser.parse_args()
+    out_dir = convert_text_trace(args.trace, args.out_dir)
+    print(f"Wrote {len(BinaryTrace(out_dir))} instructions to {out_dir}")
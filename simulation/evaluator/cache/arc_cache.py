@@ -0,0 +1,99 @@
+from .finite_cache import FiniteCache
+from collections import OrderedDict
+from typing import Optional
+
+class ARCCache(FiniteCache):
+    """Adaptive replacement cache (Megiddo and Modha), measured in bytes.
+
+    Items requested once are kept in `recent` and items requested again in
+    `frequent`, both in LRU order.  Evicted items are remembered without
+    their content in the ghost lists `recent_ghost` and `frequent_ghost`.
+    A miss on a ghost moves the `target` share of `recent` towards the
+    list that would have kept the item, by the size of the item scaled
+    with the ratio between the ghost lists.
+
+    """
+    # Map identifiers to sizes, least recently used first.
+    recent: OrderedDict[int, int]
+    frequent: OrderedDict[int, int]
+    recent_ghost: OrderedDict[int, int]
+    frequent_ghost: OrderedDict[int, int]
+    recent_bytes: int
+    recent_ghost_bytes: int
+    frequent_ghost_bytes: int
+    # The number of bytes `recent` should hold.
+    target: float
+
+    def __init__(self, capacity: int):
+        super().__init__(capacity)
+        self.recent = OrderedDict()
+        self.frequent = OrderedDict()
+        self.recent_ghost = OrderedDict()
+        self.frequent_ghost = OrderedDict()
+        self.recent_bytes = 0
+        self.recent_ghost_bytes = 0
+        self.frequent_ghost_bytes = 0
+        self.target = 0
+
+    def retrieve(self, identifier: int, at_timestamp: int) -> Optional[int]:
+        size = super().retrieve(identifier, at_timestamp)
+        if size != None:
+            if identifier in self.recent:
+                del self.recent[identifier]
+                self.recent_bytes -= size
+                self.frequent[identifier] = size
+            else:
+                self.frequent.move_to_end(identifier)
+        return size
+
+    def store(self, identifier: int, size: int, at_timestamp: int):
+        if size > self.capacity or identifier in self.content:
+            return
+        if identifier in self.recent_ghost:
+            ratio = max(1, self.frequent_ghost_bytes / max(1, self.recent_ghost_bytes))
+            self.target = min(self.capacity, self.target + ratio * size)
+            self.recent_ghost_bytes -= self.recent_ghost.pop(identifier)
+            self.__replace(size, False)
+            self.frequent[identifier] = size
+        elif identifier in self.frequent_ghost:
+            ratio = max(1, self.recent_ghost_bytes / max(1, self.frequent_ghost_bytes))
+            self.target = max(0, self.target - ratio * size)
+            self.frequent_ghost_bytes -= self.frequent_ghost.pop(identifier)
+            self.__replace(size, True)
+            self.frequent[identifier] = size
+        else:
+            self.__replace(size, False)
+            self.recent[identifier] = size
+            self.recent_bytes += size
+        super().store(identifier, size)
+        self.__trim_ghosts()
+
+    def remove(self, identifier: int):
+        if identifier in self.recent:
+            self.recent_bytes -= self.recent.pop(identifier)
+        else:
+            self.frequent.pop(identifier, None)
+        super().remove(identifier)
+
+    def __replace(self, size: int, frequent_ghost_hit: bool):
+        """Evicts items into the ghost lists until `size` bytes fit."""
+        while not self.content_fits(size):
+            if len(self.recent) > 0 and (len(self.frequent) == 0 or self.recent_bytes > self.target
+                                         or (frequent_ghost_hit and self.recent_bytes == self.target)):
+                identifier, evicted = self.recent.popitem(last=False)
+                self.recent_bytes -= evicted
+                self.recent_ghost[identifier] = evicted
+                self.recent_ghost_bytes += evicted
+            else:
+                identifier, evicted = self.frequent.popitem(last=False)
+                self.frequent_ghost[identifier] = evicted
+                self.frequent_ghost_bytes += evicted
+            super().remove(identifier)
+
+    def __trim_ghosts(self):
+        """Keeps `recent` and its ghost within the capacity, and all lists
+        together within twice the capacity."""
+        while self.recent_ghost_bytes > 0 and self.recent_bytes + self.recent_ghost_bytes > self.capacity:
+            self.recent_ghost_bytes -= self.recent_ghost.popitem(last=False)[1]
+        while self.frequent_ghost_bytes > 0 and self.capacity_used + self.recent_ghost_bytes + self.frequent_ghost_bytes > 2 * self.capacity:
+            self.frequent_ghost_bytes -= self.frequent_ghost.popitem(last=False)[1]
@@ -1,62 +1,66 @@
 from typing import Optional
 from simulation.evaluator.statistics.cache_metrics import CacheMetrics
-from .cache_item import CacheItem
+from .holders_index import HoldersIndex
 
 class Cache:
-    content: dict[str, CacheItem] = {}
+    # Maps the identifier of every stored item to its size in bytes.
+    content: dict[int, int] = {}
     cache_metrics: CacheMetrics
     capacity_used: int = 0
+    # Set by `HoldersIndex.attach`, which is told about every store and
+    # removal.
+    holders: Optional[HoldersIndex] = None
+    holder_bit: int = 0
 
     def __init__(self):
         self.content = {}
         self.cache_metrics = CacheMetrics()
         self.capacity_used = 0
 
-    def store(self, identifier: str, content: CacheItem):
+    def store(self, identifier: int, size: int):
         if identifier in self.content:
             return
-        self.capacity_used += content.size()
-        self.cache_metrics.track_item_stored(content.size())
-        self.content[identifier] = content
+        self.capacity_used += size
+        self.cache_metrics.track_item_stored(size)
+        self.content[identifier] = size
+        if self.holders != None:
+            self.holders.add(identifier, self.holder_bit)
 
 
-    def retrieve(self, identifier: str, at_timestamp: int) -> Optional[CacheItem]:
+    def retrieve(self, identifier: int, at_timestamp: int) -> Optional[int]:
         """Try to retrieve content from the cache by identifier.
 
-        Returns content stored under the given `identifier` if stored,
-        tracks metrics on this object like `misses`, `hits`, and
-        `bytes_saved`, and updates the `last_accessed` property on the
-        content.
+        Returns the size of the content stored under the given
+        `identifier` if stored.  Subclasses track whatever their
+        replacement policy needs about the access.
 
         """
-        content = self.content.get(identifier)
-        if content == None:
+        size = self.content.get(identifier)
+        if size == None:
             return None
-        content.last_accessed = at_timestamp
-        return content
+        return size
 
     def retrieve_no_metrics(self, identifier):
         """Try to retrieve content from the cache by identifier without tracking
         metrics.
 
-        Returns content stored under the given `identifier` if stored
-        without tracking or updating any metrics.  Should only be used
-        if you want the retrieval not to influence the metrics or future
-        caching decisions.
+        Returns the size of the content stored under the given
+        `identifier` if stored without tracking or updating any metrics.
+        Should only be used if you want the retrieval not to influence
+        the metrics or future caching decisions.
 
         """
-        if self.has(identifier):
-            return self.content[identifier]
-        return None
+        return self.content.get(identifier)
 
     def remove(self, identifier):
         if not self.has(identifier):
             print(f"Trying to remove item that is not in the cache: {identifier}")
             return
-        item = self.content[identifier]
-        self.capacity_used -= item.size()
-        self.cache_metrics.track_item_removed(item.size())
-        del self.content[identifier]
+        size = self.content.pop(identifier)
+        self.capacity_used -= size
+        self.cache_metrics.track_item_removed(size)
+        if self.holders != None:
+            self.holders.remove(identifier, self.holder_bit)
 
     def has(self, identifier):
         return identifier in self.content
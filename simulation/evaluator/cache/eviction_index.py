@@ -0,0 +1,149 @@
+from typing import Optional
+import heapq
+
+class FenwickTree:
+    """Prefix sums over non-negative integer keys in O(log n).
+
+    The number of keys is kept a power of two, so the tree can grow to
+    larger keys by appending without rebuilding it.
+
+    """
+    tree: list[int]
+
+    def __init__(self, size: int = 64):
+        no_keys = 1
+        while no_keys < size:
+            no_keys *= 2
+        self.tree = [0] * (no_keys + 1)
+
+    def add(self, key: int, value: int):
+        while key >= len(self.tree) - 1:
+            self.__grow()
+        i = key + 1
+        while i < len(self.tree):
+            self.tree[i] += value
+            i += i & -i
+
+    def prefix_sum(self, key: int) -> int:
+        """The sum of the values of all keys up to and including `key`."""
+        i = min(key + 1, len(self.tree) - 1)
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def __grow(self):
+        # Of the new nodes only the last one covers any of the old keys,
+        # it covers all of them.
+        no_keys = len(self.tree) - 1
+        total = self.prefix_sum(no_keys - 1)
+        self.tree.extend([ 0 ] * (no_keys - 1))
+        self.tree.append(total)
+
+
+class ProfileEvictionIndex:
+    """Orders the content of a `ProfileLRUCache` in the order it evicts
+    content: first the content that is not in the ranking by when it was
+    stored, then the ranked content by `PopularityIndex.position`.
+
+    Both groups are kept in a heap, entries of content that was removed
+    or moved are skipped when they reach the top.  The bytes of the
+    unranked content are kept as a running total and the bytes of the
+    ranked content in a `FenwickTree` by popularity, so the bytes that
+    can be evicted below a popularity are known in O(log n).
+
+    """
+    sizes: dict[int, int]
+    stored_at: dict[int, int]
+    # The current heap entry of all content without the identifier,
+    # `(stored_at,)` if it is not ranked, `(popularity, entry)` otherwise.
+    keys: dict[int, tuple]
+    unranked: list[tuple[int, int]]
+    ranked: list[tuple[int, int, int]]
+    unranked_bytes: int
+    ranked_bytes: FenwickTree
+    no_stored: int
+
+    def __init__(self):
+        self.sizes = {}
+        self.stored_at = {}
+        self.keys = {}
+        self.unranked = []
+        self.ranked = []
+        self.unranked_bytes = 0
+        self.ranked_bytes = FenwickTree()
+        self.no_stored = 0
+
+    def __contains__(self, identifier: int) -> bool:
+        return identifier in self.keys
+
+    def add(self, identifier: int, size: int, position: Optional[tuple[int, int]]):
+        """Adds stored content, `position` as given by
+        `PopularityIndex.position`."""
+        self.sizes[identifier] = size
+        self.stored_at[identifier] = self.no_stored
+        self.no_stored += 1
+        self.__place(identifier, position)
+
+    def remove(self, identifier: int):
+        self.__unplace(identifier)
+        del self.sizes[identifier]
+        del self.stored_at[identifier]
+
+    def move(self, identifier: int, position: Optional[tuple[int, int]]):
+        """Updates the position of content after the ranking changed."""
+        self.__unplace(identifier)
+        self.__place(identifier, position)
+
+    def evictable_bytes(self, max_popularity: int) -> int:
+        """The bytes of all unranked content and of the ranked content
+        with a popularity of at most `max_popularity`."""
+        return self.unranked_bytes + self.ranked_bytes.prefix_sum(max_popularity)
+
+    def next_eviction(self, max_popularity: int) -> Optional[int]:
+        """The content to evict first, if any can be evicted below
+        `max_popularity`."""
+        keys = self.keys
+        unranked = self.unranked
+        while len(unranked) > 0:
+            stored_at, identifier = unranked[0]
+            if keys.get(identifier) == (stored_at,):
+                return identifier
+            heapq.heappop(unranked)
+        ranked = self.ranked
+        while len(ranked) > 0:
+            popularity, entry, identifier = ranked[0]
+            if keys.get(identifier) == (popularity, entry):
+                return identifier if popularity <= max_popularity else None
+            heapq.heappop(ranked)
+        return None
+
+    def __place(self, identifier: int, position: Optional[tuple[int, int]]):
+        size = self.sizes[identifier]
+        if position == None:
+            key = (self.stored_at[identifier],)
+            heapq.heappush(self.unranked, (key[0], identifier))
+            self.unranked_bytes += size
+        else:
+            key = position
+            heapq.heappush(self.ranked, (key[0], key[1], identifier))
+            self.ranked_bytes.add(key[0], size)
+        self.keys[identifier] = key
+        if len(self.unranked) + len(self.ranked) > 2 * len(self.keys) + 1024:
+            self.__compact()
+
+    def __unplace(self, identifier: int):
+        key = self.keys.pop(identifier)
+        size = self.sizes[identifier]
+        if len(key) == 1:
+            self.unranked_bytes -= size
+        else:
+            self.ranked_bytes.add(key[0], -size)
+
+    def __compact(self):
+        """Drops the skipped entries from both heaps."""
+        self.unranked = [ (key[0], identifier) for identifier, key in self.keys.items() if len(key) == 1 ]
+        self.ranked = [ (key[0], key[1], identifier) for identifier, key in self.keys.items() if len(key) == 2 ]
+        heapq.heapify(self.unranked)
+        heapq.heapify(self.ranked)
@@ -1,5 +1,4 @@
 from .cache import Cache
-from .cache_item import CacheItem
 
 class Error(Exception):
     """Base class for exceptions in this module."""
@@ -19,11 +18,11 @@ class FiniteCache(Cache):
     def capacity_available(self):
         return self.capacity - self.capacity_used
 
-    def content_fits(self, content: CacheItem):
-        return self.capacity_available() >= content.size()
+    def content_fits(self, size: int):
+        return self.capacity_available() >= size
 
-    def store(self, identifier: str, content: CacheItem):
-        if self.content_fits(content):
-            super().store(identifier, content)
+    def store(self, identifier: int, size: int):
+        if self.content_fits(size):
+            super().store(identifier, size)
         else:
             raise NotEnoughCapacityError()
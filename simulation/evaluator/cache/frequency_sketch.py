@@ -0,0 +1,134 @@
+from typing import Optional
+
+# Maps every byte to half its value, `bytes.translate` with this table ages
+# all counters at once.
+HALVED = bytes(count >> 1 for count in range(256))
+
+class CountMinSketch:
+    """Estimates how often identifiers were added in a fixed amount of
+    memory.
+
+    Every identifier has a counter in each of the `depth` rows of `width`
+    counters, picked by double hashing a single hash, and its estimate is
+    the smallest of those counters.  Adding only increments the counters
+    that hold that smallest value (conservative update), which keeps the
+    other counters closer to the identifiers they are shared with.
+    Counters are single bytes that saturate at `max_count`.  After
+    `sample_size` additions all counters are halved, so the estimates
+    follow the recent popularity instead of growing forever.
+
+    With a `doorkeeper` the first addition of an identifier only sets its
+    bits in a Bloom filter, and only later additions reach the counters.
+    Identifiers that are added once, the bulk of a heavy tail, then do
+    not crowd the counters.  The doorkeeper is cleared when the counters
+    age.
+
+    """
+    width: int
+    depth: int
+    max_count: int
+    sample_size: int
+    no_additions: int
+    counters: bytearray
+    doorkeeper: Optional[bytearray]
+    mask: int
+    # The offset of every row in `counters`.
+    offsets: list[int]
+
+    def __init__(self, width: int, depth: int = 4, max_count: int = 15, sample_size: Optional[int] = None, doorkeeper: bool = False):
+        # A power of two width lets the low bits of the hash pick the
+        # counter.
+        self.width = 1 << max(0, width - 1).bit_length()
+        self.depth = depth
+        self.max_count = min(max_count, 255)
+        self.sample_size = sample_size if sample_size != None else 10 * self.width
+        self.no_additions = 0
+        self.counters = bytearray(self.depth * self.width)
+        # A bit for every counter.
+        self.doorkeeper = bytearray((self.depth * self.width + 7) // 8) if doorkeeper else None
+        self.mask = self.width - 1
+        self.offsets = [ row * self.width for row in range(depth) ]
+
+    @classmethod
+    def with_memory(cls, no_bytes: int, depth: int = 4, doorkeeper: bool = False, **kwargs) -> "CountMinSketch":
+        """The widest sketch that fits in `no_bytes`."""
+        bytes_per_column = depth + depth / 8 if doorkeeper else depth
+        width = 1 << max(0, int(no_bytes / bytes_per_column).bit_length() - 1)
+        return cls(width, depth=depth, doorkeeper=doorkeeper, **kwargs)
+
+    def memory(self) -> int:
+        """The number of bytes of the counters and the doorkeeper."""
+        return len(self.counters) + (len(self.doorkeeper) if self.doorkeeper != None else 0)
+
+    def __hash(self, identifier: int) -> tuple[int, int]:
+        """The hash of `identifier` and the step between the counters of
+        consecutive rows, counter `offset + ((key + row * step) & mask)`
+        belongs to the identifier in every row."""
+        # Hashing a tuple mixes the bits of the identifier, and unlike the
+        # hash of a string it is the same in every process.
+        key = hash((identifier, 0x5bd1e995))
+        return key, (key >> 32) | 1
+
+    def __minimum(self, key: int, step: int) -> int:
+        counters, mask = self.counters, self.mask
+        minimum = self.max_count
+        # Plain loops over the rows are considerably faster than
+        # comprehensions on this hot path.
+        for offset in self.offsets:
+            count = counters[offset + (key & mask)]
+            if count < minimum:
+                minimum = count
+            key += step
+        return minimum
+
+    def __in_doorkeeper(self, key: int, step: int, insert: bool = False) -> bool:
+        """Whether the identifier was in the doorkeeper, with `insert` it
+        is in the doorkeeper afterwards."""
+        doorkeeper, mask = self.doorkeeper, self.mask
+        present = True
+        for offset in self.offsets:
+            index = offset + (key & mask)
+            bit = 1 << (index & 7)
+            if not doorkeeper[index >> 3] & bit:
+                if not insert:
+                    return False
+                present = False
+                doorkeeper[index >> 3] |= bit
+            key += step
+        return present
+
+    def add(self, identifier: int) -> int:
+        """Adds `identifier` once and returns its new estimate."""
+        key, step = self.__hash(identifier)
+        self.no_additions += 1
+        estimate = self.__minimum(key, step)
+        doorkeeper = self.doorkeeper
+        # The first addition only goes into the doorkeeper.
+        if (doorkeeper == None or self.__in_doorkeeper(key, step, insert=True)) and estimate < self.max_count:
+            counters, mask = self.counters, self.mask
+            for offset in self.offsets:
+                index = offset + (key & mask)
+                if counters[index] == estimate:
+                    counters[index] = estimate + 1
+                key += step
+            estimate += 1
+        if doorkeeper != None:
+            estimate += 1
+        if self.no_additions >= self.sample_size:
+            self.age()
+            return self.estimate(identifier)
+        return estimate
+
+    def estimate(self, identifier: int) -> int:
+        key, step = self.__hash(identifier)
+        estimate = self.__minimum(key, step)
+        if self.doorkeeper != None and self.__in_doorkeeper(key, step):
+            estimate += 1
+        return estimate
+
+    def age(self):
+        """Halves every counter and clears the doorkeeper."""
+        self.counters = bytearray(self.counters.translate(HALVED))
+        if self.doorkeeper != None:
+            self.doorkeeper = bytearray(len(self.doorkeeper))
+        self.no_additions //= 2
@@ -0,0 +1,80 @@
+from .finite_cache import FiniteCache
+from typing import Optional
+import heapq
+
+class GDSFCache(FiniteCache):
+    """Greedy-Dual-Size-Frequency replacement.
+
+    Every item has a priority `inflation + frequency * cost / size`, the
+    item with the lowest priority is evicted first and its priority
+    becomes the new `inflation`, so items that are not requested again
+    age out.  Small, frequently requested items are kept the longest,
+    which favours the hit ratio.  With `cost_is_size` every item costs
+    its size, which ignores the size and favours the byte hit ratio.
+    Without `count_frequency` every item has a frequency of 1, which is
+    the original GreedyDual-Size.
+
+    Priorities live in a heap, entries of items that were requested or
+    removed since are skipped when they reach the top.
+
+    """
+    cost_is_size: bool
+    count_frequency: bool
+    inflation: float
+    frequency: dict[int, int]
+    priority: dict[int, float]
+    heap: list[tuple[float, int, int]]
+    no_pushed: int
+
+    def __init__(self, capacity: int, cost_is_size: bool = False, count_frequency: bool = True):
+        super().__init__(capacity)
+        self.cost_is_size = cost_is_size
+        self.count_frequency = count_frequency
+        self.inflation = 0.0
+        self.frequency = {}
+        self.priority = {}
+        self.heap = []
+        self.no_pushed = 0
+
+    def retrieve(self, identifier: int, at_timestamp: int) -> Optional[int]:
+        size = super().retrieve(identifier, at_timestamp)
+        if size != None:
+            if self.count_frequency:
+                self.frequency[identifier] += 1
+            self.__prioritize(identifier, size)
+        return size
+
+    def store(self, identifier: int, size: int, at_timestamp: int):
+        if size > self.capacity or identifier in self.content:
+            return
+        while not self.content_fits(size):
+            self.__evict()
+        super().store(identifier, size)
+        self.frequency[identifier] = 1
+        self.__prioritize(identifier, size)
+
+    def remove(self, identifier: int):
+        if self.has(identifier):
+            del self.frequency[identifier]
+            del self.priority[identifier]
+        super().remove(identifier)
+
+    def __prioritize(self, identifier: int, size: int):
+        cost = size if self.cost_is_size else 1
+        priority = self.inflation + self.frequency[identifier] * cost / size
+        self.priority[identifier] = priority
+        # The push counter breaks ties in favour of the least recently
+        # prioritized item.
+        heapq.heappush(self.heap, (priority, self.no_pushed, identifier))
+        self.no_pushed += 1
+        if len(self.heap) > 2 * len(self.priority) + 1024:
+            self.heap = [ entry for entry in self.heap if self.priority.get(entry[2]) == entry[0] ]
+            heapq.heapify(self.heap)
+
+    def __evict(self):
+        while True:
+            priority, _, identifier = heapq.heappop(self.heap)
+            if self.priority.get(identifier) == priority:
+                break
+        self.inflation = priority
+        self.remove(identifier)
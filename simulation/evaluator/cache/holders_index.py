@@ -0,0 +1,52 @@
+class HoldersIndex:
+    """Which nodes hold every resource, as a bitset of nodes per resource.
+
+    Caches that are attached with `attach` report every store and removal,
+    so finding which of a list of nodes hold a resource is a bitwise AND
+    instead of asking every node.
+
+    """
+    # The bit of every node.
+    bits: dict[str, int]
+    holders: dict[int, int]
+
+    def __init__(self, nodes: list[str]):
+        self.bits = { node: 1 << i for i, node in enumerate(nodes) }
+        self.holders = {}
+
+    def attach(self, node: str, cache):
+        """Records every store and removal of the `Cache` of `node`."""
+        for identifier in cache.content:
+            self.add(identifier, self.bits[node])
+        cache.holders = self
+        cache.holder_bit = self.bits[node]
+
+    def add(self, identifier: int, bit: int):
+        self.holders[identifier] = self.holders.get(identifier, 0) | bit
+
+    def remove(self, identifier: int, bit: int):
+        held = self.holders.get(identifier, 0) & ~bit
+        if held == 0:
+            self.holders.pop(identifier, None)
+        else:
+            self.holders[identifier] = held
+
+    def mask(self, nodes: list[str]) -> int:
+        """The bits of `nodes`, computed once for every list of candidate
+        nodes rather than on every lookup."""
+        mask = 0
+        for node in nodes:
+            mask |= self.bits[node]
+        return mask
+
+    def held(self, identifier: int, mask: int) -> int:
+        """The bits of the nodes in `mask` that hold `identifier`."""
+        return self.holders.get(identifier, 0) & mask
+
+    def first_holder(self, held: int, nodes: list[str]) -> int:
+        """The position of the first of `nodes` whose bit is in `held`,
+        which has to contain the bit of one of them."""
+        bits = self.bits
+        for position, node in enumerate(nodes):
+            if held & bits[node]:
+                return position
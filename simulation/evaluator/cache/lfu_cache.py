@@ -0,0 +1,72 @@
+from .finite_cache import FiniteCache
+from typing import Optional
+
+class LFUCache(FiniteCache):
+    """Least frequently used replacement, among items requested equally
+    often the one that reached that frequency first is evicted first.
+
+    Items are kept in a bucket per frequency, and the frequencies that
+    have a bucket are linked in increasing order around the sentinel
+    frequency 0, so a request and an eviction take constant time.  The
+    frequency of an item is forgotten when it is evicted.
+
+    """
+    frequency: dict[int, int]
+    # Maps every frequency to its items in the order they reached it.
+    buckets: dict[int, dict[int, None]]
+    higher: dict[int, int]
+    lower: dict[int, int]
+
+    def __init__(self, capacity: int):
+        super().__init__(capacity)
+        self.frequency = {}
+        self.buckets = {}
+        self.higher = { 0: 0 }
+        self.lower = { 0: 0 }
+
+    def retrieve(self, identifier: int, at_timestamp: int) -> Optional[int]:
+        size = super().retrieve(identifier, at_timestamp)
+        if size != None:
+            frequency = self.frequency[identifier]
+            if frequency + 1 not in self.buckets:
+                self.__link(frequency + 1, frequency)
+            self.buckets[frequency + 1][identifier] = None
+            self.frequency[identifier] = frequency + 1
+            self.__remove_from_bucket(frequency, identifier)
+        return size
+
+    def store(self, identifier: int, size: int, at_timestamp: int):
+        if size > self.capacity or identifier in self.content:
+            return
+        while not self.content_fits(size):
+            self.remove(next(iter(self.buckets[self.higher[0]])))
+        super().store(identifier, size)
+        if 1 not in self.buckets:
+            self.__link(1, 0)
+        self.buckets[1][identifier] = None
+        self.frequency[identifier] = 1
+
+    def remove(self, identifier: int):
+        if self.has(identifier):
+            self.__remove_from_bucket(self.frequency.pop(identifier), identifier)
+        super().remove(identifier)
+
+    def __link(self, frequency: int, after: int):
+        """Adds the bucket of `frequency` right after the bucket of
+        `after`."""
+        self.buckets[frequency] = {}
+        following = self.higher[after]
+        self.higher[after] = frequency
+        self.higher[frequency] = following
+        self.lower[frequency] = after
+        self.lower[following] = frequency
+
+    def __remove_from_bucket(self, frequency: int, identifier: int):
+        bucket = self.buckets[frequency]
+        del bucket[identifier]
+        if len(bucket) == 0:
+            del self.buckets[frequency]
+            previous = self.lower.pop(frequency)
+            following = self.higher.pop(frequency)
+            self.higher[previous] = following
+            self.lower[following] = previous
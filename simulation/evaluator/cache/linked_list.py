@@ -1,91 +1,71 @@
-from dataclasses import dataclass
 from typing import Optional
 
-@dataclass
 class Node:
-    data: any
-    previous: Optional[any]
-    next: Optional[any]
+    __slots__ = ("data", "previous", "next")
+
+    def __init__(self, data, previous: Optional["Node"] = None, next: Optional["Node"] = None):
+        self.data = data
+        self.previous = previous
+        self.next = next
+
 
-@dataclass
 class LinkedList:
-    """LinkedList Adaptation for LRU caches."""
-    head: Optional[Node]
-    tail: Optional[Node]
+    """LinkedList Adaptation for LRU caches.
+
+    `append` moves data to the head (most recently used) and `pop`
+    removes and returns the data at the tail (least recently used), or
+    `None` when the list is empty.  The list is circular around a
+    sentinel node so that linking and unlinking never has to check for
+    the ends of the list.
+
+    """
+    __slots__ = ("sentinel", "mapping")
+    sentinel: Node
     mapping: dict[any, Node]
 
     def __init__(self):
-        self.head = None
-        self.tail = None
+        self.sentinel = Node(None)
+        self.sentinel.previous = self.sentinel
+        self.sentinel.next = self.sentinel
         self.mapping = {}
 
+    @property
+    def head(self) -> Optional[Node]:
+        return self.sentinel.next if self.mapping else None
+
+    @property
+    def tail(self) -> Optional[Node]:
+        return self.sentinel.previous if self.mapping else None
+
+    def __len__(self):
+        return len(self.mapping)
+
+    def __contains__(self, data):
+        return data in self.mapping
+
     def append(self, data):
-        if self.head != None and self.head.data == data:
+        sentinel = self.sentinel
+        node = self.mapping.get(data)
+        if node == None:
+            node = Node(data)
+            self.mapping[data] = node
+        elif node is sentinel.next:
             return
-        if data in self.mapping:
-            node = self.mapping[data]
-            if node.previous != None:
-                node.previous.next = node.next
-            if node.next != None:
-                node.next.previous = node.previous
-            else:
-                # This was the tail.
-                self.tail = node.previous
-            node.previous = None
         else:
-            node = Node(data=data, previous=None, next=None)
-            self.mapping[data] = node
-        if self.head != None:
-            node.next = self.head
-            self.head.previous = node
-        self.head = node
-        if self.tail == None:
-            self.tail = node
+            node.previous.next = node.next
+            node.next.previous = node.previous
+        head = sentinel.next
+        node.previous = sentinel
+        node.next = head
+        head.previous = node
+        sentinel.next = node
 
     def pop(self):
-        if self.tail != None:
-            last_elem = self.tail
-            self.tail = last_elem.previous
-            if self.head.data == last_elem.data:
-                self.head = None
-        elif self.head != None:
-            last_elem = self.head
-            self.head = None
-        else:
+        sentinel = self.sentinel
+        last_elem = sentinel.previous
+        if last_elem is sentinel:
             return None
-        if last_elem.previous != None:
-            last_elem.previous.next = None
-
+        sentinel.previous = last_elem.previous
+        last_elem.previous.next = sentinel
         del self.mapping[last_elem.data]
         return last_elem.data
-
-l = LinkedList()
-# l.append('Test')
-# assert l.pop() == 'Test'
-
-# l.append('Hi')
-# l.append('There')
-# l.append('You')
-# assert l.pop() == 'Hi'
-# l.append('There')
-# assert l.pop() == 'You'
-# assert l.pop() == 'There'
-
-# l.append("Hello")
-# l.append("World")
-# l.append("Hello")
-# assert l.pop() == "World"
-# assert l.pop() == "Hello"
-
-# l.append('Hi')
-# l.append('There')
-# l.append('You')
-# l.append('There')
-# assert l.pop() == 'Hi'
-# assert l.pop() == 'You'
-# l.append("Doe")
-# assert l.pop() == 'There'
-# l.append("John")
-# l.append("John")
-# assert l.pop() == 'Doe'
-# assert l.pop() == 'Doe'
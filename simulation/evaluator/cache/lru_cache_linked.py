@@ -1,42 +1,58 @@
 from .finite_cache import FiniteCache, NotEnoughCapacityError
-from .cache_item import CacheItem
 from .linked_list import LinkedList
+from .frequency_sketch import CountMinSketch
 from collections import defaultdict
 from typing import Optional
 
 class LRUCache(FiniteCache):
-    req_count: dict[str, int]
+    """Least recently used replacement, an item is only stored on its
+    `min_req_count`th miss.
+
+    By default the misses of every item are counted exactly in
+    `req_count`, which keeps an entry for every item missed fewer times.
+    With an `admission` sketch the misses are estimated in the fixed
+    memory of the sketch instead.  The sketch can not forget an item once
+    it is stored, but it ages, so old misses count less over time.
+
+    """
+    req_count: dict[int, int]
     min_req_count: int
+    admission: Optional[CountMinSketch]
     last_accessed: LinkedList
 
-    def __init__(self, capacity: int, min_req_count: int = 3):
+    def __init__(self, capacity: int, min_req_count: int = 3, admission: Optional[CountMinSketch] = None):
         super().__init__(capacity)
         self.req_count = defaultdict(int)
         self.last_accessed = LinkedList()
         self.min_req_count = min_req_count
+        self.admission = admission
 
-    def retrieve(self, identifier: str, at_timestamp: int) -> Optional[CacheItem]:
-        content = super().retrieve(identifier, at_timestamp)
-        if content != None:
+    def retrieve(self, identifier: int, at_timestamp: int) -> Optional[int]:
+        size = super().retrieve(identifier, at_timestamp)
+        if size != None:
             self.last_accessed.append(identifier)
-        return content
+        return size
 
-    def store(self, identifier: str, content: CacheItem, at_timestamp: int):
-        if content.size() > self.capacity:
+    def store(self, identifier: int, size: int, at_timestamp: int):
+        if size > self.capacity:
             # Only store items that fit in the cache.
             return
 
-        self.req_count[identifier] += 1
-        if self.req_count[identifier] < self.min_req_count:
-            # Only store items with the minimum required request count.
-            return
+        if self.admission != None:
+            if self.admission.add(identifier) < self.min_req_count:
+                return
+        else:
+            self.req_count[identifier] += 1
+            if self.req_count[identifier] < self.min_req_count:
+                # Only store items with the minimum required request count.
+                return
 
-        # Once inserted the request count resets.
-        del self.req_count[identifier]
+            # Once inserted the request count resets.
+            del self.req_count[identifier]
 
-        if not self.content_fits(content):
-            self.remove_least_recently_used(content.size())
-        super().store(identifier, content)
+        if not self.content_fits(size):
+            self.remove_least_recently_used(size)
+        super().store(identifier, size)
         self.last_accessed.append(identifier)
 
 
@@ -51,10 +67,8 @@ class LRUCache(FiniteCache):
 
         bytes_freed = self.capacity_available()
         while bytes_freed < no_bytes:
-            try:
-                to_remove = self.content[self.last_accessed.pop()]
-            except IndexError as e:
-                print(f"Tried to free {no_bytes}, but couldn't find any more items.")
-                print(f"{self.content}")
-            self.remove(to_remove.identifier)
+            to_remove = self.last_accessed.pop()
+            if to_remove == None:
+                raise NotEnoughCapacityError(f"Tried to free {no_bytes}, but couldn't find any more items.")
+            self.remove(to_remove)
             bytes_freed = self.capacity_available()
@@ -0,0 +1,30 @@
+from .finite_cache import FiniteCache
+from .lru_cache_linked import LRUCache
+from .lfu_cache import LFUCache
+from .arc_cache import ARCCache
+from .two_queue_cache import TwoQueueCache
+from .s3fifo_cache import S3FIFOCache
+from .tinylfu_cache import TinyLFUCache
+from .gdsf_cache import GDSFCache
+from .frequency_sketch import CountMinSketch
+from typing import Callable
+
+# The replacement policies a strategy can build its nodes with, by name.
+# Every policy is a `FiniteCache` of the given capacity in bytes that is
+# asked to `retrieve(identifier, at_timestamp)` every request and to
+# `store(identifier, size, at_timestamp)` every miss, and decides itself
+# what to admit and what to evict.
+CACHE_POLICIES: dict[str, Callable[[int], FiniteCache]] = {
+    "lru": lambda capacity: LRUCache(capacity=capacity),
+    "lru-no-admission": lambda capacity: LRUCache(capacity=capacity, min_req_count=1),
+    # Count the misses for admission in 64 KiB per node.
+    "lru-sketch": lambda capacity: LRUCache(capacity=capacity, admission=CountMinSketch.with_memory(1 << 16)),
+    "lru-sketch-doorkeeper": lambda capacity: LRUCache(capacity=capacity, admission=CountMinSketch.with_memory(1 << 16, doorkeeper=True)),
+    "lfu": LFUCache,
+    "arc": ARCCache,
+    "2q": TwoQueueCache,
+    "s3-fifo": S3FIFOCache,
+    "tinylfu": TinyLFUCache,
+    "gds": lambda capacity: GDSFCache(capacity=capacity, count_frequency=False),
+    "gdsf": GDSFCache,
+}
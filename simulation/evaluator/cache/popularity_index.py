@@ -0,0 +1,142 @@
+from bisect import insort
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+@dataclass
+class ProfileRanking:
+    popularity: int = 0
+    by_users: set[str] = field(default_factory=set)
+
+
+class PopularityIndex:
+    """The popularity of resources among the profiles connected to a node.
+
+    The live counts are updated as profiles track resources and as users
+    connect and disconnect, resources whose count changed are marked
+    dirty.  `publish` copies only the dirty resources into `ranking`, the
+    snapshot the node works with until the next publish, so refreshing
+    the ranking costs O(changes) instead of rebuilding it from every
+    connected profile.
+
+    The published resources are also kept in `buckets` by popularity, in
+    the order they entered their bucket, so the least popular resources
+    can be found without sorting the ranking.  Every entry into a bucket
+    is numbered, `position` orders the published resources the same way
+    as `least_popular`.
+
+    """
+    counts: dict[int, int]
+    users: dict[int, dict[str, int]]
+    # Maps every resource changed since the last publish to whether the
+    # set of users that have it in their profile changed.
+    dirty: dict[int, bool]
+    ranking: dict[int, ProfileRanking]
+    buckets: dict[int, dict[int, int]]
+    popularities: list[int]
+    no_entries: int
+
+    def __init__(self):
+        self.counts = {}
+        self.users = {}
+        self.dirty = {}
+        self.ranking = {}
+        self.buckets = {}
+        self.popularities = []
+        self.no_entries = 0
+
+    def add(self, user: str, identifier: int, occurrences: int = 1):
+        """Counts more occurrences of `identifier` in the profile of
+        `user`."""
+        self.counts[identifier] = self.counts.get(identifier, 0) + occurrences
+        by_user = self.users.get(identifier)
+        if by_user == None:
+            by_user = self.users[identifier] = {}
+        previous = by_user.get(user, 0)
+        by_user[user] = previous + occurrences
+        self.dirty[identifier] = self.dirty.get(identifier, False) or previous == 0
+
+    def remove(self, user: str, identifier: int, occurrences: int = 1):
+        """Counts less occurrences of `identifier` in the profile of
+        `user`."""
+        by_user = self.users[identifier]
+        if by_user[user] > occurrences:
+            by_user[user] -= occurrences
+            self.counts[identifier] -= occurrences
+            self.dirty.setdefault(identifier, False)
+            return
+        del by_user[user]
+        if len(by_user) == 0:
+            del self.users[identifier]
+            del self.counts[identifier]
+        else:
+            self.counts[identifier] -= occurrences
+        self.dirty[identifier] = True
+
+    def add_profile(self, user: str, counts: dict[int, int]):
+        """Counts every resource of a profile, see `UserProfile.counts`."""
+        for identifier, occurrences in counts.items():
+            self.add(user, identifier, occurrences)
+
+    def remove_profile(self, user: str, counts: dict[int, int]):
+        for identifier, occurrences in counts.items():
+            self.remove(user, identifier, occurrences)
+
+    def publish(self) -> list[int]:
+        """Brings `ranking` and `buckets` up to date with the live counts.
+
+        Returns the resources whose `position` changed."""
+        moved = []
+        for identifier, users_changed in self.dirty.items():
+            rank = self.ranking.get(identifier)
+            popularity = self.counts.get(identifier)
+            if popularity == None:
+                if rank != None:
+                    self.__remove_from_bucket(rank.popularity, identifier)
+                    del self.ranking[identifier]
+                    moved.append(identifier)
+                continue
+            if rank == None:
+                self.ranking[identifier] = ProfileRanking(popularity=popularity, by_users=set(self.users[identifier]))
+                self.__add_to_bucket(popularity, identifier)
+                moved.append(identifier)
+                continue
+            if rank.popularity != popularity:
+                self.__remove_from_bucket(rank.popularity, identifier)
+                self.__add_to_bucket(popularity, identifier)
+                rank.popularity = popularity
+                moved.append(identifier)
+            if users_changed:
+                rank.by_users = set(self.users[identifier])
+        self.dirty = {}
+        return moved
+
+    def position(self, identifier: int) -> Optional[tuple[int, int]]:
+        """The popularity of a published resource and when it entered its
+        bucket, `None` for resources that are not in the ranking."""
+        rank = self.ranking.get(identifier)
+        if rank == None:
+            return None
+        return rank.popularity, self.buckets[rank.popularity][identifier]
+
+    def least_popular(self, max_popularity: int) -> Iterator[int]:
+        """The published resources with a popularity of at most
+        `max_popularity`, least popular first."""
+        for popularity in self.popularities:
+            if popularity > max_popularity:
+                return
+            yield from self.buckets[popularity]
+
+    def __add_to_bucket(self, popularity: int, identifier: int):
+        bucket = self.buckets.get(popularity)
+        if bucket == None:
+            bucket = self.buckets[popularity] = {}
+            insort(self.popularities, popularity)
+        bucket[identifier] = self.no_entries
+        self.no_entries += 1
+
+    def __remove_from_bucket(self, popularity: int, identifier: int):
+        bucket = self.buckets[popularity]
+        del bucket[identifier]
+        if len(bucket) == 0:
+            del self.buckets[popularity]
+            self.popularities.remove(popularity)
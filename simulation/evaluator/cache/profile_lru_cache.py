@@ -1,94 +1,107 @@
 from .finite_cache import FiniteCache
+from .popularity_index import PopularityIndex, ProfileRanking
+from .eviction_index import ProfileEvictionIndex
 from typing import Optional
 from dataclasses import dataclass, field
-from .cache_item import CacheItem
-
-@dataclass
-class ProfileRanking:
-    popularity: int = 0
-    by_users: set[str] = field(default_factory=set)
+from collections import deque
 
 @dataclass
 class UserProfile:
+    """The last `max_size` resources requested by a user, `counts` holds
+    how often every resource occurs in `resources`."""
     max_size: int
-    resources: list[str] = field(default_factory=list)
+    resources: deque[int] = field(init=False)
+    counts: dict[int, int] = field(default_factory=dict)
     last_connected_node: Optional[str] = None
 
-    def track(self, identifier: str):
-        """Store this resource in the profile, removing the last item if the profile reached max size, not checked for duplicates."""
+    def __post_init__(self):
+        self.resources = deque(maxlen=self.max_size)
+
+    def track(self, identifier: int) -> Optional[int]:
+        """Store this resource in the profile, dropping the oldest resource if the profile reached max size, duplicates are kept.
+
+        Returns the dropped resource, if any."""
+        if self.max_size < 1:
+            return None
+        removed = None
+        if len(self.resources) == self.max_size:
+            removed = self.resources[0]
+            if self.counts[removed] == 1:
+                del self.counts[removed]
+            else:
+                self.counts[removed] -= 1
         self.resources.append(identifier)
-        if len(self.resources) > self.max_size:
-            self.resources.pop()
+        self.counts[identifier] = self.counts.get(identifier, 0) + 1
+        return removed
 
 
 class ProfileLRUCache(FiniteCache):
     connected_profiles: set[str]
-    content_neighbour: dict[str, str]
-    ranking: dict[str, ProfileRanking]
+    content_neighbour: dict[int, str]
+    popularity: PopularityIndex
+    # The ranking as last published by `popularity`.
+    ranking: dict[int, ProfileRanking]
+    evictions: ProfileEvictionIndex
 
     def __init__(self, capacity: int):
         super().__init__(capacity)
         self.content_neighbour = {}
         self.connected_profiles = set([])
-        self.ranking = {}
+        self.popularity = PopularityIndex()
+        self.ranking = self.popularity.ranking
+        self.evictions = ProfileEvictionIndex()
 
-    def store(self, identifier: str, content: CacheItem):
-        if not self.content_fits(content):
-            rank = self.ranking.get(content.identifier, None)
+    def store(self, identifier: int, size: int):
+        if not self.content_fits(size):
+            rank = self.ranking.get(identifier, None)
             # Give the lowest popularity by default and try to make enough space.
             popularity = 0
             if rank != None:
                 # Set actual popularity if in ranking.
                 popularity = rank.popularity
 
-            if self.remove_older_items(content.size(), popularity) == False:
+            if self.remove_older_items(size, popularity) == False:
                 # Don't try to store the item if there are not enough
                 # items to remove with a lower ranking.
                 return
 
-        super().store(identifier, content)
+        super().store(identifier, size)
+        if identifier not in self.evictions:
+            self.evictions.add(identifier, size, self.popularity.position(identifier))
+
+    def remove(self, identifier: int):
+        if self.has(identifier):
+            self.evictions.remove(identifier)
+        super().remove(identifier)
 
     def remove_older_items(self, no_bytes: int, less_popular_than: int):
+        """Removes the items that are not in the ranking by the time they
+        were stored, then the least popular items of the ranking up to
+        `less_popular_than`, until `no_bytes` are available.  Removes
+        nothing if that is not possible."""
         bytes_freed = self.capacity_available()
-
-        # As self.ranking is sorted we do not need to sort this array.
-        content_by_least_accessed = []
-
-        for k in self.content:
-            if k not in self.ranking:
-                # Make space by removing items that are not in the ranking.
-                content_by_least_accessed.append(k)
-
-        for k in self.ranking.keys():
-            if self.ranking[k].popularity > less_popular_than:
-                # Break the for loop early if the last_accessed items
-                # are above the older_than threshold, this is possible
-                # because the ranking is pre-sorted.
-                break
-            if k in self.content:
-                content_by_least_accessed.append(k)
-
-        available_bytes = sum([ self.content[k].size() for k in content_by_least_accessed ])
-        if bytes_freed + available_bytes < no_bytes:
+        if bytes_freed + self.evictions.evictable_bytes(less_popular_than) < no_bytes:
             return False
 
         while bytes_freed < no_bytes:
             # Only remove the least recently used items to make the
             # minimum of space available.
-            to_remove = self.content[content_by_least_accessed.pop(0)]
-            self.remove(to_remove.identifier)
-            bytes_freed += to_remove.size()
+            to_remove = self.evictions.next_eviction(less_popular_than)
+            bytes_freed += self.content[to_remove]
+            self.remove(to_remove)
         return True
 
+    def connect_profile(self, user: str, profile: UserProfile):
+        self.connected_profiles.add(user)
+        self.popularity.add_profile(user, profile.counts)
 
-    def update_ranking(self, profiles: dict[str, UserProfile]):
-        ranking = {}
-        for user, profile in profiles.items():
-            for identifier in profile.resources:
-                if identifier not in ranking:
-                    ranking[identifier] = ProfileRanking()
-                rank = ranking[identifier]
-                rank.popularity += 1
-                rank.by_users.add(user)
+    def disconnect_profile(self, user: str, profile: UserProfile):
+        self.connected_profiles.remove(user)
+        self.popularity.remove_profile(user, profile.counts)
 
-        self.ranking = dict(sorted(ranking.items(), key=lambda x: x[1].popularity))
+    def update_ranking(self):
+        """Publishes the popularity of the resources in the connected
+        profiles as the ranking."""
+        for identifier in self.popularity.publish():
+            if identifier in self.evictions:
+                self.evictions.move(identifier, self.popularity.position(identifier))
@@ -0,0 +1,95 @@
+from .finite_cache import FiniteCache
+from collections import OrderedDict
+from typing import Optional
+
+class S3FIFOCache(FiniteCache):
+    """S3-FIFO replacement (Yang et al.), measured in bytes.
+
+    New items enter the FIFO `small`, which holds about `small_share` of
+    the capacity.  Items leaving it that were requested more than once
+    since they entered move to the FIFO `main`, the others are evicted
+    and remembered without their content in `ghost`.  Missed items that
+    are still remembered enter `main` right away.  Items leaving `main`
+    that were requested since they last passed go around once more.
+
+    Every item counts its requests up to `max_frequency`, so the queues
+    only need a pop at the head and a push at the tail.
+
+    """
+    small_share: float
+    max_frequency: int
+    # Map identifiers to sizes, oldest first.
+    small: OrderedDict[int, int]
+    main: OrderedDict[int, int]
+    ghost: OrderedDict[int, int]
+    frequency: dict[int, int]
+    small_bytes: int
+    ghost_bytes: int
+
+    def __init__(self, capacity: int, small_share: float = 0.1, max_frequency: int = 3):
+        super().__init__(capacity)
+        self.small_share = small_share
+        self.max_frequency = max_frequency
+        self.small = OrderedDict()
+        self.main = OrderedDict()
+        self.ghost = OrderedDict()
+        self.frequency = {}
+        self.small_bytes = 0
+        self.ghost_bytes = 0
+
+    def retrieve(self, identifier: int, at_timestamp: int) -> Optional[int]:
+        size = super().retrieve(identifier, at_timestamp)
+        if size != None and self.frequency[identifier] < self.max_frequency:
+            self.frequency[identifier] += 1
+        return size
+
+    def store(self, identifier: int, size: int, at_timestamp: int):
+        if size > self.capacity or identifier in self.content:
+            return
+        while not self.content_fits(size):
+            if len(self.main) == 0 or self.small_bytes >= self.small_share * self.capacity:
+                self.__evict_small()
+            else:
+                self.__evict_main()
+        if identifier in self.ghost:
+            self.ghost_bytes -= self.ghost.pop(identifier)
+            self.main[identifier] = size
+        else:
+            self.small[identifier] = size
+            self.small_bytes += size
+        self.frequency[identifier] = 0
+        super().store(identifier, size)
+
+    def remove(self, identifier: int):
+        if identifier in self.small:
+            self.small_bytes -= self.small.pop(identifier)
+        else:
+            self.main.pop(identifier, None)
+        self.frequency.pop(identifier, None)
+        super().remove(identifier)
+
+    def __evict_small(self):
+        identifier, size = self.small.popitem(last=False)
+        self.small_bytes -= size
+        if self.frequency[identifier] > 1:
+            self.main[identifier] = size
+            self.frequency[identifier] = 0
+            return
+        # The ghost remembers about as many bytes as `main` holds.
+        self.ghost[identifier] = size
+        self.ghost_bytes += size
+        while self.ghost_bytes > self.capacity - self.small_share * self.capacity:
+            self.ghost_bytes -= self.ghost.popitem(last=False)[1]
+        del self.frequency[identifier]
+        super().remove(identifier)
+
+    def __evict_main(self):
+        while True:
+            identifier, size = self.main.popitem(last=False)
+            frequency = self.frequency[identifier]
+            if frequency == 0:
+                break
+            self.frequency[identifier] = frequency - 1
+            self.main[identifier] = size
+        del self.frequency[identifier]
+        super().remove(identifier)
@@ -0,0 +1,53 @@
+from .finite_cache import FiniteCache
+from .frequency_sketch import CountMinSketch
+from collections import OrderedDict
+from typing import Optional
+
+class TinyLFUCache(FiniteCache):
+    """An LRU cache behind TinyLFU admission (Einziger et al.).
+
+    Every request is added to a `CountMinSketch`.  A missed item that
+    fits without evicting is always stored, otherwise it is only stored
+    when it was requested more often than every least recently used item
+    it would push out.  The sketch is aged, so an item that used to be
+    popular does not keep its place forever.
+
+    """
+    sketch: CountMinSketch
+    # Maps identifiers to sizes, least recently used first.
+    recency: OrderedDict[int, int]
+
+    def __init__(self, capacity: int, sketch_width: int = 1 << 15, sketch_depth: int = 4):
+        super().__init__(capacity)
+        self.sketch = CountMinSketch(sketch_width, depth=sketch_depth)
+        self.recency = OrderedDict()
+
+    def retrieve(self, identifier: int, at_timestamp: int) -> Optional[int]:
+        size = super().retrieve(identifier, at_timestamp)
+        if size != None:
+            self.sketch.add(identifier)
+            self.recency.move_to_end(identifier)
+        return size
+
+    def store(self, identifier: int, size: int, at_timestamp: int):
+        frequency = self.sketch.add(identifier)
+        if size > self.capacity or identifier in self.content:
+            return
+        if not self.content_fits(size):
+            victims = []
+            bytes_freed = self.capacity_available()
+            for victim, victim_size in self.recency.items():
+                if bytes_freed >= size:
+                    break
+                if self.sketch.estimate(victim) >= frequency:
+                    return
+                victims.append(victim)
+                bytes_freed += victim_size
+            for victim in victims:
+                self.remove(victim)
+        self.recency[identifier] = size
+        super().store(identifier, size)
+
+    def remove(self, identifier: int):
+        self.recency.pop(identifier, None)
+        super().remove(identifier)
@@ -0,0 +1,70 @@
+from .finite_cache import FiniteCache
+from collections import OrderedDict
+from typing import Optional
+
+class TwoQueueCache(FiniteCache):
+    """The full 2Q replacement (Johnson and Shasha), measured in bytes.
+
+    New items enter the FIFO `incoming`, which holds about `incoming_share`
+    of the capacity.  Items leaving it are remembered without their
+    content in `outgoing`, up to `outgoing_share` of the capacity, and
+    only items missed again while remembered enter the LRU `main`.  Items
+    requested once therefore never push out items requested repeatedly.
+
+    """
+    incoming_share: float
+    outgoing_share: float
+    # Map identifiers to sizes, oldest or least recently used first.
+    incoming: OrderedDict[int, int]
+    outgoing: OrderedDict[int, int]
+    main: OrderedDict[int, int]
+    incoming_bytes: int
+    outgoing_bytes: int
+
+    def __init__(self, capacity: int, incoming_share: float = 0.25, outgoing_share: float = 0.5):
+        super().__init__(capacity)
+        self.incoming_share = incoming_share
+        self.outgoing_share = outgoing_share
+        self.incoming = OrderedDict()
+        self.outgoing = OrderedDict()
+        self.main = OrderedDict()
+        self.incoming_bytes = 0
+        self.outgoing_bytes = 0
+
+    def retrieve(self, identifier: int, at_timestamp: int) -> Optional[int]:
+        size = super().retrieve(identifier, at_timestamp)
+        if size != None and identifier in self.main:
+            self.main.move_to_end(identifier)
+        return size
+
+    def store(self, identifier: int, size: int, at_timestamp: int):
+        if size > self.capacity or identifier in self.content:
+            return
+        while not self.content_fits(size):
+            self.__reclaim()
+        if identifier in self.outgoing:
+            self.outgoing_bytes -= self.outgoing.pop(identifier)
+            self.main[identifier] = size
+        else:
+            self.incoming[identifier] = size
+            self.incoming_bytes += size
+        super().store(identifier, size)
+
+    def remove(self, identifier: int):
+        if identifier in self.incoming:
+            self.incoming_bytes -= self.incoming.pop(identifier)
+        else:
+            self.main.pop(identifier, None)
+        super().remove(identifier)
+
+    def __reclaim(self):
+        if len(self.incoming) > 0 and (len(self.main) == 0 or self.incoming_bytes > self.incoming_share * self.capacity):
+            identifier, size = self.incoming.popitem(last=False)
+            self.incoming_bytes -= size
+            self.outgoing[identifier] = size
+            self.outgoing_bytes += size
+            while self.outgoing_bytes > self.outgoing_share * self.capacity:
+                self.outgoing_bytes -= self.outgoing.popitem(last=False)[1]
+        else:
+            identifier, size = self.main.popitem(last=False)
+        super().remove(identifier)
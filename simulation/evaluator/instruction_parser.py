@@ -1,8 +1,39 @@
-from .instructions import Instruction, RawInstruction
+from .instructions import Instruction, RawInstruction, InstructionError, SYNTAX_MAP
+from .instructions import RequestInstruction, ConnectInstruction, DisconnectInstruction, SetIterationInstruction, CollectStatisticsInstruction
 from . import instructions as instructions
-from typing import Iterator
+from typing import Callable, Iterator
 import gzip
 
+def _decode_request(parts: list[str]) -> Instruction:
+    return RequestInstruction(parts[1], parts[2], parts[3])
+
+def _decode_connect(parts: list[str]) -> Instruction:
+    return ConnectInstruction(parts[1], parts[2])
+
+def _decode_disconnect(parts: list[str]) -> Instruction:
+    return DisconnectInstruction(parts[1], parts[2])
+
+def _decode_set_iteration(parts: list[str]) -> Instruction:
+    return SetIterationInstruction(int(parts[1]))
+
+def _decode_collect_statistics(parts: list[str]) -> Instruction:
+    return CollectStatisticsInstruction()
+
+_DECODERS_BY_NAME = {
+    "Request": _decode_request,
+    "Connect": _decode_connect,
+    "Disconnect": _decode_disconnect,
+    "SetIteration": _decode_set_iteration,
+    "CollectStatistics": _decode_collect_statistics,
+}
+
+# Maps the first token of an instruction line directly to the function that
+# builds the instruction from the split line.
+INSTRUCTION_DECODERS: dict[str, Callable[[list[str]], Instruction]] = {
+    token: _DECODERS_BY_NAME[name] for token, name in SYNTAX_MAP.items()
+    if name in _DECODERS_BY_NAME
+}
+
 class TraceIterator(Iterator):
     """Iterator for a given set of instructions.  Will not when all
     instructions have been returned.
@@ -47,10 +78,7 @@ class StreamingTraceIterator(Iterator):
         self.iterator = self.__build_iterator()
 
     def __build_iterator(self):
-        with gzip.open(self.file_path, 'r') as f:
-            for line in f:
-                instruction = InstructionParser.parse(line.decode())
-                yield instruction
+        return InstructionParser.streaming_intructions(self.file_path)
 
 
 class InstructionParser:
@@ -60,9 +88,21 @@ class InstructionParser:
     @staticmethod
     def parse(instruction: str) -> Instruction:
         """Parses an instruction in the form of a sting to a UserInstruction."""
+        parts = instruction.split()
+        try:
+            decoder = INSTRUCTION_DECODERS[parts[0]]
+        except (KeyError, IndexError):
+            raise InstructionError(f"Unknown instruction: {instruction!r}")
+        return decoder(parts)
+
+    @staticmethod
+    def parse_raw(instruction: str) -> Instruction:
+        """Parses an instruction through `RawInstruction`, resolving the
+        instruction class by name.  Slower than `parse`, kept as reference.
+        """
         raw_instruction = RawInstruction(instruction)
         # Instantiate the instruction dynamically using the instruction name.
-        return getattr(instructions, f"{raw_instruction.instruction}Instruction")(raw_instruction)
+        return getattr(instructions, f"{raw_instruction.instruction}Instruction").from_raw(raw_instruction)
 
     @staticmethod
     def parse_all(instructions: list[str]) -> list[Instruction]:
@@ -72,13 +112,21 @@ class InstructionParser:
     @staticmethod
     def parse_file(file_path) -> list[Instruction]:
         """Reads and parses instructions from file."""
-        with gzip.open(file_path, 'rb') as f:
-            instructions = InstructionParser.parse_all([ l.decode() for l in f.readlines() ])
-        return instructions
+        return list(InstructionParser.streaming_intructions(file_path))
 
     @staticmethod
     def streaming_intructions(file_path):
         """Streams a set of instructions line by line."""
-        with gzip.open(file_path, 'r') as f:
+        decoders = INSTRUCTION_DECODERS
+        with gzip.open(file_path, 'rb') as f:
             for line in f:
-                yield InstructionParser.parse(line.decode())
+                # Decoding the whole line once is cheaper than decoding every
+                # field of a `bytes.split()` separately.
+                parts = line.decode().split()
+                if len(parts) == 0:
+                    continue
+                try:
+                    decoder = decoders[parts[0]]
+                except KeyError:
+                    raise InstructionError(f"Unknown instruction: {line!r}")
+                yield decoder(parts)
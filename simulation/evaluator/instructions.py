@@ -31,64 +31,85 @@ class RawInstruction:
 
 class Instruction:
     """Generic top-level instruction"""
-    pass
+    __slots__ = ()
 
 
 class UserInstruction(Instruction):
+    __slots__ = ("user_id",)
     user_id: int
 
-    def __init__(self, instruction: RawInstruction):
-        self.user_id = instruction.body[0]
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+
+    @classmethod
+    def from_raw(cls, instruction: RawInstruction):
+        return cls(*instruction.body)
 
 
 class ConnectInstruction(UserInstruction):
+    __slots__ = ("node_id",)
     node_id: str
 
-    def __init__(self, instruction: RawInstruction):
-        super().__init__(instruction)
-        self.node_id = instruction.body[1]
+    def __init__(self, user_id: str, node_id: str):
+        self.user_id = user_id
+        self.node_id = node_id
 
     def __str__(self):
         return f"CONNECT {self.user_id} {self.node_id}"
 
 
 class DisconnectInstruction(UserInstruction):
+    __slots__ = ("node_id",)
     node_id: str
 
-    def __init__(self, instruction: RawInstruction):
-        super().__init__(instruction)
-        self.node_id = instruction.body[1]
+    def __init__(self, user_id: str, node_id: str):
+        self.user_id = user_id
+        self.node_id = node_id
 
     def __str__(self):
         return f"DISCONNECT {self.user_id} {self.node_id}"
 
 
 class RequestInstruction(UserInstruction):
+    __slots__ = ("node_id", "identifier")
     identifier: str
     node_id: str
 
-    def __init__(self, instruction: RawInstruction):
-        super().__init__(instruction)
-        self.node_id = instruction.body[1]
-        self.identifier = instruction.body[2]
+    def __init__(self, user_id: str, node_id: str, identifier: str):
+        # Fields are set directly rather than through `super()` as this is
+        # the most frequently created instruction.
+        self.user_id = user_id
+        self.node_id = node_id
+        self.identifier = identifier
 
     def __str__(self):
         return f"REQUEST {self.user_id} {self.node_id} {self.identifier}"
 
 
 class SetIterationInstruction(Instruction):
+    __slots__ = ("iteration",)
     iteration: int
 
-    def __init__(self, instruction: RawInstruction):
-        self.iteration = int(instruction.body[0])
+    def __init__(self, iteration: int):
+        self.iteration = iteration
+
+    @classmethod
+    def from_raw(cls, instruction: RawInstruction):
+        return cls(int(instruction.body[0]))
 
     def __str__(self):
         return f"ITERATION {self.iteration}"
 
 
 class CollectStatisticsInstruction(Instruction):
-    def __init__(self, instruction: RawInstruction):
+    __slots__ = ()
+
+    def __init__(self):
         pass
 
+    @classmethod
+    def from_raw(cls, instruction: RawInstruction):
+        return cls()
+
     def __str__(self):
         return f"COLLECT_STATS"
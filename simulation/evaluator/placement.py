@@ -0,0 +1,144 @@
+from simulation.evaluator.resource_catalog import ResourceCatalog
+from typing import Optional
+import numpy as np
+import hashlib
+
+def stable_hash(value: str) -> int:
+    """A 64 bit hash of `value` that, unlike `str.__hash__`, is the same in
+    every process."""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'little')
+
+def stable_hashes(values: list[str]) -> np.ndarray:
+    return np.array([ stable_hash(value) for value in values ], dtype=np.uint64)
+
+def mix(hashes: np.ndarray, seed: int) -> np.ndarray:
+    """Combines 64 bit hashes with a seed through the splitmix64 finalizer,
+    so a single hash per resource gives an independent hash per node."""
+    with np.errstate(over='ignore'):
+        x = hashes ^ np.uint64(seed)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+        return x ^ (x >> np.uint64(31))
+
+def node_weights(nodes: list[str], weights: Optional[dict[str, float]]) -> np.ndarray:
+    if weights == None:
+        return np.ones(len(nodes))
+    return np.array([ weights[node] for node in nodes ], dtype=np.float64)
+
+
+class Placement:
+    """Decides which node is responsible for every resource.
+
+    `assign` is computed once for a catalog and a list of nodes, and
+    returns the index of the responsible node for every resource id.
+    All placements only depend on the identifiers, sizes, and nodes, so
+    the assignment is identical across processes and runs.
+
+    """
+    def assign(self, catalog: ResourceCatalog, nodes: list[str]) -> np.ndarray:
+        raise NotImplementedError
+
+
+class ModuloPlacement(Placement):
+    """The hash of the identifier modulo the number of nodes."""
+    def assign(self, catalog: ResourceCatalog, nodes: list[str]) -> np.ndarray:
+        return (stable_hashes(catalog.identifiers) % np.uint64(len(nodes))).astype(np.int32)
+
+
+class RendezvousPlacement(Placement):
+    """Highest random weight hashing, every resource goes to the node with
+    the highest score for it.  Adding or removing a node only moves the
+    resources of that node.  With `weights` every node receives a share
+    of the resources proportional to its weight."""
+    weights: Optional[dict[str, float]]
+
+    def __init__(self, weights: Optional[dict[str, float]] = None):
+        self.weights = weights
+
+    def assign(self, catalog: ResourceCatalog, nodes: list[str]) -> np.ndarray:
+        hashes = stable_hashes(catalog.identifiers)
+        weights = node_weights(nodes, self.weights)
+        scores = np.empty((len(nodes), len(hashes)))
+        for i, node in enumerate(nodes):
+            # Map the top 53 bits to a uniform value in (0, 1), the score
+            # -w / ln(u) makes the chance of winning proportional to w.
+            uniform = ((mix(hashes, stable_hash(node)) >> np.uint64(11)).astype(np.float64) + 0.5) / float(1 << 53)
+            scores[i] = -weights[i] / np.log(uniform)
+        return np.argmax(scores, axis=0).astype(np.int32)
+
+
+class ConsistentHashPlacement(Placement):
+    """A hash ring with `virtual_nodes` points per node, every resource
+    goes to the node of the first point after its hash.  With `weights`
+    the number of points of a node is proportional to its weight."""
+    virtual_nodes: int
+    weights: Optional[dict[str, float]]
+
+    def __init__(self, virtual_nodes: int = 160, weights: Optional[dict[str, float]] = None):
+        self.virtual_nodes = virtual_nodes
+        self.weights = weights
+
+    def ring(self, nodes: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """The sorted points on the ring and the node index of every
+        point."""
+        weights = node_weights(nodes, self.weights)
+        weights = weights / weights.mean()
+        points, owners = [], []
+        for i, node in enumerate(nodes):
+            for v in range(max(1, round(self.virtual_nodes * weights[i]))):
+                points.append(stable_hash(f"{node}#{v}"))
+                owners.append(i)
+        points = np.array(points, dtype=np.uint64)
+        order = np.argsort(points, kind='stable')
+        return points[order], np.array(owners, dtype=np.int32)[order]
+
+    def assign(self, catalog: ResourceCatalog, nodes: list[str]) -> np.ndarray:
+        points, owners = self.ring(nodes)
+        positions = np.searchsorted(points, stable_hashes(catalog.identifiers), side='right') % len(points)
+        return owners[positions]
+
+
+class BoundedLoadPlacement(ConsistentHashPlacement):
+    """Consistent hashing with bounded loads measured in bytes.
+
+    Every node accepts at most `load_factor` times its share of the
+    bytes of the catalog.  Resources are placed largest first, a resource
+    that does not fit on the node of its point on the ring moves on to the
+    next node along the ring that has room for it.  This evens out the
+    bytes per node that plain hashing leaves to chance.
+
+    """
+    load_factor: float
+
+    def __init__(self, virtual_nodes: int = 160, load_factor: float = 1.05, weights: Optional[dict[str, float]] = None):
+        super().__init__(virtual_nodes=virtual_nodes, weights=weights)
+        self.load_factor = load_factor
+
+    def assign(self, catalog: ResourceCatalog, nodes: list[str]) -> np.ndarray:
+        points, owners = self.ring(nodes)
+        positions = (np.searchsorted(points, stable_hashes(catalog.identifiers), side='right') % len(points)).tolist()
+        owners = owners.tolist()
+        weights = node_weights(nodes, self.weights)
+        room = (self.load_factor * int(catalog.sizes.sum()) * weights / weights.sum()).tolist()
+        assignment = np.empty(len(catalog), dtype=np.int32)
+        sizes = catalog.size_list
+        for resource_id in np.argsort(-catalog.sizes, kind='stable').tolist():
+            size = sizes[resource_id]
+            position = positions[resource_id]
+            node = owners[position]
+            for step in range(len(owners)):
+                candidate = owners[(position + step) % len(owners)]
+                if room[candidate] >= size:
+                    node = candidate
+                    break
+            room[node] -= size
+            assignment[resource_id] = node
+        return assignment
+
+
+PLACEMENTS = {
+    "modulo": ModuloPlacement,
+    "rendezvous": RendezvousPlacement,
+    "consistent": ConsistentHashPlacement,
+    "bounded-load": BoundedLoadPlacement,
+}
@@ -0,0 +1,57 @@
+from simulation.generator.utils import read_resource_map
+from typing import Optional, Union
+import numpy as np
+
+class ResourceCatalog:
+    """Interns resource identifiers to dense integer ids.
+
+    The evaluator works on the integer ids only, which keeps the keys of
+    the cache dictionaries small and cheap to compare.  Identifiers are
+    translated back with `identifier_for` where the original string is
+    needed, for example to report on or to hash a resource.
+
+    `sizes` holds the size of every resource indexed by id,
+    `size_list` holds the same sizes as Python integers for lookups of a
+    single resource, which are a lot cheaper on a list than on an array.
+
+    """
+    identifiers: list[str]
+    ids: dict[str, int]
+    sizes: np.ndarray
+    size_list: list[int]
+
+    def __init__(self, resource_map: dict[str, int]):
+        self.identifiers = list(resource_map.keys())
+        self.ids = { identifier: i for i, identifier in enumerate(self.identifiers) }
+        self.size_list = list(resource_map.values())
+        self.sizes = np.array(self.size_list, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.identifiers)
+
+    def __contains__(self, identifier: str):
+        return identifier in self.ids
+
+    def id_for(self, identifier: str) -> Optional[int]:
+        """Returns the id of the resource, `None` for unknown resources."""
+        return self.ids.get(identifier)
+
+    def identifier_for(self, resource_id: int) -> str:
+        return self.identifiers[resource_id]
+
+    def size_of(self, resource_id: int) -> int:
+        return self.size_list[resource_id]
+
+    @staticmethod
+    def from_file(file_path) -> "ResourceCatalog":
+        """Builds the catalog from a resource map file, see
+        `read_resource_map`."""
+        return ResourceCatalog(read_resource_map(file_path))
+
+    @staticmethod
+    def of(content: Union[dict[str, int], "ResourceCatalog"]) -> "ResourceCatalog":
+        """Returns `content` if it already is a catalog, otherwise
+        interns the resource map."""
+        if isinstance(content, ResourceCatalog):
+            return content
+        return ResourceCatalog(content)
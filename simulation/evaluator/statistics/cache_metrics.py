@@ -34,8 +34,8 @@ class CacheMetrics:
     def track_request_origin(self):
         self.requests_to_origin += 1
 
-    def track_request_neighbour(self):
-        self.requests_to_neighbours += 1
+    def track_request_neighbour(self, no_requests: int = 1):
+        self.requests_to_neighbours += no_requests
 
     def track_request_neighbour_success(self, no_bytes: int):
         self.requests_to_neighbours_success += 1
@@ -1,24 +1,114 @@
 from .cache_metrics import CacheMetrics
-import dataclasses
+from array import array
+from typing import Optional
+import numpy as np
 import pathlib
 
+HEADER_ITEMS = [ "iteration", "hits", "misses", "no_items", "bytes_used", "cache_bytes", "origin_bytes", "neighbour_bytes", "requests_to_origin", "requests_to_neighbours", "requests_to_neighbours_success" ]
+# The columns that are read from `CacheMetrics`, in order.
+METRIC_ITEMS = HEADER_ITEMS[1:]
+
 class StatsFileWriter:
+    """Writes the statistics of a node to a CSV file, one line per
+    iteration.
+
+    The file is kept open and lines are buffered, call `flush` or
+    `close`, or use the writer as a context manager, to make sure all
+    statistics are written.
+
+    """
     file_path: pathlib.Path
     separator: str = ";"
-    header_items = [ "iteration", "hits", "misses", "no_items", "bytes_used", "cache_bytes", "origin_bytes", "neighbour_bytes", "requests_to_origin", "requests_to_neighbours", "requests_to_neighbours_success" ]
+    header_items = HEADER_ITEMS
+    buffer_size: int
+    buffer: list[str]
+    file: Optional[any] = None
 
-    def __init__(self, file_path: pathlib.Path):
+    def __init__(self, file_path: pathlib.Path, buffer_size: int = 256):
         self.file_path = file_path
-        with open(self.file_path, 'w') as f:
-            f.write(f"{self.__header_line()}\n")
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.file = open(self.file_path, 'w')
+        self.file.write(f"{self.__header_line()}\n")
 
     def write_stats(self, iteration: int, stats: CacheMetrics):
-        values = dataclasses.asdict(stats)
-        stats_items = [ iteration] + [ values[key] for key in self.header_items
-                                       if key != "iteration" ]
-        stats_line = self.separator.join(str(x) for x in stats_items )
-        with open(self.file_path, 'a') as f:
-            f.write(f"{stats_line}\n")
+        stats_items = [ iteration ] + [ getattr(stats, key) for key in METRIC_ITEMS ]
+        self.buffer.append(self.separator.join(str(x) for x in stats_items) + "\n")
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.file == None:
+            return
+        self.file.writelines(self.buffer)
+        self.buffer = []
+        self.file.flush()
+
+    def close(self):
+        if self.file == None:
+            return
+        self.flush()
+        self.file.close()
+        self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        self.close()
 
     def __header_line(self):
         return self.separator.join(self.header_items)
+
+
+class NumpyStatsWriter:
+    """Writes the statistics of a node to a `.npy` file as a structured
+    array with a field for every column of `StatsFileWriter`.
+
+    Rows are kept in memory and the file is (re)written on `flush` and
+    `close`, it can be read without any parsing by
+    `experiments.stats_reader.load_file`.
+
+    """
+    file_path: pathlib.Path
+    header_items = HEADER_ITEMS
+    rows: array
+    closed: bool
+
+    def __init__(self, file_path: pathlib.Path):
+        self.file_path = file_path
+        self.rows = array('q')
+        self.closed = False
+        self.flush()
+
+    def write_stats(self, iteration: int, stats: CacheMetrics):
+        self.rows.append(iteration)
+        self.rows.extend(getattr(stats, key) for key in METRIC_ITEMS)
+
+    def to_array(self) -> np.ndarray:
+        columns = np.frombuffer(self.rows, dtype=np.int64).reshape(-1, len(self.header_items))
+        data = np.empty(len(columns), dtype=[ (key, np.int64) for key in self.header_items ])
+        for i, key in enumerate(self.header_items):
+            data[key] = columns[:, i]
+        return data
+
+    def flush(self):
+        if self.closed:
+            return
+        # `np.save` appends `.npy` to paths without it, use a file object
+        # to always write to `file_path`.
+        with open(self.file_path, 'wb') as f:
+            np.save(f, self.to_array())
+
+    def close(self):
+        self.flush()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
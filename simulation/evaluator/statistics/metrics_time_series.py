@@ -0,0 +1,119 @@
+from .cache_metrics import CacheMetrics
+from .file_writer import METRIC_ITEMS
+from typing import Optional
+import numpy as np
+import pathlib
+
+class MetricsTimeSeries:
+    """The metrics of every node at every collected iteration.
+
+    Backed by a single int64 array of shape (nodes, rows, metrics) that
+    grows by doubling, so recording a row does not allocate.  The
+    metrics are running totals as tracked by `CacheMetrics`, `deltas`
+    and `windowed_average` derive the per iteration values without any
+    Python loops.
+
+    """
+    metrics = METRIC_ITEMS
+    nodes: list[str]
+    node_index: dict[str, int]
+    metric_index: dict[str, int]
+    iterations: np.ndarray
+    data: np.ndarray
+    no_rows: int
+
+    def __init__(self, nodes: list[str], capacity: int = 1024):
+        self.nodes = list(nodes)
+        self.node_index = { node: i for i, node in enumerate(self.nodes) }
+        self.metric_index = { metric: i for i, metric in enumerate(self.metrics) }
+        self.iterations = np.zeros(capacity, dtype=np.int64)
+        self.data = np.zeros((len(self.nodes), capacity, len(self.metrics)), dtype=np.int64)
+        self.no_rows = 0
+
+    def __len__(self):
+        return self.no_rows
+
+    def record(self, iteration: int, node_stats: dict[str, CacheMetrics]):
+        """Stores the metrics of every node in `node_stats` as the next
+        row, nodes that are not in `node_stats` keep zeros."""
+        if self.no_rows == len(self.iterations):
+            self.__grow()
+        row = self.no_rows
+        self.iterations[row] = iteration
+        for node, stats in node_stats.items():
+            self.data[self.node_index[node], row] = [ getattr(stats, metric) for metric in self.metrics ]
+        self.no_rows += 1
+
+    def __grow(self):
+        capacity = max(1, 2 * len(self.iterations))
+        iterations = np.zeros(capacity, dtype=np.int64)
+        iterations[:self.no_rows] = self.iterations[:self.no_rows]
+        data = np.zeros((len(self.nodes), capacity, len(self.metrics)), dtype=np.int64)
+        data[:, :self.no_rows] = self.data[:, :self.no_rows]
+        self.iterations, self.data = iterations, data
+
+    def iteration_numbers(self) -> np.ndarray:
+        return self.iterations[:self.no_rows]
+
+    def totals(self, metric: str, node: Optional[str] = None) -> np.ndarray:
+        """The running totals of `metric`, of shape (nodes, rows) or
+        (rows,) for a single `node`."""
+        column = self.data[:, :self.no_rows, self.metric_index[metric]]
+        if node != None:
+            return column[self.node_index[node]]
+        return column
+
+    def deltas(self, metric: str, node: Optional[str] = None) -> np.ndarray:
+        """The change of `metric` since the previous row, the first row
+        is relative to zero."""
+        return np.diff(self.totals(metric, node), axis=-1, prepend=0)
+
+    def node_series(self, node: str) -> np.ndarray:
+        """All metrics of a single node, of shape (rows, metrics)."""
+        return self.data[self.node_index[node], :self.no_rows]
+
+    def sum_over_nodes(self) -> np.ndarray:
+        """The metrics summed over all nodes, of shape (rows, metrics)."""
+        return self.data[:, :self.no_rows].sum(axis=0)
+
+    @staticmethod
+    def windowed_average(values: np.ndarray, window: int = 5) -> np.ndarray:
+        """Averages every value over the `window` values before it (not
+        including itself) along the last axis, the first value is kept
+        as is."""
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape[-1] == 0:
+            return values
+        cumulative = np.cumsum(values, axis=-1)
+        cumulative = np.concatenate([ np.zeros(values.shape[:-1] + (1,)), cumulative ], axis=-1)
+        end = np.arange(values.shape[-1])
+        start = np.maximum(0, end - window)
+        counts = np.maximum(1, end - start)
+        averages = (cumulative[..., end] - cumulative[..., start]) / counts
+        averages[..., 0] = values[..., 0]
+        return averages
+
+    @staticmethod
+    def aggregate(runs: list["MetricsTimeSeries"], metric: str) -> tuple[np.ndarray, np.ndarray]:
+        """The mean and standard deviation over `runs` of the totals of
+        `metric` summed over all nodes, the runs need the same number of
+        rows."""
+        totals = np.stack([ run.totals(metric).sum(axis=0) for run in runs ])
+        return totals.mean(axis=0), totals.std(axis=0)
+
+    def save(self, file_path):
+        """Stores the time series in a `.npz` archive."""
+        with open(file_path, 'wb') as f:
+            np.savez(f, nodes=np.array(self.nodes), metrics=np.array(self.metrics),
+                     iterations=self.iteration_numbers(), data=self.data[:, :self.no_rows])
+
+    @staticmethod
+    def load(file_path) -> "MetricsTimeSeries":
+        with np.load(file_path) as archive:
+            if list(archive["metrics"]) != list(MetricsTimeSeries.metrics):
+                raise ValueError(f"Unexpected metrics in {file_path}: {list(archive['metrics'])}")
+            series = MetricsTimeSeries(archive["nodes"].tolist(), capacity=0)
+            series.iterations = archive["iterations"].copy()
+            series.data = archive["data"].copy()
+            series.no_rows = len(series.iterations)
+        return series
@@ -1,50 +1,59 @@
 import pathlib
 import argparse
-from typing import Tuple
+from typing import Optional, Tuple
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import os
 from simulation.evaluator.instruction_parser import TraceIterator
 from simulation.evaluator.instructions import RequestInstruction, SetIterationInstruction
 from simulation.generator.utils import read_resource_map
 import sys
-from bisect import bisect_right
+import heapq
 from simulation.evaluator.statistics.cache_metrics import CacheMetrics
 from simulation.evaluator.statistics.file_writer import StatsFileWriter
 
-def find_gt(a, x):
-    """Find leftmost value greater than x using bisect, only works for a
-    sorted array, for more information see:
+def next_use_for(request_ids: np.ndarray) -> np.ndarray:
+    """Computes for every position in a sequence of (integer) request
+    identifiers the position at which the same identifier is requested
+    next, or `sys.maxsize` if it is never requested again.
 
-    https://docs.python.org/3.6/library/bisect.html
+    Equivalent to a backward scan that remembers the last position of
+    every identifier, but done with a stable sort so it runs in NumPy.
 
     """
-    i = bisect_right(a, x)
-    if i != len(a):
-        return a[i]
-    raise ValueError
+    request_ids = np.asarray(request_ids)
+    next_use = np.full(len(request_ids), sys.maxsize, dtype=np.int64)
+    if len(request_ids) < 2:
+        return next_use
+    # Group the positions by identifier, within a group they stay sorted.
+    order = np.argsort(request_ids, kind='stable')
+    same_identifier = request_ids[order[1:]] == request_ids[order[:-1]]
+    next_use[order[:-1][same_identifier]] = order[1:][same_identifier]
+    return next_use
+
+def encode_requests(requests: list[str]) -> np.ndarray:
+    """Interns request identifiers to dense integers in order of appearance."""
+    ids = {}
+    return np.fromiter((ids.setdefault(r, len(ids)) for r in requests), dtype=np.int64, count=len(requests))
+
+def load_or_compute_next_use(requests: list[str], file_path=None) -> np.ndarray:
+    """Returns the next use array for `requests`.
+
+    If `file_path` is given the array is stored there and memory-mapped on
+    later calls, so a sweep over capacities for the same trace computes
+    it once.  The caller is responsible for using a different file for a
+    different trace.
 
-
-class BeladyOracle:
-    requests_for: dict[str, list[int]]
-
-    def __init__(self, requests_for: dict[str, list[int]]):
-        self.requests_for = requests_for
-
-    def calls_for(self, identifier):
-        return self.requests_for.get(identifier)
-
-    def next_call_for(self, identifier, current_timestamp):
-        calls = self.calls_for(identifier)
-        try:
-            return find_gt(calls, current_timestamp)
-        except ValueError:
-            return sys.maxsize
-
-    @staticmethod
-    def from_ordered_list(request_list: list[str]):
-        request_by_iteration = defaultdict(list)
-        for i, request in enumerate(request_list):
-            request_by_iteration[request].append(i)
-        return BeladyOracle(requests_for=request_by_iteration)
+    """
+    if file_path != None and os.path.exists(file_path):
+        return np.load(file_path, mmap_mode='r')
+    next_use = next_use_for(encode_requests(requests))
+    if file_path != None:
+        tmp_path = f"{file_path}.tmp-{os.getpid()}.npy"
+        np.save(tmp_path, next_use)
+        os.replace(tmp_path, file_path)
+    return next_use
 
 
 class UnableToStoreError(Exception):
@@ -56,12 +65,21 @@ class BeladysMIN:
     used_weight: int = 0
 
     stored: dict[str,int] = {}
+    # Max-heap (through negated keys) of stored items by their next call,
+    # entries are invalidated lazily when an item is evicted or called
+    # again.  Ties are broken by the order in which items were stored.
+    eviction_queue: list[tuple[int, int, str]]
+    stored_order: dict[str, int]
+    no_stored: int = 0
 
     def __init__(self, max_weight: int):
         self.max_weight = max_weight
         self.used_weight = 0
         self.no_requests = 0
         self.stored = {}
+        self.eviction_queue = []
+        self.stored_order = {}
+        self.no_stored = 0
 
     def weight_for(self, identifier) -> int:
         raise NotImplementedError
@@ -71,9 +89,22 @@ class BeladysMIN:
 
     def store_item(self, identifier):
         weight = self.weight_for(identifier)
-        self.stored[identifier] = self.next_call_for(identifier)
+        next_call = self.next_call_for(identifier)
+        self.stored[identifier] = next_call
+        self.no_stored += 1
+        self.stored_order[identifier] = self.no_stored
+        self.__push(identifier, next_call)
         self.used_weight += weight
 
+    def update_next_call(self, identifier):
+        """Update the next call of an item that is already stored."""
+        next_call = self.next_call_for(identifier)
+        if self.stored[identifier] == next_call:
+            # Already queued under this next call.
+            return
+        self.stored[identifier] = next_call
+        self.__push(identifier, next_call)
+
     def ranking_by_next_call(self, min_iteration: int = 0):
         """Generate a ranknig of `stored` identifiers sorted by the next
         time they will be called (from early-last).
@@ -84,18 +115,44 @@ class BeladysMIN:
 
     def make_weight_available(self, weight: int, min_iteration: int = 0) -> list[str]:
         """Make sure a certain amount of weight is available to use.
+
+        Items are evicted from the one called furthest in the future, only
+        items called after `min_iteration` are considered.  Nothing is
+        evicted when these items together do not free up enough weight.
+
         """
         if weight > self.max_weight:
             raise UnableToStoreError("Trying to clear weight for an item that will not fit.")
         if self.__can_store(weight):
             return []
-        ranking_by_call = self.ranking_by_next_call(min_iteration=min_iteration)
-        if weight > sum([ self.weight_for(item) for item in ranking_by_call ]):
+
+        # Take candidates from the queue until they cover the weight, which
+        # is all that is needed to know whether the item can be stored.
+        candidates = []
+        candidate_weight = 0
+        queue = self.eviction_queue
+        while candidate_weight < weight and len(queue) > 0:
+            entry = queue[0]
+            if not self.__is_valid(entry):
+                heapq.heappop(queue)
+                continue
+            if -entry[0] <= min_iteration:
+                break
+            candidates.append(heapq.heappop(queue))
+            candidate_weight += self.weight_for(entry[2])
+
+        if candidate_weight < weight:
+            for entry in candidates:
+                heapq.heappush(queue, entry)
             raise UnableToStoreError("Not enough items to evict")
+
         evicted = []
-        while not self.__can_store(weight):
-            item_to_evict = ranking_by_call.pop()
-            evicted.append(self.evict_item(item_to_evict))
+        for i, entry in enumerate(candidates):
+            if self.__can_store(weight):
+                for remaining in candidates[i:]:
+                    heapq.heappush(queue, remaining)
+                break
+            evicted.append(self.evict_item(entry[2]))
         return evicted
 
 
@@ -105,6 +162,7 @@ class BeladysMIN:
         Evicting an item releases the weight that this item occupied.
         """
         del self.stored[item_to_evict]
+        del self.stored_order[item_to_evict]
         self.used_weight -= self.weight_for(item_to_evict)
         return item_to_evict
 
@@ -117,7 +175,7 @@ class BeladysMIN:
         """
         if identifier in self.stored:
             self.no_requests += 1
-            self.stored[identifier] = self.next_call_for(identifier)
+            self.update_next_call(identifier)
             return "HIT", []
 
         item_weight = self.weight_for(identifier)
@@ -132,6 +190,21 @@ class BeladysMIN:
         self.no_requests += 1
         return "MISS", evicted
 
+    def __push(self, identifier, next_call: int):
+        heapq.heappush(self.eviction_queue, (-next_call, -self.stored_order[identifier], identifier))
+        if len(self.eviction_queue) > 2 * len(self.stored) + 1024:
+            self.__compact_queue()
+
+    def __is_valid(self, entry: tuple[int, int, str]) -> bool:
+        identifier = entry[2]
+        return self.stored.get(identifier) == -entry[0] and self.stored_order.get(identifier) == -entry[1]
+
+    def __compact_queue(self):
+        """Drop all invalidated entries from the queue."""
+        self.eviction_queue = [ (-next_call, -self.stored_order[identifier], identifier)
+                                for identifier, next_call in self.stored.items() ]
+        heapq.heapify(self.eviction_queue)
+
     def __available_weight(self):
         return self.max_weight - self.used_weight
 
@@ -153,44 +226,50 @@ class BeladysMINIteration(BeladysMIN):
     """
     content_byte_size: dict[str, int]
     request_trace: dict[int, list[str]]
-    oracle: BeladyOracle
+    next_use: np.ndarray
+    current_request: int
     average_content_size: int
 
-    def __init__(self, byte_capacity: int, request_trace: dict[int, list[str]], content_byte_size: dict[str, int], average_content_weight: int):
+    def __init__(self, byte_capacity: int, request_trace: dict[int, list[str]], content_byte_size: dict[str, int], average_content_weight: int, next_use: Optional[np.ndarray] = None):
         """Initializes the wrapper around Belady's MIN algorithm
 
         The order of the requests in every entry in the `request_trace` matter.
+        A precomputed `next_use` array (see `load_or_compute_next_use`)
+        for the same request trace can be passed to avoid recomputing it.
 
         """
         super().__init__(byte_capacity)
         self.content_byte_size = content_byte_size
         self.request_trace = request_trace
-        self.oracle = BeladyOracle.from_ordered_list([ request
-                                                       for iteration in request_trace.values()
-                                                       for request in iteration ])
+        if next_use is None:
+            next_use = load_or_compute_next_use([ request
+                                                  for iteration in request_trace.values()
+                                                  for request in iteration ])
+        self.next_use = next_use
+        self.current_request = 0
         self.average_content_weight = average_content_weight
 
     def simulate(self, no_iterations: int, out_file: pathlib.Path):
         metrics = CacheMetrics()
-        stats_writer = StatsFileWriter(out_file)
-        for iteration in range(no_iterations):
-            content = self.request_trace[iteration]
-            for identifier in content:
-                inserted, evicted = self.handle_request(identifier)
-                content_weight = self.weight_for(identifier)
-                if inserted == "MISS":
-                    metrics.track_miss()
-                    metrics.track_item_stored(content_weight)
-                if inserted == "MISS" or inserted == "PASS":
-                    metrics.track_request_origin()
-                    metrics.track_bytes_origin(content_weight)
-                if inserted == "HIT":
-                    metrics.track_hit(content_weight)
-
-                if evicted != None:
-                    [ metrics.track_item_removed(self.weight_for(item)) for item in evicted ]
-
-            stats_writer.write_stats(iteration, metrics)
+        with StatsFileWriter(out_file) as stats_writer:
+            for iteration in range(no_iterations):
+                content = self.request_trace[iteration]
+                for identifier in content:
+                    inserted, evicted = self.handle_request(identifier)
+                    content_weight = self.weight_for(identifier)
+                    if inserted == "MISS":
+                        metrics.track_miss()
+                        metrics.track_item_stored(content_weight)
+                    if inserted == "MISS" or inserted == "PASS":
+                        metrics.track_request_origin()
+                        metrics.track_bytes_origin(content_weight)
+                    if inserted == "HIT":
+                        metrics.track_hit(content_weight)
+
+                    if evicted != None:
+                        [ metrics.track_item_removed(self.weight_for(item)) for item in evicted ]
+
+                stats_writer.write_stats(iteration, metrics)
 
     def weight_for(self, identifier):
         try:
@@ -198,8 +277,22 @@ class BeladysMINIteration(BeladysMIN):
         except KeyError:
             return self.average_content_weight
 
+    def handle_request(self, identifier) -> Tuple[str, list[str]]:
+        self.current_request = self.no_requests
+        return super().handle_request(identifier)
+
     def next_call_for(self, identifier):
-        return self.oracle.next_call_for(identifier, self.no_requests)
+        """Returns the first call of the current request's `identifier`
+        after `no_requests`.
+
+        Only valid for the identifier of the request being handled, which
+        is the only identifier `BeladysMIN` asks for.
+
+        """
+        next_call = int(self.next_use[self.current_request])
+        while next_call <= self.no_requests:
+            next_call = int(self.next_use[next_call])
+        return next_call
 
 
 def order_content_by_node(trace) -> Tuple[dict[str, dict[int, list[str]]], int]:
@@ -212,18 +305,60 @@ def order_content_by_node(trace) -> Tuple[dict[str, dict[int, list[str]]], int]:
             content_by_node_by_iteration[i.node_id][iteration].append(i.identifier)
     return content_by_node_by_iteration, iteration + 1
 
-def run_belady(trace, resource_mapping: dict[str, int], cache_size: int, out_dir: str, marker: str = ""):
+def simulate_node(cache_size: int, content_by_iteration: dict[int, list[str]], content_byte_size: dict[str, int], average_content_size: int, no_iterations: int, out_file: str, next_use_file: Optional[str] = None):
+    """Simulates Belady's MIN for a single node and writes its statistics
+    to `out_file`."""
+    next_use = load_or_compute_next_use([ request
+                                          for iteration in content_by_iteration.values()
+                                          for request in iteration ],
+                                        next_use_file)
+    MIN = BeladysMINIteration(cache_size, content_by_iteration, content_byte_size, average_content_size, next_use=next_use)
+    MIN.simulate(no_iterations, out_file=out_file)
+
+def run_belady(trace, resource_mapping: dict[str, int], cache_size: int, out_dir: str, marker: str = "", next_use_dir: Optional[str] = None, workers: int = 1):
+    """Simulates Belady's MIN for every node in the trace.
+
+    When `next_use_dir` is given the next use array of every node is
+    stored in (and on later runs loaded from) that directory, it should
+    therefore be unique for the `trace`.
+
+    With more than one worker the nodes are simulated in separate
+    processes, every process only receives the requests and content sizes
+    of its own node.  Every node writes its own statistics file, so the
+    output does not depend on the number of workers.
+
+    """
     if len(marker) > 0:
         marker = f"-{marker}"
     average_content_size = int(sum(resource_mapping.values()) / len(resource_mapping))
     content_by_node_by_iteration, no_iterations = order_content_by_node(trace)
 
-    belady_by_node = { node_id: BeladysMINIteration(cache_size, content_by_iteration, resource_mapping, average_content_size)
-                       for node_id, content_by_iteration in content_by_node_by_iteration.items() }
-
-    for node_id, MIN in belady_by_node.items():
-        # print(f"\nSimulating node {node_id}...")
-        MIN.simulate(no_iterations, out_file=f"{out_dir}/{node_id}{marker}.csv")
+    def node_arguments(node_id, content_by_iteration):
+        next_use_file = None
+        if next_use_dir != None:
+            next_use_file = f"{next_use_dir}/{node_id}.next-use.npy"
+        content_byte_size = resource_mapping
+        if workers > 1:
+            # Only ship the sizes of the content requested on this node.
+            content_byte_size = { identifier: resource_mapping[identifier]
+                                  for iteration in content_by_iteration.values()
+                                  for identifier in iteration
+                                  if identifier in resource_mapping }
+        return (cache_size, content_by_iteration, content_byte_size, average_content_size, no_iterations,
+                f"{out_dir}/{node_id}{marker}.csv", next_use_file)
+
+    if workers <= 1:
+        for node_id, content_by_iteration in content_by_node_by_iteration.items():
+            # print(f"\nSimulating node {node_id}...")
+            simulate_node(*node_arguments(node_id, content_by_iteration))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [ executor.submit(simulate_node, *node_arguments(node_id, content_by_iteration))
+                    for node_id, content_by_iteration in content_by_node_by_iteration.items() ]
+        for future in futures:
+            # Propagate any exception raised in a worker.
+            future.result()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Create dataset plots')
@@ -235,6 +370,10 @@ if __name__ == "__main__":
                         help='the amount of MB available for storage an each node')
     parser.add_argument('--out-dir', type=pathlib.Path, default="./belady-out/",
                         help='where to save the statistics')
+    parser.add_argument('--next-use-dir', type=pathlib.Path, default=None,
+                        help='where to cache the next use arrays of this trace, to reuse them across capacities')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='the number of processes used to simulate the nodes')
 
     args = parser.parse_args()
 
@@ -243,4 +382,4 @@ if __name__ == "__main__":
 
     cache_size = args.node_capacity*1024*1024
     instructions = TraceIterator.from_file(args.trace)
-    run_belady(instructions, resource_size, cache_size, args.out_dir)
+    run_belady(instructions, resource_size, cache_size, args.out_dir, next_use_dir=args.next_use_dir, workers=args.workers)
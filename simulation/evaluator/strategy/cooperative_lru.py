@@ -1,56 +1,93 @@
-from simulation.evaluator.cache.cache_item import CacheItem
-from simulation.evaluator.cache.clru_cache import CooperativeLRUCache
+from simulation.evaluator.cache.finite_cache import FiniteCache
+from simulation.evaluator.cache.policies import CACHE_POLICIES
+from simulation.evaluator.cache.holders_index import HoldersIndex
 from simulation.evaluator.strategy.strategy import CacheStrategy
 
 class CooperativeLRUStrategy(CacheStrategy):
     node_trail_length: int
     outsource_resources: bool
+    cache_policy: str
+    # Maps every node to the neighbour every resource was last found on.
+    content_neighbours: dict[str, dict[int, str]]
+    holders: HoldersIndex
+    # The distinct nodes among the last `node_trail_length` nodes every
+    # user connected to before its current node, updated on connect.
+    trails: dict[str, list[str]]
+    # The bits of the nodes of every trail in `holders`.
+    trail_masks: dict[str, int]
 
-    def __init__(self, nodes: dict[str, int], node_trail_length: int, outsource_resources: bool = False):
+    def __init__(self, nodes: dict[str, int], node_trail_length: int, outsource_resources: bool = False, cache_policy: str = "lru"):
+        self.cache_policy = cache_policy
         super().__init__({ name: self.build_node(capacity)
                            for name, capacity in nodes.items() })
         self.node_trail_length = node_trail_length
         self.outsource_resources = outsource_resources
+        self.content_neighbours = { name: {} for name in nodes }
+        self.holders = HoldersIndex(list(nodes))
+        for name, node in self.nodes.items():
+            self.holders.attach(name, node)
+        self.trails = {}
+        self.trail_masks = {}
 
-    def build_node(self, capacity) -> CooperativeLRUCache:
-        return CooperativeLRUCache(capacity=capacity)
+    def build_node(self, capacity) -> FiniteCache:
+        return CACHE_POLICIES[self.cache_policy](capacity)
 
-    def handle_request(self, for_user: str, for_node: str, content: CacheItem, at_timestamp: int):
+    def handle_request(self, for_user: str, for_node: str, resource_id: int, size: int, at_timestamp: int):
         node = self.nodes[for_node]
-        if node.retrieve(content.identifier, at_timestamp) != None:
-            node.cache_metrics.track_hit(content.size())
+        if node.retrieve(resource_id, at_timestamp) != None:
+            node.cache_metrics.track_hit(size)
         else:
-            content_neighbour = node.content_neighbour.get(content.identifier)
+            content_neighbours = self.content_neighbours[for_node]
+            content_neighbour = content_neighbours.get(resource_id)
             if content_neighbour != None:
                 node.cache_metrics.track_request_neighbour()
-                if self.nodes[content_neighbour].has(content.identifier):
-                    node.cache_metrics.track_request_neighbour_success(content.size())
-                    node.cache_metrics.track_hit(content.size())
+                if self.nodes[content_neighbour].has(resource_id):
+                    node.cache_metrics.track_request_neighbour_success(size)
+                    node.cache_metrics.track_hit(size)
                     if not self.outsource_resources:
-                        node.store(content.identifier, content, at_timestamp)
+                        node.store(resource_id, size, at_timestamp)
                     return
                 else:
-                    node.content_neighbour[content.identifier] = None
+                    content_neighbours[resource_id] = None
 
-            latest_nodes = self.find_latest_nodes(for_user, for_node, content_neighbour)
-
-            for neighbour in latest_nodes:
-                node.cache_metrics.track_request_neighbour()
-                if self.nodes[neighbour].has(content.identifier):
-                    node.content_neighbour[content.identifier] = neighbour
-                    node.cache_metrics.track_request_neighbour_success(content.size())
-                    node.cache_metrics.track_hit(content.size())
-                    if not self.outsource_resources:
-                        node.store(content.identifier, content, at_timestamp)
-                    return
+            # The neighbours are asked in order until one holds the
+            # resource, the index tells up front whether and which one
+            # does, so the candidates are only listed on success.
+            bits = self.holders.bits
+            excluded = bits[for_node] | (bits[content_neighbour] if content_neighbour != None else 0)
+            candidates = self.candidate_mask(for_user, for_node) & ~excluded
+            held = self.holders.held(resource_id, candidates)
+            if held != 0:
+                latest_nodes = self.find_latest_nodes(for_user, for_node, content_neighbour)
+                position = self.holders.first_holder(held, latest_nodes)
+                node.cache_metrics.track_request_neighbour(position + 1)
+                content_neighbours[resource_id] = latest_nodes[position]
+                node.cache_metrics.track_request_neighbour_success(size)
+                node.cache_metrics.track_hit(size)
+                if not self.outsource_resources:
+                    node.store(resource_id, size, at_timestamp)
+                return
 
+            node.cache_metrics.track_request_neighbour(bin(candidates).count("1"))
             node.cache_metrics.track_miss()
             node.cache_metrics.track_request_origin()
-            node.store(content.identifier, content, at_timestamp)
-            node.cache_metrics.track_bytes_origin(content.size())
+            node.store(resource_id, size, at_timestamp)
+            node.cache_metrics.track_bytes_origin(size)
+
+    def handle_node_connect(self, for_user: str, for_node: str):
+        super().handle_node_connect(for_user, for_node)
+        # Without a trail there is nothing to keep track of.
+        if self.node_trail_length > 0:
+            trail = self.__latest_n_nodes(self.node_trail_length, for_user)
+            self.trails[for_user] = trail
+            self.trail_masks[for_user] = self.holders.mask(trail)
+
+    def candidate_mask(self, user, node) -> int:
+        """The bits of the nodes `find_latest_nodes` picks from."""
+        return self.trail_masks.get(user, 0)
 
     def find_latest_nodes(self, user, node, content_neighbour) -> list[str]:
-        return [ x for x in self.__latest_n_nodes(self.node_trail_length, user)
+        return [ x for x in self.trails.get(user, [])
                              if x != content_neighbour and x != node ]
 
     def __latest_n_nodes(self, n: int, for_user: str) -> list[str]:
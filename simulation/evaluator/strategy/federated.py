@@ -1,36 +1,62 @@
-from simulation.evaluator.cache.cache_item import CacheItem
-from simulation.evaluator.cache.lru_cache import LRUCache
+from simulation.evaluator.cache.finite_cache import FiniteCache
+from simulation.evaluator.cache.policies import CACHE_POLICIES
 from simulation.evaluator.strategy.strategy import CacheStrategy
+from simulation.evaluator.placement import Placement, ModuloPlacement
+from simulation.evaluator.resource_catalog import ResourceCatalog
+from typing import Optional
 
 class FederatedStrategy(CacheStrategy):
-    def __init__(self, nodes: dict[str, dict[str, int]]):
+    """Every resource is cached only on the node the placement assigns it
+    to, whatever node requests it.
+
+    Every node sees the requests of all users for its resources, so the
+    admission of the plain `LRUCache`, which only stores an item on its
+    third miss, costs them more hits than it costs a node that only
+    serves its own users.  `cache_policy` picks the replacement policy of
+    the nodes from `CACHE_POLICIES`.
+
+    """
+    placement: Placement
+    cache_policy: str
+    # The node responsible for every resource id, computed by `placement`
+    # once for `assigned_catalog`.
+    node_for_resource: list[str]
+    assigned_catalog: Optional[ResourceCatalog] = None
+
+    def __init__(self, nodes: dict[str, dict[str, int]], placement: Optional[Placement] = None, cache_policy: str = "lru"):
+        self.cache_policy = cache_policy
         super().__init__({ name: self.build_node(capacity)
                            for name, capacity in nodes.items() })
+        self.placement = placement if placement != None else ModuloPlacement()
+        self.node_for_resource = []
 
-    def build_node(self, capacity: int) -> LRUCache:
-        return LRUCache(capacity=capacity)
+    def build_node(self, capacity: int) -> FiniteCache:
+        return CACHE_POLICIES[self.cache_policy](capacity)
 
-    def handle_request(self, for_user: str, for_node: str, content: CacheItem, at_timestamp: int):
+    def handle_request(self, for_user: str, for_node: str, resource_id: int, size: int, at_timestamp: int):
         node = self.nodes[for_node]
-        target_node_id = self.__node_for_identifier(content.identifier)
+        target_node_id = self.__node_for_identifier(resource_id)
         target_node = self.nodes[target_node_id]
 
-        if target_node.retrieve(content.identifier, at_timestamp) != None:
-            target_node.cache_metrics.track_hit(content.size())
+        if target_node.retrieve(resource_id, at_timestamp) != None:
+            target_node.cache_metrics.track_hit(size)
         else:
             target_node.cache_metrics.track_miss()
             target_node.cache_metrics.track_request_origin()
-            target_node.store(content.identifier, content, at_timestamp)
-            target_node.cache_metrics.track_bytes_origin(content.size())
+            target_node.store(resource_id, size, at_timestamp)
+            target_node.cache_metrics.track_bytes_origin(size)
 
         if target_node_id != for_node:
             node.cache_metrics.track_request_neighbour()
-            node.cache_metrics.track_request_neighbour_success(content.size())
+            node.cache_metrics.track_request_neighbour_success(size)
 
 
-    def __node_for_identifier(self, identifier: str):
-        """Hashes the identifier and selects the appropriate node based
-        on that hash.
+    def __node_for_identifier(self, resource_id: int):
+        """Selects the node responsible for the resource, as assigned by
+        the placement for the current catalog.
         """
-        h = identifier.__hash__()
-        return list(self.nodes.keys())[h % len(self.nodes)]
+        if self.assigned_catalog is not self.catalog:
+            nodes = list(self.nodes.keys())
+            self.node_for_resource = [ nodes[i] for i in self.placement.assign(self.catalog, nodes).tolist() ]
+            self.assigned_catalog = self.catalog
+        return self.node_for_resource[resource_id]
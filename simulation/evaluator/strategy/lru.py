@@ -1,21 +1,26 @@
-from simulation.evaluator.cache.cache_item import CacheItem
-from simulation.evaluator.cache.lru_cache_linked import LRUCache
+from simulation.evaluator.cache.finite_cache import FiniteCache
+from simulation.evaluator.cache.policies import CACHE_POLICIES
 from simulation.evaluator.strategy.strategy import CacheStrategy
 
 class LRUStrategy(CacheStrategy):
-    def __init__(self, nodes: dict[str, int]):
+    """Every node caches the resources requested on it, with the
+    replacement policy `cache_policy` from `CACHE_POLICIES`."""
+    cache_policy: str
+
+    def __init__(self, nodes: dict[str, int], cache_policy: str = "lru"):
+        self.cache_policy = cache_policy
         super().__init__({ name: self.build_node(capacity)
                        for name, capacity in nodes.items() })
 
-    def build_node(self, node_capacity: int) -> LRUCache:
-        return LRUCache(capacity=node_capacity)
+    def build_node(self, node_capacity: int) -> FiniteCache:
+        return CACHE_POLICIES[self.cache_policy](node_capacity)
 
-    def handle_request(self, for_user: str, for_node: str, content: CacheItem, at_timestamp: int):
+    def handle_request(self, for_user: str, for_node: str, resource_id: int, size: int, at_timestamp: int):
         node = self.nodes[for_node]
-        if node.retrieve(content.identifier, at_timestamp) != None:
-            node.cache_metrics.track_hit(content.size())
+        if node.retrieve(resource_id, at_timestamp) != None:
+            node.cache_metrics.track_hit(size)
         else:
             node.cache_metrics.track_miss()
             node.cache_metrics.track_request_origin()
-            node.store(content.identifier, content, at_timestamp)
-            node.cache_metrics.track_bytes_origin(content.size())
+            node.store(resource_id, size, at_timestamp)
+            node.cache_metrics.track_bytes_origin(size)
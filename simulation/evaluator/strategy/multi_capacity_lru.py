@@ -0,0 +1,154 @@
+from simulation.evaluator.instruction_parser import TraceIterator
+import simulation.evaluator.instructions as ins
+from simulation.evaluator.statistics.cache_metrics import CacheMetrics
+from simulation.evaluator.statistics.file_writer import StatsFileWriter
+from collections import defaultdict
+from dataclasses import replace
+from typing import Optional
+
+class CapacityState:
+    """The state of a single LRU cache within a `MultiCapacityLRUNode`."""
+    capacity: int
+    content: set[str]
+    req_count: dict[str, int]
+    boundary: int
+    cache_metrics: CacheMetrics
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.content = set()
+        self.req_count = defaultdict(int)
+        self.boundary = 0
+        self.cache_metrics = CacheMetrics()
+
+
+class MultiCapacityLRUNode:
+    """Simulates the `LRUCache` of a single node for several capacities at
+    once.
+
+    All capacities share one recency stack: every request appends the
+    resource to `slots` and clears its previous slot, so the slots are
+    ordered by last request.  Items stored in an LRU cache are always
+    requested on a hit, so within every capacity the stored items are
+    ordered the same way.  Every capacity keeps a `boundary` in the slots
+    below which it stores nothing, evicting moves the boundary up over
+    the least recently used items.  Because the boundary only moves up,
+    evictions cost amortized constant time per capacity.
+
+    Admission (`min_req_count`) and skipping items that exceed the
+    capacity are tracked per capacity, so the results are identical to
+    running `LRUStrategy` for every capacity separately.
+
+    """
+    capacities: list[CapacityState]
+    min_req_count: int
+    slots: list[Optional[str]]
+    offset: int
+    position: dict[str, int]
+    sizes: dict[str, int]
+
+    def __init__(self, capacities: list[int], min_req_count: int = 3):
+        self.capacities = [ CapacityState(capacity) for capacity in capacities ]
+        self.min_req_count = min_req_count
+        self.slots = []
+        self.offset = 0
+        self.position = {}
+        self.sizes = {}
+
+    def handle_request(self, identifier: str, size: int):
+        previous = self.position.get(identifier)
+        if previous != None:
+            self.slots[previous - self.offset] = None
+        self.position[identifier] = self.offset + len(self.slots)
+        self.slots.append(identifier)
+        self.sizes[identifier] = size
+
+        for state in self.capacities:
+            metrics = state.cache_metrics
+            if identifier in state.content:
+                metrics.track_hit(size)
+                continue
+            metrics.track_miss()
+            metrics.track_request_origin()
+            metrics.track_bytes_origin(size)
+            if size > state.capacity:
+                continue
+            state.req_count[identifier] += 1
+            if state.req_count[identifier] < self.min_req_count:
+                continue
+            del state.req_count[identifier]
+            state.content.add(identifier)
+            metrics.track_item_stored(size)
+            if metrics.bytes_used > state.capacity:
+                self.__evict(state)
+
+    def __evict(self, state: CapacityState):
+        """Evict the least recently used items until the content fits."""
+        metrics = state.cache_metrics
+        while metrics.bytes_used > state.capacity:
+            identifier = self.slots[state.boundary - self.offset]
+            if identifier != None and identifier in state.content:
+                state.content.remove(identifier)
+                metrics.track_item_removed(self.sizes[identifier])
+            state.boundary += 1
+        self.__compact()
+
+    def __compact(self):
+        """Drop the slots below the lowest boundary, no capacity looks at
+        them again."""
+        lowest_boundary = min(state.boundary for state in self.capacities)
+        no_dropped = lowest_boundary - self.offset
+        if no_dropped < 1 << 16 or no_dropped < len(self.slots) // 2:
+            return
+        for identifier in self.slots[:no_dropped]:
+            if identifier != None:
+                # Only content of a capacity needs a position, every other
+                # item will start in a new slot on its next request.
+                del self.position[identifier]
+        del self.slots[:no_dropped]
+        self.offset = lowest_boundary
+
+
+class MultiCapacityLRU:
+    """Evaluates `LRUStrategy` for a list of capacities in a single pass
+    over a trace.
+
+    Produces the same statistics as running `StrategyRunner` with an
+    `LRUStrategy` for every capacity, at the cost of decoding the trace
+    once.
+
+    """
+    capacities: list[int]
+    nodes: dict[str, MultiCapacityLRUNode]
+
+    def __init__(self, nodes: list[str], capacities: list[int], min_req_count: int = 3):
+        self.capacities = capacities
+        self.nodes = { node: MultiCapacityLRUNode(capacities, min_req_count=min_req_count)
+                       for node in nodes }
+
+    def handle_request(self, for_node: str, identifier: str, size: int):
+        self.nodes[for_node].handle_request(identifier, size)
+
+    def capture_statistics(self) -> dict[int, dict[str, CacheMetrics]]:
+        return { capacity: { key: replace(node.capacities[i].cache_metrics) for key, node in self.nodes.items() }
+                 for i, capacity in enumerate(self.capacities) }
+
+    def perform(self, instructions: TraceIterator, content_map: dict[str, int], stats_writers: dict[int, dict[str, StatsFileWriter]]):
+        """Replays `instructions` and writes the statistics of every node
+        for every capacity to `stats_writers[capacity][node]`."""
+        instructions.reset()
+        iteration = 0
+        for i in instructions:
+            if isinstance(i, ins.RequestInstruction):
+                size = content_map.get(i.identifier)
+                if size != None:
+                    self.nodes[i.node_id].handle_request(i.identifier, size)
+            elif isinstance(i, ins.SetIterationInstruction):
+                iteration = i.iteration
+            elif isinstance(i, ins.CollectStatisticsInstruction):
+                for capacity, node_stats in self.capture_statistics().items():
+                    for node, stats in node_stats.items():
+                        stats_writers[capacity][node].write_stats(iteration, stats)
+        for node_writers in stats_writers.values():
+            for stats_writer in node_writers.values():
+                stats_writer.flush()
@@ -2,10 +2,16 @@ from .cooperative_lru import CooperativeLRUStrategy
 
 class NeighbouringLRUStrategy(CooperativeLRUStrategy):
     node_map: dict[str, list[str]]
+    # The bits of the neighbours of every node in `holders`.
+    neighbour_masks: dict[str, int]
 
-    def __init__(self, nodes: dict[str, dict[str, any]], node_map: dict[str, list[str]], outsource_resources: bool = False):
-        super().__init__(nodes, 0, outsource_resources)
+    def __init__(self, nodes: dict[str, dict[str, any]], node_map: dict[str, list[str]], outsource_resources: bool = False, cache_policy: str = "lru"):
+        super().__init__(nodes, 0, outsource_resources, cache_policy=cache_policy)
         self.node_map = node_map
+        self.neighbour_masks = { node: self.holders.mask(neighbours) for node, neighbours in node_map.items() }
+
+    def candidate_mask(self, user, node) -> int:
+        return self.neighbour_masks[node]
 
     def find_latest_nodes(self, user, node, content_neighbour) -> list[str]:
         return [ x for x in self.node_map[node] if x != node and x != content_neighbour ]
@@ -1,7 +1,7 @@
-from simulation.evaluator.cache.cache_item import CacheItem
 from simulation.evaluator.cache.profile_lru_cache import ProfileLRUCache
 from simulation.evaluator.strategy.strategy import CacheStrategy
 from collections import defaultdict
+from typing import Optional
 from simulation.evaluator.cache.profile_lru_cache import UserProfile
 
 class ProfilesStrategy(CacheStrategy):
@@ -23,50 +23,62 @@ class ProfilesStrategy(CacheStrategy):
         self.iteration = iteration
         if self.iteration % self.ranking_timeout == 0:
             for node in self.nodes.values():
-                node.update_ranking({ user: profile for user, profile in self.profiles.items()
-                                      if user in node.connected_profiles })
+                node.update_ranking()
 
     def handle_node_connect(self, for_user: str, to_node: str):
         super().handle_node_connect(for_user, to_node)
-        self.nodes[to_node].connected_profiles.add(for_user)
+        self.nodes[to_node].connect_profile(for_user, self.profiles[for_user])
 
     def handle_node_disconnect(self, for_user: str):
         from_node = self.user_node_map[for_user][-1]
         self.profiles[for_user].last_connected_node = from_node
-        self.nodes[from_node].connected_profiles.remove(for_user)
+        self.nodes[from_node].disconnect_profile(for_user, self.profiles[for_user])
 
-    def handle_request(self, for_user: str, for_node: str, content: CacheItem, at_timestamp: int):
-        self.profiles[for_user].track(content.identifier)
+    def handle_request(self, for_user: str, for_node: str, resource_id: int, size: int, at_timestamp: int):
+        removed = self.profiles[for_user].track(resource_id)
+        self.__track_popularity(for_user, resource_id, removed)
         node = self.nodes[for_node]
 
-        if node.retrieve(content.identifier, at_timestamp) != None:
-            node.cache_metrics.track_hit(content.size())
+        if node.retrieve(resource_id, at_timestamp) != None:
+            node.cache_metrics.track_hit(size)
             return
 
-        neighbour = node.content_neighbour.get(content.identifier, None)
+        neighbour = node.content_neighbour.get(resource_id, None)
         if neighbour != None:
             node.cache_metrics.track_request_neighbour()
-            if self.nodes[neighbour].has(content.identifier):
-                node.cache_metrics.track_request_neighbour_success(content.size())
-                node.cache_metrics.track_hit(content.size())
-                node.store(content.identifier, content)
+            if self.nodes[neighbour].has(resource_id):
+                node.cache_metrics.track_request_neighbour_success(size)
+                node.cache_metrics.track_hit(size)
+                node.store(resource_id, size)
                 return
             else:
-                node.content_neighbour[content.identifier] = None
+                node.content_neighbour[resource_id] = None
 
-        rank = node.ranking.get(content.identifier, None)
+        rank = node.ranking.get(resource_id, None)
         if rank != None:
             neighbours = [ self.profiles[user].last_connected_node for user in rank.by_users ]
             for n in [ n for n in neighbours if n != None and n != for_node ]:
                 node.cache_metrics.track_request_neighbour()
-                if self.nodes[n].has(content.identifier):
-                    node.content_neighbour[content.identifier] = n
-                    node.cache_metrics.track_request_neighbour_success(content.size())
-                    node.cache_metrics.track_hit(content.size())
-                    node.store(content.identifier, content)
+                if self.nodes[n].has(resource_id):
+                    node.content_neighbour[resource_id] = n
+                    node.cache_metrics.track_request_neighbour_success(size)
+                    node.cache_metrics.track_hit(size)
+                    node.store(resource_id, size)
                     return
 
         node.cache_metrics.track_miss()
         node.cache_metrics.track_request_origin()
-        node.store(content.identifier, content)
-        node.cache_metrics.track_bytes_origin(content.size())
+        node.store(resource_id, size)
+        node.cache_metrics.track_bytes_origin(size)
+
+    def __track_popularity(self, for_user: str, resource_id: int, removed: Optional[int]):
+        """Passes the resource added to and the resource dropped from the
+        profile of `for_user` on to the node the user is connected to."""
+        connected_nodes = self.user_node_map.get(for_user)
+        if connected_nodes == None:
+            return
+        node = self.nodes[connected_nodes[-1]]
+        if for_user in node.connected_profiles:
+            node.popularity.add(for_user, resource_id)
+            if removed != None:
+                node.popularity.remove(for_user, removed)
@@ -1,33 +1,45 @@
 from simulation.evaluator.strategy.strategy import CacheStrategy
-from simulation.evaluator.cache.cache_item import CacheItem
 from simulation.evaluator.instruction_parser import TraceIterator
 import simulation.evaluator.instructions as ins
 from simulation.evaluator.statistics.file_writer import StatsFileWriter, CacheMetrics
-from collections import defaultdict
+from simulation.evaluator.statistics.metrics_time_series import MetricsTimeSeries
+from simulation.evaluator.resource_catalog import ResourceCatalog
+from typing import Optional, Union
 
 class StrategyRunner:
     strategy: CacheStrategy
     instructions: TraceIterator
-    content_map: dict[str, int]
+    catalog: ResourceCatalog
     stats_writers: dict[str, StatsFileWriter]
+    metrics: MetricsTimeSeries
 
-    def __init__(self, strategy: CacheStrategy, instructions: TraceIterator, content_map: dict[str, int], stats_writers: dict[str, StatsFileWriter]):
+    def __init__(self, strategy: CacheStrategy, instructions: TraceIterator, content_map: Union[dict[str, int], ResourceCatalog], stats_writers: Optional[dict[str, StatsFileWriter]] = None):
+        """The `content_map` is either a resource map or a catalog built
+        from one, a catalog can be shared between runs to intern the
+        resources only once.  Strategies are handed the interned
+        resource ids instead of the identifiers.
+
+        The statistics are collected in `metrics`, `stats_writers` are
+        only needed to also write them to disk.
+
+        """
         self.strategy = strategy
         self.instructions = instructions
         self.instructions.reset()
-        self.content_map = content_map
-        self.stats_writers = stats_writers
+        self.catalog = ResourceCatalog.of(content_map)
+        self.strategy.catalog = self.catalog
+        self.stats_writers = stats_writers if stats_writers != None else {}
+        self.metrics = MetricsTimeSeries(list(self.strategy.nodes.keys()))
 
-    def perform(self):
+    def perform(self) -> MetricsTimeSeries:
         timestamp = 0
         iteration = 0
-        node_stats: dict[str, list[CacheMetrics]] = defaultdict(list)
+        resource_ids, sizes = self.catalog.ids, self.catalog.size_list
         for i in self.instructions:
             if isinstance(i, ins.RequestInstruction):
-                identifier = i.identifier
-                if identifier in self.content_map:
-                    item = CacheItem(identifier=identifier, byte_size=self.content_map[identifier], last_accessed=-1)
-                    self.strategy.handle_request(i.user_id, i.node_id, item, at_timestamp=timestamp)
+                resource_id = resource_ids.get(i.identifier)
+                if resource_id != None:
+                    self.strategy.handle_request(i.user_id, i.node_id, resource_id, sizes[resource_id], at_timestamp=timestamp)
             if isinstance(i, ins.ConnectInstruction):
                 self.strategy.handle_node_connect(i.user_id, i.node_id)
             if isinstance(i, ins.DisconnectInstruction):
@@ -36,11 +48,86 @@ class StrategyRunner:
                 iteration = i.iteration
                 self.strategy.handle_iteration(iteration)
             if isinstance(i, ins.CollectStatisticsInstruction):
-                for node, stats in self.strategy.capture_statistics().items():
-                    node_stats[node].append(stats)
+                node_stats = self.strategy.capture_statistics()
+                self.metrics.record(iteration, node_stats)
+                for node, stats in node_stats.items():
                     self.__write_stats(node, iteration, stats)
             timestamp += 1
-        return node_stats
+        for stats_writer in self.stats_writers.values():
+            stats_writer.flush()
+        return self.metrics
 
     def __write_stats(self, for_node: str, iteration: int, stats: CacheMetrics):
-        self.stats_writers[for_node].write_stats(iteration, stats)
+        stats_writer = self.stats_writers.get(for_node)
+        if stats_writer != None:
+            stats_writer.write_stats(iteration, stats)
+
+
+class MultiStrategyRunner:
+    """Replays a trace through several strategies in lockstep.
+
+    Every instruction is decoded and its resource looked up once, then
+    handed to every strategy in turn.  Strategies do not share any state,
+    so the statistics of every strategy are identical to running it with
+    its own `StrategyRunner`.
+
+    """
+    strategies: dict[str, CacheStrategy]
+    instructions: TraceIterator
+    catalog: ResourceCatalog
+    stats_writers: dict[str, dict[str, StatsFileWriter]]
+    metrics: dict[str, MetricsTimeSeries]
+
+    def __init__(self, strategies: dict[str, CacheStrategy], instructions: TraceIterator, content_map: Union[dict[str, int], ResourceCatalog], stats_writers: Optional[dict[str, dict[str, StatsFileWriter]]] = None):
+        """`strategies` and `stats_writers` are keyed by a name for every
+        strategy, the writers of a strategy are keyed by node as for
+        `StrategyRunner`."""
+        self.strategies = strategies
+        self.instructions = instructions
+        self.instructions.reset()
+        self.catalog = ResourceCatalog.of(content_map)
+        for strategy in self.strategies.values():
+            strategy.catalog = self.catalog
+        self.stats_writers = stats_writers if stats_writers != None else {}
+        self.metrics = { name: MetricsTimeSeries(list(strategy.nodes.keys()))
+                         for name, strategy in self.strategies.items() }
+
+    def perform(self) -> dict[str, MetricsTimeSeries]:
+        timestamp = 0
+        iteration = 0
+        resource_ids, sizes = self.catalog.ids, self.catalog.size_list
+        strategies = list(self.strategies.values())
+        for i in self.instructions:
+            if isinstance(i, ins.RequestInstruction):
+                resource_id = resource_ids.get(i.identifier)
+                if resource_id != None:
+                    size = sizes[resource_id]
+                    for strategy in strategies:
+                        strategy.handle_request(i.user_id, i.node_id, resource_id, size, at_timestamp=timestamp)
+            elif isinstance(i, ins.ConnectInstruction):
+                for strategy in strategies:
+                    strategy.handle_node_connect(i.user_id, i.node_id)
+            elif isinstance(i, ins.DisconnectInstruction):
+                for strategy in strategies:
+                    strategy.handle_node_disconnect(i.user_id)
+            elif isinstance(i, ins.SetIterationInstruction):
+                iteration = i.iteration
+                for strategy in strategies:
+                    strategy.handle_iteration(iteration)
+            elif isinstance(i, ins.CollectStatisticsInstruction):
+                for name, strategy in self.strategies.items():
+                    self.__collect_statistics(name, strategy, iteration)
+            timestamp += 1
+        for stats_writers in self.stats_writers.values():
+            for stats_writer in stats_writers.values():
+                stats_writer.flush()
+        return self.metrics
+
+    def __collect_statistics(self, name: str, strategy: CacheStrategy, iteration: int):
+        node_stats = strategy.capture_statistics()
+        self.metrics[name].record(iteration, node_stats)
+        stats_writers = self.stats_writers.get(name, {})
+        for node, stats in node_stats.items():
+            stats_writer = stats_writers.get(node)
+            if stats_writer != None:
+                stats_writer.write_stats(iteration, stats)
@@ -1,10 +1,15 @@
 from dataclasses import replace
 from simulation.evaluator.cache.cache import Cache
+from simulation.evaluator.resource_catalog import ResourceCatalog
 from collections import defaultdict
+from typing import Optional
 
 class CacheStrategy:
     user_node_map: dict[str, list[str]]
     nodes: dict[str, Cache]
+    # The catalog the resource ids of requests are interned in, set by the
+    # `StrategyRunner`.
+    catalog: Optional[ResourceCatalog] = None
 
     def __init__(self, nodes: dict[str, Cache]):
         self.user_node_map = defaultdict(list)
@@ -13,7 +18,7 @@ class CacheStrategy:
     def handle_iteration(self, iteration: int):
         pass
 
-    def handle_request(self, for_node: str):
+    def handle_request(self, for_user: str, for_node: str, resource_id: int, size: int, at_timestamp: int):
         raise NotImplementedError
 
     def handle_node_connect(self, for_user: str, for_node: str):
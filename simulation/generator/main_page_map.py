@@ -5,13 +5,12 @@ import random
 from tqdm import tqdm
 import argparse
 import pathlib
-import gzip
 from .main_zipf import EdgeNode
 from .page_visitor import PageVisitor
 from .confined_list import ConfinedList
 from .node_visitor import NodeVisitor
 from .timeout_behaviour import TimeoutBehaviour
-from .utils import Page, read_page_map
+from .utils import Page, read_page_map, write_action_batches
 
 @dataclass
 class UserConfiguration:
@@ -82,6 +81,7 @@ def subset_of(content, filter_func):
 class UserSimulation:
     config: UserTraceConfig
     random: random.Random
+    input_files: list[str]
     page_map: dict[str, Page]
     resource_map: dict[str, int]
     pages: list[str]
@@ -91,28 +91,37 @@ class UserSimulation:
         self.config = config
         self.random = random.Random()
         self.random.seed(a=config.seed)
+        self.input_files = [ page_map_file ]
         self.page_map = read_page_map(page_map_file)
         self.pages = list(set(self.page_map.keys()))
 
-    def simulate(self) -> list[str]:
-        """Generate a set of actions for the supplied `TraceConfig`."""
+    def simulate_iterations(self):
+        """Generate the actions for the supplied `TraceConfig`, yielding the
+        actions of every iteration as a separate list."""
         starting_locations = [ self.random.choice(list(self.config.node_map.values()))
                                for i in range(self.config.no_users) ]
         users = [ self.__setup_user(i, starting_node)
                   for i, starting_node in enumerate(starting_locations) ]
 
-        actions = [ f"CON {i} {loc.identifier}"
-                          for i, loc in enumerate(starting_locations) ]
+        yield [ f"CON {i} {loc.identifier}"
+                for i, loc in enumerate(starting_locations) ]
         del starting_locations
 
         print(f"Simulating {self.config.no_iterations} iterations for {self.config.no_users} users.")
         for i in tqdm(range(self.config.no_iterations)):
-            actions.append(f"ITERATION {i}")
+            actions = [ f"ITERATION {i}" ]
             for user in users:
                 actions.extend(self.__simulate_user_iteration(user))
             actions.append(f"GET_STATS")
+            yield actions
 
-        return actions
+    def simulate(self) -> list[str]:
+        """Generate a set of actions for the supplied `TraceConfig`."""
+        return [ action for actions in self.simulate_iterations() for action in actions ]
+
+    def write_trace(self, out_file):
+        """Write the trace to a gzipped trace file one iteration at a time."""
+        write_action_batches(out_file, self.simulate_iterations())
 
     def __create_user_move_behaviour(self):
         return lambda: self.random.random() <= self.config.move_chance
@@ -199,7 +208,4 @@ if __name__ == "__main__":
 
     config = UserTraceConfig(node_map=node_map, no_users=no_users, user_subset_size=user_subset_size, no_iterations=no_iterations, move_chance=move_chance, jump_chance=jump_chance, max_timeout=max_timeout, seed=args.seed)
     simulation = UserSimulation(config, args.page_map_file)
-    with gzip.open(args.out_file, 'wb') as f:
-        f.write(str.encode(""))
-        for action in simulation.simulate():
-            f.write(str.encode(f"{action}\n"))
+    simulation.write_trace(args.out_file)
@@ -5,8 +5,10 @@ import random
 from tqdm import tqdm
 import argparse
 import pathlib
-import gzip
-from .utils import read_resource_map
+import hashlib
+import operator
+import numpy as np
+from .utils import read_resource_map, write_action_batches
 from .node_visitor import NodeVisitor
 from .confined_list import ConfinedList
 from .edge_graph import EdgeNode
@@ -68,12 +70,14 @@ def cumulative_weights_for(no_items: int = 1, zipf_exponent: float = 1.0):
 class Simulation:
     config: TraceConfig
     random: random.Random
+    input_files: list[str]
     resource_map: dict[str, int]
     resources: list[str]
     cumulative_weights: list[float]
 
     def __init__(self, config: TraceConfig, resource_map_file: str):
         self.config = config
+        self.input_files = [ resource_map_file ]
         self.random = random.Random()
         self.random.seed(a=config.seed)
         self.resource_map = read_resource_map(resource_map_file)
@@ -81,25 +85,33 @@ class Simulation:
         self.random.shuffle(self.resources)
         self.cumulative_weights = cumulative_weights_for(no_items=len(self.resources), zipf_exponent=self.config.zipf_exponent)
 
-    def simulate(self) -> list[str]:
-        """Generate a set of actions for the supplied `TraceConfig`."""
+    def simulate_iterations(self):
+        """Generate the actions for the supplied `TraceConfig`, yielding the
+        actions of every iteration as a separate list."""
         starting_locations = [ self.random.choice(list(self.config.node_map.values()))
                                for i in range(self.config.no_users) ]
         users = [ self.__setup_user(i, starting_node)
                   for i, starting_node in enumerate(starting_locations) ]
 
-        actions = [ f"CON {i} {loc.identifier}"
-                          for i, loc in enumerate(starting_locations) ]
+        yield [ f"CON {i} {loc.identifier}"
+                for i, loc in enumerate(starting_locations) ]
         del starting_locations
 
         print(f"Simulating {self.config.no_iterations} iterations for {self.config.no_users} users.")
         for i in tqdm(range(self.config.no_iterations)):
-            actions.append(f"ITERATION {i}")
+            actions = [ f"ITERATION {i}" ]
             for user in users:
                 actions.extend(self.__simulate_user_iteration(user))
             actions.append(f"GET_STATS")
+            yield actions
 
-        return actions
+    def simulate(self) -> list[str]:
+        """Generate a set of actions for the supplied `TraceConfig`."""
+        return [ action for actions in self.simulate_iterations() for action in actions ]
+
+    def write_trace(self, out_file):
+        """Write the trace to a gzipped trace file one iteration at a time."""
+        write_action_batches(out_file, self.simulate_iterations())
 
     def __create_user_move_behaviour(self, likelihood: float = 0.05):
         return lambda: self.random.random() <= likelihood
@@ -132,6 +144,98 @@ class Simulation:
     def __pick_resources(self, no_resources: int = 1) -> str:
         return self.random.choices(self.resources, cum_weights=self.cumulative_weights, k=no_resources)
 
+def numpy_seed_for(seed: Optional[str]) -> Optional[int]:
+    """Derives a stable integer seed for NumPy from a (string) seed."""
+    if seed == None:
+        return None
+    return int.from_bytes(hashlib.sha256(str(seed).encode()).digest()[:8], 'little')
+
+def cumulative_weights_array(no_items: int = 1, zipf_exponent: float = 1.0) -> np.ndarray:
+    return np.cumsum(1.0 / np.power(np.arange(1, no_items + 1, dtype=np.float64), zipf_exponent))
+
+class VectorizedSimulation:
+    """NumPy-backed version of `Simulation`.
+
+    Movement decisions and resource picks are drawn for a block of
+    iterations in a single call, only users that move are handled one by
+    one.  The produced traces follow the same format and behaviour as
+    `Simulation` but not the same random sequence, they are deterministic
+    for a given `TraceConfig.seed`.
+
+    """
+    config: TraceConfig
+    rng: np.random.Generator
+    input_files: list[str]
+    resource_map: dict[str, int]
+    resources: list[str]
+    cumulative_weights: np.ndarray
+    block_size: int
+
+    def __init__(self, config: TraceConfig, resource_map_file: str, block_size: int = 100):
+        self.config = config
+        self.rng = np.random.default_rng(numpy_seed_for(config.seed))
+        self.input_files = [ resource_map_file ]
+        self.resource_map = read_resource_map(resource_map_file)
+        # Sort before shuffling, the iteration order of a set of strings
+        # differs between processes.
+        resources = sorted(set(self.resource_map.keys()))
+        self.resources = [ resources[i] for i in self.rng.permutation(len(resources)) ]
+        self.cumulative_weights = cumulative_weights_array(no_items=len(self.resources), zipf_exponent=self.config.zipf_exponent)
+        self.block_size = block_size
+
+    def simulate_iterations(self):
+        """Generate the actions for the supplied `TraceConfig`, yielding the
+        actions of every iteration as a separate list."""
+        node_map = self.config.node_map
+        nodes = list(node_map.values())
+        no_users = self.config.no_users
+        starting_locations = self.rng.integers(0, len(nodes), size=no_users)
+        current = [ nodes[i].identifier for i in starting_locations ]
+        previous = [ None ] * no_users
+        prefixes = [ f"REQ {u} {node} " for u, node in enumerate(current) ]
+        yield [ f"CON {u} {node}" for u, node in enumerate(current) ]
+
+        total_weight = self.cumulative_weights[-1]
+        resources = self.resources
+        print(f"Simulating {self.config.no_iterations} iterations for {self.config.no_users} users.")
+        for block_start in tqdm(range(0, self.config.no_iterations, self.block_size), unit="block"):
+            block_size = min(self.block_size, self.config.no_iterations - block_start)
+            moves = self.rng.random((block_size, no_users)) <= self.config.move_chance
+            move_choices = self.rng.random((block_size, no_users))
+            picks = np.searchsorted(self.cumulative_weights, self.rng.random((block_size, no_users)) * total_weight, side='right')
+            np.minimum(picks, len(resources) - 1, out=picks)
+
+            for b in range(block_size):
+                movements = {}
+                for u in np.flatnonzero(moves[b]).tolist():
+                    options = node_map[current[u]].neighbours
+                    if previous[u] != None:
+                        options = options + [ previous[u] ]
+                    if len(options) == 0:
+                        continue
+                    new_node = options[int(move_choices[b, u] * len(options))]
+                    movements[u] = [ f"DCN {u} {current[u]}", f"CON {u} {new_node}" ]
+                    previous[u], current[u] = current[u], new_node
+                    prefixes[u] = f"REQ {u} {new_node} "
+
+                requests = list(map(operator.add, prefixes, [ resources[r] for r in picks[b].tolist() ]))
+                actions = [ f"ITERATION {block_start + b}" ]
+                last = 0
+                for u, movement in movements.items():
+                    actions.extend(requests[last:u])
+                    actions.extend(movement)
+                    last = u
+                actions.extend(requests[last:])
+                actions.append("GET_STATS")
+                yield actions
+
+    def simulate(self) -> list[str]:
+        """Generate a set of actions for the supplied `TraceConfig`."""
+        return [ action for actions in self.simulate_iterations() for action in actions ]
+
+    def write_trace(self, out_file):
+        """Write the trace straight to a gzipped trace file."""
+        write_action_batches(out_file, self.simulate_iterations())
 
 if __name__ == "__main__":
     """Generates a set of traces for a given amount of users, iterations,
@@ -152,6 +256,8 @@ if __name__ == "__main__":
                         help="The zipf exponent used (default is 0.8).")
     parser.add_argument('--move-chance', type=float, default=0.05,
                         help="How likely is the user to move to a different edge node in a range of (never) [0, 1.0] (every iteration)")
+    parser.add_argument('--vectorized', action='store_true',
+                        help="Use the NumPy-backed generator, which is considerably faster but draws a different random sequence.")
 
     args = parser.parse_args()
     resource_map_file = args.resource_map
@@ -163,9 +269,8 @@ if __name__ == "__main__":
                      i, n in data["nodes"].items() }
 
     config = TraceConfig(no_iterations=args.no_iterations, no_users=args.no_users, seed=args.seed, move_chance=args.move_chance, node_map=node_map, zipf_exponent=args.zipf_exponent)
-    simulation = Simulation(config, args.resource_map)
-
-    with gzip.open(args.out_file, 'wb') as f:
-        f.write(str.encode(""))
-        for action in simulation.simulate():
-            f.write(str.encode(f"{action}\n"))
+    if args.vectorized:
+        simulation = VectorizedSimulation(config, args.resource_map)
+    else:
+        simulation = Simulation(config, args.resource_map)
+    simulation.write_trace(args.out_file)
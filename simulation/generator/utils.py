@@ -1,7 +1,21 @@
 from dataclasses import dataclass
 from typing import Optional
+from typing import Iterable
 import re
 import csv
+import gzip
+
+# Compression level for written traces, the default (9) is several times
+# slower to write while the traces barely get smaller.
+TRACE_COMPRESSION_LEVEL = 6
+
+def write_action_batches(out_file, batches: Iterable[list[str]]):
+    """Write batches of actions to a gzipped trace file as they are
+    generated, so only a single batch is kept in memory at a time."""
+    with gzip.open(out_file, 'wb', compresslevel=TRACE_COMPRESSION_LEVEL) as f:
+        for actions in batches:
+            if len(actions) > 0:
+                f.write(str.encode("\n".join(actions) + "\n"))
 
 def clean_identifier(identifier: str) -> str:
     """Removes all whitespaces from the identifier."""